@@ -0,0 +1,89 @@
+import datetime
+import time
+
+import pandas as pd
+import streamlit as st
+
+from history_store import legacy_history, migrate_history
+from render_cache import render_cache_stats
+from render_stats import page_stats, stats_json, total_stats
+
+# Staff IDs allowed to see server instrumentation
+ADMIN_STAFF_IDS = ("TGS001",)
+WINDOWS = {"Last 5 minutes": 300, "Last hour": 3600, "Everything recorded": None}
+
+
+def is_admin(staff_id):
+    return staff_id in ADMIN_STAFF_IDS
+
+
+def _stats_table(stats):
+    rows = [{
+        "Session": session_id[:8],
+        "Staff ID": staff_id,
+        "Page": page,
+        "Runs": totals.runs,
+        "CPU (s)": totals.cpu_seconds,
+        "Wall (s)": totals.wall_seconds,
+        "Mean CPU (ms)": totals.mean_cpu_ms,
+        "Mean wall (ms)": totals.mean_wall_ms,
+        "Markdown (KB)": totals.markdown_bytes / 1024
+    } for (session_id, staff_id, page), totals in stats.items()]
+    return pd.DataFrame(rows).sort_values("CPU (s)", ascending=False)
+
+
+def show_admin_page():
+    """Administrator view: server time spent per console and page function"""
+    st.markdown('<div class="section-header">🛠️ Server Load</div>', unsafe_allow_html=True)
+    if not is_admin(st.session_state.staff_id):
+        st.error("This page is for administrators only")
+        return
+
+    legacy = legacy_history()
+    if legacy:
+        st.warning(f"History saved by an older version keeps the guideline text in every row and cannot be "
+                   f"read until it is converted: {', '.join(legacy)}")
+        if st.button("🗄️ Convert History", key="admin_migrate"):
+            # Each file is backed up to <file>.bak before it is rewritten
+            with st.spinner("Converting history..."):
+                converted = migrate_history()
+            st.success(f"Converted {converted:,} history rows to catalog references")
+
+    # Counted since the server started, whatever the window
+    cache = render_cache_stats()
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Render cache hit rate", f"{cache.hit_rate:.1%}")
+    col2.metric("Hits / misses", f"{cache.hits} / {cache.misses}")
+    col3.metric("Cached fragments", f"{cache.size} / {cache.capacity}")
+
+    window = st.radio("Window", list(WINDOWS), horizontal=True, key="admin_window")
+    since = time.time() - WINDOWS[window] if WINDOWS[window] else None
+    stats = page_stats(since)
+    if not stats:
+        st.info("No page renders recorded yet")
+        return
+    table = _stats_table(stats)
+
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Consoles", table["Session"].nunique())
+    # Outermost renders only - full runs of show_main_interface plus fragment reruns on their own;
+    # the rows below count nested pages in their caller as well
+    totals = total_stats(since)
+    col2.metric("Server CPU", f"{totals.cpu_seconds:.2f} s")
+    col3.metric("Markdown sent", f"{totals.markdown_bytes / 1024 / 1024:.1f} MB")
+
+    st.markdown('<div class="section-header">📄 By Page</div>', unsafe_allow_html=True)
+    by_page = table.groupby("Page", as_index=False)[["Runs", "CPU (s)", "Wall (s)", "Markdown (KB)"]].sum()
+    by_page["Mean CPU (ms)"] = by_page["CPU (s)"] * 1000 / by_page["Runs"]
+    st.dataframe(by_page.sort_values("CPU (s)", ascending=False).round(3), hide_index=True, width='stretch')
+
+    st.markdown('<div class="section-header">🖥️ By Console</div>', unsafe_allow_html=True)
+    st.dataframe(table.round(3), hide_index=True, width='stretch')
+
+    st.download_button(
+        label="📥 Download JSON",
+        data=lambda: stats_json(since),
+        file_name=f"TGS_Server_Load_{datetime.datetime.now().strftime('%Y%m%d_%H%M')}.json",
+        mime="application/json",
+        key="admin_stats_download"
+    )
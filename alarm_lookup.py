@@ -0,0 +1,148 @@
+import re
+import sys
+from typing import NamedTuple
+
+import streamlit as st
+
+from mor_catalog import catalog_index, get_catalog
+from scenario_search import select_scenario
+
+# Alarm system label and the catalog field holding its text
+ALARM_SYSTEMS = (
+    ('ATS', 'ats_alarm'),
+    ('FSCADA', 'fscada_alarm'),
+    ('HMI', 'hmi_alarm')
+)
+NGRAM_SIZE = 3
+MIN_SCORE = 0.35
+MAX_RESULTS = 8
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+class AlarmMatch(NamedTuple):
+    scenario: object
+    system: str
+    alarm_text: str
+    score: float
+
+
+def alarm_ngrams(text):
+    """Character n-grams of the normalized alarm text, padded at word edges"""
+    grams = set()
+    for word in _WORD_RE.findall(text.lower()):
+        padded = f" {word} "
+        if len(padded) <= NGRAM_SIZE:
+            grams.add(padded)
+            continue
+        for i in range(len(padded) - NGRAM_SIZE + 1):
+            grams.add(padded[i:i + NGRAM_SIZE])
+    return grams
+
+
+class AlarmIndex:
+    """Character n-gram index over the ATS, FSCADA and HMI alarm texts of the catalog"""
+
+    def __init__(self, records):
+        self.records = records
+        # Many scenarios share an alarm text, so grams are indexed per distinct text
+        self.texts = []
+        self.owners = []
+        self.gram_counts = []
+        self.postings = {}
+        text_ids = {}
+        for idx, record in enumerate(records):
+            for system, field in ALARM_SYSTEMS:
+                text = getattr(record, field)
+                if not text:
+                    continue
+                text_id = text_ids.get(text)
+                if text_id is None:
+                    text_id = text_ids[text] = len(self.texts)
+                    grams = alarm_ngrams(text)
+                    self.texts.append(text)
+                    self.owners.append([])
+                    self.gram_counts.append(len(grams))
+                    for gram in grams:
+                        self.postings.setdefault(gram, []).append(text_id)
+                self.owners[text_id].append((idx, system))
+
+    def lookup(self, alarm_text, systems=None, limit=MAX_RESULTS, min_score=MIN_SCORE):
+        """Scenarios whose alarm text looks like alarm_text, best match first"""
+        query = alarm_ngrams(alarm_text or '')
+        if not query:
+            return []
+
+        shared = {}
+        for gram in query:
+            for text_id in self.postings.get(gram, ()):
+                shared[text_id] = shared.get(text_id, 0) + 1
+
+        best = {}
+        for text_id, common in shared.items():
+            # Half coverage of the typed text, half Dice overlap - a short query still
+            # matches a long catalog alarm without every long alarm matching everything
+            dice = 2 * common / (len(query) + self.gram_counts[text_id])
+            score = 0.5 * common / len(query) + 0.5 * dice
+            if score < min_score:
+                continue
+            for idx, system in self.owners[text_id]:
+                if systems and system not in systems:
+                    continue
+                if idx not in best or best[idx].score < score:
+                    best[idx] = AlarmMatch(self.records[idx], system, self.texts[text_id], score)
+
+        ranked = sorted(best.values(), key=lambda match: (-match.score, match.scenario.equipment,
+                                                          match.scenario.failure_scenario))
+        return ranked[:limit]
+
+
+def get_alarm_index(catalog):
+    """Alarm index for this catalog version, built on first use"""
+    return catalog_index(catalog, AlarmIndex)
+
+
+def lookup_alarm(alarm_text, systems=None, catalog=None, limit=MAX_RESULTS, min_score=MIN_SCORE):
+    """Candidate scenarios for raw alarm text from the ATS, FSCADA or HMI screen"""
+    if catalog is None:
+        catalog = get_catalog()
+    return get_alarm_index(catalog).lookup(alarm_text, systems, limit, min_score)
+
+
+def show_alarm_lookup():
+    """Sidebar box - paste an alarm as shown on screen and pick the matching scenario"""
+    st.markdown("### 🚨 Alarm Lookup")
+    alarm_text = st.text_input(
+        "Alarm text",
+        key="alarm_lookup_query",
+        placeholder="e.g. APS Major Fault",
+        label_visibility="collapsed"
+    )
+    if not alarm_text:
+        return
+
+    matches = lookup_alarm(alarm_text)
+    if not matches:
+        st.info("No scenario matches this alarm")
+        return
+
+    for match in matches:
+        scenario = match.scenario
+        if st.button(
+            f"{scenario.equipment}: {scenario.failure_scenario} ({match.system} {match.score:.0%})",
+            key=f"alarm_result_{scenario.scenario_id}",
+            help=f"{match.system} alarm: {match.alarm_text}"
+        ):
+            if select_scenario(scenario):
+                st.rerun()
+
+
+if __name__ == "__main__":
+    # Usage: python alarm_lookup.py "APS Major Fault" [ATS|FSCADA|HMI ...]
+    if len(sys.argv) < 2:
+        print('Usage: python alarm_lookup.py "<alarm text>" [ATS|FSCADA|HMI ...]')
+        sys.exit(1)
+    systems = {system.upper() for system in sys.argv[2:]} or None
+    for match in lookup_alarm(sys.argv[1], systems):
+        print(f"{match.score:5.2f}  {match.system:<6}  {match.scenario.equipment}: "
+              f"{match.scenario.failure_scenario}  [{match.alarm_text}]")
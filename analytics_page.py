@@ -0,0 +1,123 @@
+import os
+
+import streamlit as st
+
+from history_analytics import get_analytics
+from history_export import EXPORT_DIR, EXPORT_FORMATS, export_file_name, export_history
+from history_store import LegacyHistoryError
+
+# Staff IDs allowed to see every staff member's results and export the whole history
+SUPERVISOR_STAFF_IDS = ("TGS001",)
+# Larger exports are left on disk rather than pushed through the browser
+EXPORT_DOWNLOAD_LIMIT_MB = 200
+EXPORT_MIME = {
+    'parquet': 'application/vnd.apache.parquet',
+    'jsonl': 'application/x-ndjson',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+}
+
+SUMMARY_COLUMNS = {
+    "scenarios": "Scenarios",
+    "mean_min": "Mean (min)",
+    "p50_min": "Median (min)",
+    "p90_min": "P90 (min)",
+    "resolved_rate": "Resolved %",
+    "failed": "Failed"
+}
+
+
+def is_supervisor(staff_id):
+    return staff_id in SUPERVISOR_STAFF_IDS
+
+
+def _summary_table(summary, index_names):
+    table = summary.reset_index().rename(columns={**index_names, **SUMMARY_COLUMNS})
+    table["Resolved %"] = (table["Resolved %"] * 100).round(1)
+    return table.round({"Mean (min)": 2, "Median (min)": 2, "P90 (min)": 2})
+
+
+def _read_file(path):
+    with open(path, 'rb') as handle:
+        return handle.read()
+
+
+def _show_export(analytics):
+    """Export a filtered slice of the history, written to disk chunk by chunk"""
+    st.markdown('<div class="section-header">📤 Export History</div>', unsafe_allow_html=True)
+    col1, col2, col3, col4, col5 = st.columns(5)
+    first_day = col1.date_input("From", value=None, key="export_from")
+    last_day = col2.date_input("To", value=None, key="export_to")
+    staff_id = col3.selectbox("Staff ID", ["All"] + list(analytics.by_staff.index), key="export_staff")
+    equipment = col4.selectbox("Equipment", ["All"] + list(analytics.by_equipment.index), key="export_equipment")
+    fmt = col5.selectbox("Format", EXPORT_FORMATS, key="export_format")
+
+    if st.button("📤 Export", key="export_history"):
+        # Other staff only ever download their own rows, see history_store.staff_history_csv
+        if not is_supervisor(st.session_state.staff_id):
+            st.error("Exporting history is for supervisors only")
+            return
+        staff_id = None if staff_id == "All" else staff_id
+        equipment = None if equipment == "All" else equipment
+        os.makedirs(EXPORT_DIR, exist_ok=True)
+        path = os.path.join(EXPORT_DIR, export_file_name(fmt, first_day, last_day, staff_id, equipment))
+        with st.spinner("Exporting history..."):
+            rows = export_history(path, first_day, last_day, staff_id, equipment)
+        st.session_state.history_export = (path, rows)
+
+    if st.session_state.get('history_export'):
+        path, rows = st.session_state.history_export
+        if not os.path.exists(path):
+            return
+        size_mb = os.path.getsize(path) / 1e6
+        st.success(f"Exported {rows:,} rows to {path} ({size_mb:.1f} MB)")
+        if size_mb <= EXPORT_DOWNLOAD_LIMIT_MB:
+            # Callable data - the file is only read when the button is clicked
+            st.download_button(
+                label="📥 Download Export",
+                data=lambda: _read_file(path),
+                file_name=os.path.basename(path),
+                mime=EXPORT_MIME[os.path.splitext(path)[1].lstrip('.')],
+                key="export_download"
+            )
+
+
+def show_analytics_page():
+    """Supervisor view: resolution times and 5-minute rule results across all drills"""
+    st.markdown('<div class="section-header">📊 Resolution Analytics</div>', unsafe_allow_html=True)
+    if not is_supervisor(st.session_state.staff_id):
+        st.error("This page is for supervisors only")
+        return
+
+    try:
+        analytics = get_analytics()
+    except LegacyHistoryError as e:
+        st.error(str(e))
+        return
+    if analytics.totals["drills"] == 0:
+        st.info("No history found yet - complete a drill to see analytics")
+        return
+
+    col1, col2, col3, col4, col5 = st.columns(5)
+    col1.metric("Drills", f"{analytics.totals['drills']:,}")
+    col2.metric("Scenarios", f"{analytics.totals['scenarios']:,}")
+    col3.metric("Resolved within 5 min", f"{analytics.totals['resolved_rate'] * 100:.1f}%")
+    col4.metric("Mean resolution", f"{analytics.totals['mean_min']:.2f} min")
+    col5.metric("P90 resolution", f"{analytics.totals['p90_min']:.2f} min")
+
+    st.markdown('<div class="section-header">🔧 By Equipment</div>', unsafe_allow_html=True)
+    st.dataframe(_summary_table(analytics.by_equipment, {"equipment": "Equipment"}),
+                 hide_index=True, width='stretch')
+
+    st.markdown('<div class="section-header">⚠️ By Failure Scenario</div>', unsafe_allow_html=True)
+    st.dataframe(_summary_table(analytics.by_scenario, {"equipment": "Equipment", "failure_scenario": "Failure Scenario"}),
+                 hide_index=True, width='stretch')
+
+    st.markdown('<div class="section-header">👤 Staff Performance</div>', unsafe_allow_html=True)
+    st.dataframe(_summary_table(analytics.by_staff, {"staff_id": "Staff ID"}),
+                 hide_index=True, width='stretch')
+
+    metric = st.radio("Trend", ["Mean (min)", "Resolved %"], horizontal=True, key="analytics_trend")
+    monthly = _summary_table(analytics.staff_monthly, {"staff_id": "Staff ID", "month": "Month"})
+    st.line_chart(monthly.pivot(index="Month", columns="Staff ID", values=metric))
+
+    _show_export(analytics)
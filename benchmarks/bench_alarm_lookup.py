@@ -0,0 +1,64 @@
+"""Alarm lookup latency: n-gram index vs difflib over every alarm text in the catalog
+
+Run from the repository root: python -m benchmarks.bench_alarm_lookup
+"""
+import difflib
+import time
+
+from alarm_lookup import ALARM_SYSTEMS, AlarmIndex
+from benchmarks.synthetic_mor import synthetic_rows
+from mor_catalog import MOR_FILE, CATALOG_COLUMNS, MorCatalog, get_catalog
+
+QUERIES = ('APS Major Fault', 'Power supply control major fault', 'loss of traction energy', 'door fault')
+ALARM_COLUMNS = [CATALOG_COLUMNS.index(name) for name in
+                 ('ATS Alarm Description', 'FSCADA Alarm Description', 'HMI Alarm')]
+
+
+def _distinct_alarm_rows(n_rows):
+    # Synthetic rows reuse the real alarm texts; tag them per equipment so the index grows too
+    rows = []
+    for row in synthetic_rows(n_rows):
+        row = list(row)
+        for column in ALARM_COLUMNS:
+            if row[column]:
+                row[column] = f"{row[column]} {row[0]}"
+        rows.append(tuple(row))
+    return rows
+
+
+def _difflib_lookup(records, query):
+    scored = []
+    for record in records:
+        for _, field in ALARM_SYSTEMS:
+            text = getattr(record, field)
+            if text:
+                scored.append((difflib.SequenceMatcher(None, query.lower(), text.lower()).ratio(), record))
+    scored.sort(key=lambda item: -item[0])
+    return scored[:8]
+
+
+def _per_query_ms(fn):
+    start = time.perf_counter()
+    for query in QUERIES:
+        fn(query)
+    return (time.perf_counter() - start) * 1000 / len(QUERIES)
+
+
+def bench(label, catalog):
+    start = time.perf_counter()
+    index = AlarmIndex(catalog.records)
+    build_ms = (time.perf_counter() - start) * 1000
+    indexed = _per_query_ms(index.lookup)
+    linear = _per_query_ms(lambda query: _difflib_lookup(catalog.records, query))
+    print(f"{label:<28} {len(index.texts):>6} texts   build {build_ms:7.1f} ms   "
+          f"index {indexed:7.3f} ms   difflib {linear:9.3f} ms")
+
+
+def main():
+    bench('MOR_KGL.xlsx', get_catalog(MOR_FILE))
+    for n_rows in (1000, 10000):
+        bench(f'synthetic {n_rows:,} scenarios', MorCatalog(_distinct_alarm_rows(n_rows), path=None, mtime=None))
+
+
+if __name__ == "__main__":
+    main()
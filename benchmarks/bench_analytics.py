@@ -0,0 +1,57 @@
+"""Analytics page cost on a 1M-row history: cold aggregation vs cached render
+
+Run from the repository root: python -m benchmarks.bench_analytics
+"""
+import datetime
+import os
+import shutil
+import tempfile
+import time
+
+from benchmarks.bench_history_db import _synthetic_rows
+
+N_ROWS = 1000000
+
+
+def _timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return (time.perf_counter() - start) * 1000, result
+
+
+def main():
+    tmp_dir = tempfile.mkdtemp(prefix='tgs_bench_')
+    cwd = os.getcwd()
+    try:
+        os.chdir(tmp_dir)
+        import history_analytics
+        import history_store
+        from streamlit.testing.v1 import AppTest
+
+        history_store.append_history_rows(_synthetic_rows(N_ROWS))
+        history_store.archive_history(now=datetime.datetime(2024, 11, 15))
+
+        query_ms, df = _timed(lambda: history_store.query_history(columns=history_analytics.ANALYTICS_COLUMNS))
+        compute_ms, _ = _timed(lambda: history_analytics.compute_analytics(df))
+        cold_ms, _ = _timed(history_analytics.get_analytics)
+        warm_ms, _ = _timed(history_analytics.get_analytics)
+        print(f"{N_ROWS:,} rows: query {query_ms:.0f} ms + vectorized aggregation {compute_ms:.0f} ms "
+              f"= cold {cold_ms:.0f} ms; cached lookup {warm_ms:.2f} ms")
+
+        app = os.path.join(tmp_dir, 'analytics_app.py')
+        with open(app, 'w') as handle:
+            handle.write("from analytics_page import show_analytics_page\nshow_analytics_page()\n")
+        at = AppTest.from_file(app, default_timeout=120)
+        at.run()
+        renders = []
+        for _ in range(5):
+            render_ms, _ = _timed(at.run)
+            renders.append(render_ms)
+        print(f"full page script run with warm cache: best {min(renders):.0f} ms, worst {max(renders):.0f} ms")
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""Cold-load time of the MOR catalog: streaming xlsx read vs compiled snapshot
+
+Run from the repository root: python -m benchmarks.bench_catalog_load
+"""
+import os
+import shutil
+import tempfile
+import time
+
+import mor_catalog
+from benchmarks.synthetic_mor import write_synthetic_workbook
+
+
+def _best_of(fn, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def bench_workbook(label, path):
+    xlsx_time = _best_of(lambda: mor_catalog.read_mor_rows(path))
+    mor_catalog.build_snapshot(path)
+    snapshot_time = _best_of(lambda: mor_catalog._load_workbook(path))
+    print(f"{label:<28} xlsx {xlsx_time * 1000:9.1f} ms   snapshot {snapshot_time * 1000:8.1f} ms   "
+          f"speedup {xlsx_time / snapshot_time:6.1f}x")
+
+
+def main():
+    tmp_dir = tempfile.mkdtemp(prefix='tgs_bench_')
+    try:
+        real = os.path.join(tmp_dir, 'MOR_KGL.xlsx')
+        shutil.copy(mor_catalog.MOR_FILE, real)
+        bench_workbook('MOR_KGL.xlsx (34 equipment)', real)
+
+        synthetic = os.path.join(tmp_dir, 'MOR_10000.xlsx')
+        write_synthetic_workbook(synthetic, 10000)
+        bench_workbook('synthetic 10,000 scenarios', synthetic)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
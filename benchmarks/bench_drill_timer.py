@@ -0,0 +1,38 @@
+"""Drill timer registry reads as the number of timed sessions grows
+
+Run from the repository root: python -m benchmarks.bench_drill_timer
+"""
+import time
+
+import drill_timer
+
+SESSIONS = (1, 1000, 100000)
+ROUNDS = 100000
+
+
+def _per_call_us(fn):
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        fn()
+    return (time.perf_counter() - start) * 1e6 / ROUNDS
+
+
+def main():
+    for sessions in SESSIONS:
+        drill_timer._timers.clear()
+        for i in range(sessions - 1):
+            timer = drill_timer.DrillTimer()
+            timer.resume()
+            drill_timer._timers[f"session-{i}"] = [timer, time.monotonic()]
+        # Outside a script run the current session's key is None
+        drill_timer.start_timer()
+        elapsed_us = _per_call_us(drill_timer.elapsed_seconds)
+        events_us = _per_call_us(drill_timer.take_events)
+        running_us = _per_call_us(drill_timer.timer_running)
+        print(f"{sessions:>7} sessions   elapsed_seconds {elapsed_us:5.2f} us   take_events {events_us:5.2f} us   "
+              f"timer_running {running_us:5.2f} us")
+    drill_timer._timers.clear()
+
+
+if __name__ == "__main__":
+    main()
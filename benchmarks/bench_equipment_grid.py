@@ -0,0 +1,162 @@
+"""Server time per equipment click as the equipment grid grows
+
+Starts the app under a real Streamlit server with a synthetic MOR workbook of 34, 300 and 3,000
+equipment, logs one console in with a session snapshot that puts it on the equipment page with
+one equipment selected, then toggles a second one mid-grid on and off over the websocket the browser
+uses. A click is done when its last script run finishes, st.rerun() included.
+
+Run from the repository root: python -m benchmarks.bench_equipment_grid [--app main.py] [--clicks 20]
+                                  [--baseline REV]
+--baseline also measures the app as of a git revision, e.g. the commit before the fragment grid.
+Both trees run with the server options run_tgs.bat and launcher.py pass.
+"""
+import argparse
+import asyncio
+import os
+import re
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import websockets
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+from benchmarks.bench_timer_cpu import COPY_IGNORE, LAUNCH_OPTIONS, PASSWORD, STAFF_ID, Console, _cpu_seconds, _free_port
+from benchmarks.synthetic_mor import write_synthetic_workbook
+from mor_catalog import MOR_FILE
+from session_snapshot import write_snapshot
+
+EQUIPMENT_COUNTS = (34, 300, 3000)
+WARMUP_CLICKS = 4
+# Runs that end a click - a full run, or a fragment run
+DONE_STATUSES = (ForwardMsg.FINISHED_SUCCESSFULLY, ForwardMsg.FINISHED_FRAGMENT_RUN_SUCCESSFULLY)
+
+
+def _equipment_snapshot(tree, equipment):
+    """Equipment page with one equipment selected, in the snapshot layout of the tree's session_snapshot.py"""
+    with open(os.path.join(tree, 'session_snapshot.py'), encoding='utf-8') as handle:
+        snapshot_format = int(re.search(r'^SNAPSHOT_FORMAT = (\d+)', handle.read(), re.M).group(1))
+    return {
+        'format': snapshot_format, 'staff_id': STAFF_ID, 'current_page': 'equipment', 'num_equipment_fail': 5,
+        'selected_equipment': [equipment], 'selected_scenarios': [], 'active_scenarios': [],
+        'scenario_start_time': None
+    }
+
+
+class GridConsole(Console):
+    """A console that also tracks which fragment each button belongs to and how each run ended"""
+
+    def __init__(self, port):
+        super().__init__(port)
+        self.fragments = {}
+        self.finished = []
+        self.received_bytes = 0
+
+    def _handle(self, ws, msg):
+        super()._handle(ws, msg)
+        kind = msg.WhichOneof('type')
+        if kind == 'delta' and msg.delta.WhichOneof('type') == 'new_element':
+            element = msg.delta.new_element
+            if element.WhichOneof('type') == 'button':
+                self.fragments[element.button.label] = msg.delta.fragment_id
+        elif kind == 'script_finished':
+            self.finished.append(msg.script_finished)
+
+    async def _until_done(self, ws):
+        """Script runs until the one that settles the page"""
+        self.finished.clear()
+        while not self.finished or self.finished[-1] not in DONE_STATUSES:
+            raw = await ws.recv()
+            self.received_bytes += len(raw)
+            msg = ForwardMsg()
+            msg.ParseFromString(raw)
+            self._handle(ws, msg)
+        return len(self.finished)
+
+    async def click(self, ws, label):
+        await ws.send(self._rerun([(self.widgets[label], 'trigger_value', True)], self.fragments.get(label, '')))
+        return await self._until_done(ws)
+
+    async def session(self, pid, label, clicks):
+        url = f"ws://127.0.0.1:{self.port}/_stcore/stream"
+        async with websockets.connect(url, subprotocols=['streamlit'], max_size=None) as ws:
+            await ws.send(self._rerun())
+            await self._until_done(ws)
+            await ws.send(self._rerun([(self.widgets["Staff ID :"], 'string_value', STAFF_ID),
+                                       (self.widgets["Password :"], 'string_value', PASSWORD),
+                                       (self.widgets["Login"], 'trigger_value', True)]))
+            await self._until_done(ws)
+            for _ in range(WARMUP_CLICKS):
+                await self.click(ws, label)
+
+            runs, self.received_bytes = 0, 0
+            cpu_start, wall_start = _cpu_seconds(pid), time.perf_counter()
+            for _ in range(clicks):
+                runs += await self.click(ws, label)
+            return (_cpu_seconds(pid) - cpu_start, time.perf_counter() - wall_start, runs, self.received_bytes)
+
+
+def measure(tree, app, equipment_count, clicks):
+    """(server CPU seconds, wall seconds, script runs, bytes received) over the clicks"""
+    write_synthetic_workbook(os.path.join(tree, MOR_FILE), equipment_count, equipment_count)
+    write_snapshot(_equipment_snapshot(tree, "Equipment 0001"), os.path.join(tree, 'session_snapshots'))
+    port = _free_port()
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'streamlit', 'run', app, '--server.headless', 'true', '--server.port', str(port),
+         '--server.enableXsrfProtection', 'false', '--server.fileWatcherType', 'none',
+         '--browser.gatherUsageStats', 'false', *LAUNCH_OPTIONS],
+        cwd=tree, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                socket.create_connection(('127.0.0.1', port), timeout=1).close()
+                break
+            except OSError:
+                if time.monotonic() > deadline:
+                    raise RuntimeError("Streamlit server did not start")
+                time.sleep(0.2)
+        # A button mid-grid - a click used to run the script halfway before st.rerun()
+        label = f"Equipment {equipment_count // 2:04d}"
+        return asyncio.run(GridConsole(port).session(server.pid, label, clicks))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--app', default='main.py')
+    parser.add_argument('--clicks', type=int, default=20)
+    parser.add_argument('--baseline', help="git revision to compare with")
+    args = parser.parse_args()
+
+    tmp_dir = tempfile.mkdtemp(prefix='tgs_bench_')
+    try:
+        trees = []
+        if args.baseline:
+            baseline = os.path.join(tmp_dir, 'baseline')
+            os.makedirs(baseline)
+            archive = subprocess.run(['git', 'archive', args.baseline], check=True, capture_output=True).stdout
+            subprocess.run(['tar', '-x', '-C', baseline], input=archive, check=True)
+            trees.append((args.baseline, baseline))
+        current = os.path.join(tmp_dir, 'current')
+        shutil.copytree('.', current, ignore=COPY_IGNORE)
+        trees.append(('current', current))
+
+        print(f"{args.app}, {args.clicks} clicks toggling one equipment with another selected")
+        for equipment_count in EQUIPMENT_COUNTS:
+            for label, tree in trees:
+                cpu, wall, runs, received = measure(tree, args.app, equipment_count, args.clicks)
+                print(f"{equipment_count:>5} equipment  {label:<8} {cpu * 1000 / args.clicks:8.1f} ms CPU per click  "
+                      f"{wall * 1000 / args.clicks:8.1f} ms per click  {runs / args.clicks:4.1f} runs per click  "
+                      f"{received / 1024 / args.clicks:8.1f} KB sent per click")
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
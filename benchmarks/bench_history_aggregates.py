@@ -0,0 +1,57 @@
+"""Running aggregates: per-save update cost vs history size, and incremental == rebuilt
+
+Run from the repository root: python -m benchmarks.bench_history_aggregates
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from benchmarks.bench_history_db import _synthetic_rows
+
+HISTORY_SIZES = (1000, 100000, 1000000)
+SAVES = 200
+
+
+def main():
+    tmp_dir = tempfile.mkdtemp(prefix='tgs_bench_')
+    cwd = os.getcwd()
+    ok = True
+    try:
+        os.chdir(tmp_dir)
+        import history_aggregates
+        import history_store
+
+        for n_rows in HISTORY_SIZES:
+            for name in os.listdir(tmp_dir):
+                os.remove(os.path.join(tmp_dir, name))
+            rows = _synthetic_rows(n_rows + SAVES * 2, seed=n_rows)
+            history_store.append_history_rows(rows[:n_rows])
+
+            start = time.perf_counter()
+            history_aggregates.rebuild_aggregates()
+            rebuild_ms = (time.perf_counter() - start) * 1000
+
+            update_ms = 0.0
+            for i in range(SAVES):
+                completion = rows[n_rows + i * 2:n_rows + i * 2 + 2]
+                history_store.append_history_rows(completion)
+                start = time.perf_counter()
+                history_aggregates.apply_rows(completion)
+                update_ms += (time.perf_counter() - start) * 1000
+
+            start = time.perf_counter()
+            problems = history_aggregates.verify_aggregates()
+            verify_ms = (time.perf_counter() - start) * 1000
+            ok = ok and not problems
+            print(f"{n_rows:>9,} rows  update {update_ms / SAVES:6.3f} ms per save   rebuild {rebuild_ms:8.1f} ms   "
+                  f"verify {verify_ms:8.1f} ms   incremental == rebuilt: {not problems}", flush=True)
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
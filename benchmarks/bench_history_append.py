@@ -0,0 +1,71 @@
+"""Save latency vs history size: pandas read-concat-rewrite vs locked append
+
+Run from the repository root: python -m benchmarks.bench_history_append
+"""
+import datetime
+import os
+import shutil
+import tempfile
+import time
+
+import pandas as pd
+
+from history_catalog import catalog_version
+from history_store import append_history_rows, encode_rows, resolution_rows
+from mor_catalog import MOR_FILE, get_catalog
+
+HISTORY_SIZES = (1000, 10000, 100000, 1000000)
+# The old rewrite is skipped above this size, it takes tens of seconds per save
+REWRITE_LIMIT = 100000
+
+
+def _completion_rows(scenarios):
+    start = datetime.datetime(2025, 8, 4, 11, 0, 0)
+    return resolution_rows('TGS001', start, start + datetime.timedelta(minutes=3), 180, scenarios,
+                           catalog_version(get_catalog(MOR_FILE)))
+
+
+def _write_history(path, n_rows, scenarios):
+    rows = _completion_rows(scenarios)
+    with open(path, 'wb') as handle:
+        handle.write(encode_rows([], header=True))
+        chunk = encode_rows(rows * 500)
+        for _ in range(n_rows // len(rows) // 500):
+            handle.write(chunk)
+
+
+def _rewrite_save(path, rows):
+    # What save_resolution_data did before: one full rewrite per scenario
+    for row in rows:
+        df = pd.read_csv(path)
+        df = pd.concat([df, pd.DataFrame([row])], ignore_index=True)
+        df.to_csv(path, index=False)
+
+
+def _timed(fn):
+    start = time.perf_counter()
+    fn()
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    scenarios = get_catalog(MOR_FILE).records[:2]
+    rows = _completion_rows(scenarios)
+    tmp_dir = tempfile.mkdtemp(prefix='tgs_bench_')
+    try:
+        for n_rows in HISTORY_SIZES:
+            path = os.path.join(tmp_dir, f"history_{n_rows}.csv")
+            _write_history(path, n_rows, scenarios)
+            size_mb = os.path.getsize(path) / 1e6
+            append_ms = min(_timed(lambda: append_history_rows(rows, path)) for _ in range(5))
+            if n_rows <= REWRITE_LIMIT:
+                rewrite = f"{_timed(lambda: _rewrite_save(path, rows)):10.1f} ms"
+            else:
+                rewrite = "   skipped"
+            print(f"{n_rows:>9,} rows ({size_mb:6.1f} MB)   rewrite {rewrite}   append {append_ms:6.2f} ms", flush=True)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Monthly Parquet partitions vs one flat CSV: size, one-month query and one-staff download
+
+Run from the repository root: python -m benchmarks.bench_history_archive
+"""
+import datetime
+import os
+import shutil
+import tempfile
+import time
+
+import pandas as pd
+
+from benchmarks.bench_history_db import _synthetic_rows
+from history_archive import filter_history
+
+N_ROWS = 1000000
+MONTH = ("2023-06-01 00:00:00", "2023-07-01 00:00:00")
+
+
+def _timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return (time.perf_counter() - start) * 1000, result
+
+
+def main():
+    tmp_dir = tempfile.mkdtemp(prefix='tgs_bench_')
+    cwd = os.getcwd()
+    try:
+        os.chdir(tmp_dir)
+        import history_store
+        from history_archive import ARCHIVE_DIR, list_partitions
+
+        history_store.append_history_rows(_synthetic_rows(N_ROWS))
+        flat = history_store.HISTORY_FILE + '.flat'
+        shutil.copy(history_store.HISTORY_FILE, flat)
+        csv_mb = os.path.getsize(flat) / 1e6
+
+        # Last synthetic row starts in 2024-11, roll everything before it into the archive
+        archive_ms, moved = _timed(lambda: history_store.archive_history(now=datetime.datetime(2024, 11, 15)))
+        partitions = list_partitions()
+        archive_mb = sum(os.path.getsize(path) for _, path in partitions) / 1e6
+        print(f"{N_ROWS:,} rows: flat CSV {csv_mb:.1f} MB -> {len(partitions)} zstd Parquet partitions "
+              f"{archive_mb:.1f} MB + hot CSV {os.path.getsize(history_store.HISTORY_FILE) / 1e6:.2f} MB "
+              f"(rollover {archive_ms / 1000:.1f} s, {moved:,} rows moved)")
+
+        flat_month, expected = _timed(lambda: filter_history(pd.read_csv(flat), *MONTH))
+        part_month, result = _timed(lambda: history_store.query_history(*MONTH))
+        print(f"one month ({len(result):,} rows)        flat CSV {flat_month:8.1f} ms   partitioned {part_month:7.1f} ms   "
+              f"match={len(expected) == len(result)}")
+
+        flat_staff, expected = _timed(lambda: filter_history(pd.read_csv(flat), staff_id="TGS007"))
+        part_staff, path = _timed(lambda: history_store.staff_history_csv("TGS007"))
+        payload = history_store.read_download(path)
+        print(f"one staff download ({len(expected):,} rows) flat CSV {flat_staff:8.1f} ms   partitioned {part_staff:7.1f} ms   "
+              f"rows={payload.count(b'TGS007,')}")
+        shutil.rmtree(ARCHIVE_DIR)
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Insert and query latency of the SQLite history backend at 1M rows, against the CSV file
+
+Run from the repository root: python -m benchmarks.bench_history_db
+"""
+import datetime
+import os
+import random
+import shutil
+import tempfile
+import time
+
+import pandas as pd
+
+import history_db
+from mor_catalog import make_scenario_id
+from history_store import append_history_rows, encode_rows
+
+N_ROWS = 1000000
+N_STAFF = 50
+EQUIPMENT = ('TMS', 'Power', 'Traction', 'Brake', 'Door', 'Radio', 'Signalling', 'HVAC')
+
+
+def _synthetic_rows(n_rows, seed=0):
+    rng = random.Random(seed)
+    start = datetime.datetime(2023, 1, 1)
+    rows = []
+    for i in range(n_rows):
+        begin = start + datetime.timedelta(minutes=i)
+        seconds = rng.randint(30, 600)
+        equipment = rng.choice(EQUIPMENT)
+        failure_scenario = f"Failure scenario {rng.randint(1, 90)}"
+        rows.append({
+            "Staff ID": f"TGS{rng.randint(1, N_STAFF):03d}",
+            "Start Time": begin.strftime("%Y-%m-%d %H:%M:%S"),
+            "Stop Time": (begin + datetime.timedelta(seconds=seconds)).strftime("%Y-%m-%d %H:%M:%S"),
+            "Equipment": equipment,
+            "Failure Scenario": failure_scenario,
+            "Status": "Resolved" if seconds <= 300 else "Failed",
+            "Scenario ID": make_scenario_id(equipment, failure_scenario),
+            "Catalog Version": "synthetic",
+            "Guideline for Chief Controller": "• Train Entering service: Not allowed to enter service",
+            "Local Response": "Reset CCU",
+            "Duration (min)": round(seconds / 60, 1)
+        })
+    return rows
+
+
+def _timed(fn, repeat=1):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    tmp_dir = tempfile.mkdtemp(prefix='tgs_bench_')
+    try:
+        csv_path = os.path.join(tmp_dir, 'history.csv')
+        db_path = os.path.join(tmp_dir, 'history.db')
+        rows = _synthetic_rows(N_ROWS)
+        with open(csv_path, 'wb') as handle:
+            handle.write(encode_rows(rows, header=True))
+        print(f"{N_ROWS:,} rows, CSV {os.path.getsize(csv_path) / 1e6:.1f} MB")
+
+        import_ms, _ = _timed(lambda: history_db.import_csv(csv_path, db_path))
+        print(f"one-shot import                    {import_ms / 1000:8.1f} s")
+
+        completion = rows[:2]
+        db_insert, _ = _timed(lambda: history_db.insert_rows(completion, db_path), repeat=20)
+        csv_insert, _ = _timed(lambda: append_history_rows(completion, csv_path), repeat=20)
+        print(f"save one completion (2 rows)       sqlite {db_insert:8.2f} ms   csv append {csv_insert:8.2f} ms")
+
+        csv_load, df = _timed(lambda: pd.read_csv(csv_path))
+        month = ("2023-06-01 00:00:00", "2023-07-01 00:00:00")
+        queries = (
+            ("one staff member's history",
+             lambda: history_db.query_history(staff_id="TGS007", path=db_path),
+             lambda: df[df['Staff ID'] == "TGS007"]),
+            ("Traction failures in one month",
+             lambda: history_db.query_history(equipment="Traction", status="Failed",
+                                              start=month[0], end=month[1], path=db_path),
+             lambda: df[(df['Equipment'] == "Traction") & (df['Status'] == "Failed")
+                        & (df['Start Time'] >= month[0]) & (df['Start Time'] < month[1])]),
+        )
+        print(f"CSV full load before any query     {csv_load:8.1f} ms")
+        for label, db_query, csv_query in queries:
+            db_ms, db_result = _timed(db_query, repeat=3)
+            csv_ms, csv_result = _timed(csv_query, repeat=3)
+            print(f"{label:<34} sqlite {db_ms:8.1f} ms   csv scan {csv_ms:8.1f} ms + load   "
+                  f"({len(db_result):,} rows, match={len(db_result) == len(csv_result)})")
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
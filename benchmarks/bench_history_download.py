@@ -0,0 +1,54 @@
+"""Per-staff history download: full read_csv + filter + to_csv vs the byte-offset index
+
+Run from the repository root: python -m benchmarks.bench_history_download
+"""
+import os
+import shutil
+import tempfile
+import time
+
+import pandas as pd
+
+from benchmarks.bench_history_db import _synthetic_rows
+from history_index import StaffIndex
+from history_store import encode_rows
+
+HISTORY_SIZES = (10000, 100000, 1000000)
+STAFF_ID = "TGS007"
+
+
+def _timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return (time.perf_counter() - start) * 1000, result
+
+
+def _pandas_download(path):
+    df = pd.read_csv(path)
+    return df[df['Staff ID'] == STAFF_ID].to_csv(index=False).encode('utf-8')
+
+
+def main():
+    tmp_dir = tempfile.mkdtemp(prefix='tgs_bench_')
+    try:
+        for n_rows in HISTORY_SIZES:
+            path = os.path.join(tmp_dir, f"history_{n_rows}.csv")
+            with open(path, 'wb') as handle:
+                handle.write(encode_rows(_synthetic_rows(n_rows), header=True))
+
+            pandas_ms, expected = _timed(lambda: _pandas_download(path))
+            build_ms, _ = _timed(StaffIndex(path).refresh)
+            # A new process only reads the saved index, it does not rescan the CSV
+            index = StaffIndex(path)
+            load_ms, _ = _timed(index.refresh)
+            refresh_ms, _ = _timed(index.refresh)
+            download_ms, payload = _timed(lambda: b''.join(index.iter_records(STAFF_ID)))
+            print(f"{n_rows:>9,} rows  pandas {pandas_ms:8.1f} ms   index: first build {build_ms:8.1f} ms, "
+                  f"load {load_ms:7.1f} ms, refresh {refresh_ms:5.2f} ms, download {download_ms:6.2f} ms "
+                  f"({len(index.spans[STAFF_ID]):,} rows, identical={payload == expected})", flush=True)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
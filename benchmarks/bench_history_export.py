@@ -0,0 +1,100 @@
+"""Peak memory and time: whole-frame export vs the chunked history_export writers
+
+Each export runs in a fresh interpreter and reports its peak RSS, imports included.
+Run from the repository root: python -m benchmarks.bench_history_export
+"""
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+ROW_COUNTS = (100000, 500000)
+FORMATS = ('parquet', 'jsonl', 'xlsx')
+# Excel is written cell by cell either way - keep its runs short
+XLSX_MAX_ROWS = 100000
+HOT_ROWS = 5000
+
+
+def _peak_rss_mb():
+    # ru_maxrss is in KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _child(mode, fmt, data_dir):
+    os.chdir(data_dir)
+    from history_export import export_history
+    from history_store import HISTORY_COLUMNS, query_history
+
+    path = f"export.{fmt}"
+    start = time.perf_counter()
+    if mode == 'whole':
+        df = query_history()[list(HISTORY_COLUMNS)]
+        if fmt == 'parquet':
+            df.to_parquet(path, index=False, compression='zstd')
+        elif fmt == 'jsonl':
+            df.to_json(path, orient='records', lines=True, force_ascii=False)
+        else:
+            df.to_excel(path, index=False, engine='openpyxl')
+        rows = len(df)
+    else:
+        rows = export_history(path)
+    elapsed = time.perf_counter() - start
+    print(json.dumps({'seconds': elapsed, 'peak_mb': _peak_rss_mb(), 'rows': rows,
+                      'size_mb': os.path.getsize(path) / 1e6}))
+
+
+def _run(*args):
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = {**os.environ, 'PYTHONPATH': root}
+    result = subprocess.run([sys.executable, '-m', 'benchmarks.bench_history_export', *args],
+                            capture_output=True, text=True, check=True, cwd=root, env=env)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def _build_history(data_dir, n_rows):
+    """Archive partitions for all but the newest rows, which stay in the hot CSV"""
+    import pandas as pd
+    from benchmarks.bench_history_db import _synthetic_rows
+    from history_archive import HISTORY_DTYPES, STORED_COLUMNS, row_months, write_partitions
+    from history_catalog import store_text
+
+    rows = _synthetic_rows(n_rows)
+    store_text(rows, os.path.join(data_dir, "tgs_history_catalog.csv"))
+    df = pd.DataFrame(rows, columns=STORED_COLUMNS).astype(HISTORY_DTYPES)
+    archived, hot = df.iloc[:-HOT_ROWS], df.iloc[-HOT_ROWS:]
+    write_partitions(archived, row_months(archived), os.path.join(data_dir, "history_archive"))
+    hot.to_csv(os.path.join(data_dir, "tgs_resolution_history.csv"), index=False, lineterminator='\n')
+    print(json.dumps({'rows': n_rows}))
+
+
+def main():
+    for n_rows in ROW_COUNTS:
+        data_dir = tempfile.mkdtemp(prefix='tgs_bench_')
+        try:
+            # Built in its own interpreter - children inherit the parent's peak RSS
+            _run('--build', data_dir, str(n_rows))
+            for fmt in FORMATS:
+                if fmt == 'xlsx' and n_rows > XLSX_MAX_ROWS:
+                    continue
+                whole = _run('--child', 'whole', fmt, data_dir)
+                chunked = _run('--child', 'chunked', fmt, data_dir)
+                assert whole['rows'] == chunked['rows'] == n_rows
+                print(f"{n_rows:>7} rows {fmt:<8} "
+                      f"whole frame {whole['seconds']:6.2f} s {whole['peak_mb']:7.1f} MB   "
+                      f"chunked {chunked['seconds']:6.2f} s {chunked['peak_mb']:7.1f} MB "
+                      f"({chunked['size_mb']:.1f} MB file)", flush=True)
+        finally:
+            shutil.rmtree(data_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 5 and sys.argv[1] == '--child':
+        _child(sys.argv[2], sys.argv[3], sys.argv[4])
+    elif len(sys.argv) == 4 and sys.argv[1] == '--build':
+        _build_history(sys.argv[2], int(sys.argv[3]))
+    else:
+        main()
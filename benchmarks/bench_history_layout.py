@@ -0,0 +1,92 @@
+"""History file size and read time: rows carrying guideline text vs rows referencing the catalog text table
+
+Rows use the real MOR catalog's scenarios and text.
+Run from the repository root: python -m benchmarks.bench_history_layout
+"""
+import csv
+import datetime
+import io
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+HISTORY_SIZES = (10000, 100000, 1000000)
+
+
+def _timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return (time.perf_counter() - start) * 1000, result
+
+
+def _rows(n_rows, catalog, version):
+    from history_store import resolution_rows
+    rng = random.Random(n_rows)
+    start = datetime.datetime(2025, 1, 1)
+    rows = []
+    while len(rows) < n_rows:
+        begin = start + datetime.timedelta(minutes=len(rows))
+        seconds = rng.randint(30, 600)
+        rows += resolution_rows(f"TGS{rng.randint(1, 50):03d}", begin, begin + datetime.timedelta(seconds=seconds),
+                                seconds, rng.sample(catalog.records, 2), version)
+    return rows[:n_rows]
+
+
+def _legacy_csv(rows, path):
+    # What every save wrote before: the catalog text copied into each row
+    from history_store import HISTORY_COLUMNS
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator='\n')
+    writer.writerow(HISTORY_COLUMNS)
+    for row in rows:
+        writer.writerow([row.get(column) for column in HISTORY_COLUMNS])
+    with open(path, 'wb') as handle:
+        handle.write(buffer.getvalue().encode('utf-8'))
+
+
+def main():
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    from mor_catalog import MOR_FILE, get_catalog
+    catalog = get_catalog(os.path.join(root, MOR_FILE))
+    tmp_dir = tempfile.mkdtemp(prefix='tgs_bench_')
+    os.chdir(tmp_dir)
+    try:
+        import pandas as pd
+
+        import history_store
+        from history_analytics import ANALYTICS_COLUMNS
+        from history_catalog import CATALOG_TEXT_FILE, catalog_version, store_text
+
+        for n_rows in HISTORY_SIZES:
+            rows = _rows(n_rows, catalog, catalog_version(catalog))
+            legacy_path = f"legacy_{n_rows}.csv"
+            _legacy_csv(rows, legacy_path)
+            store_text(rows)
+            with open(history_store.HISTORY_FILE, 'wb') as handle:
+                handle.write(history_store.encode_rows(rows, header=True))
+            history_store._layout_checked = True
+
+            legacy_mb = os.path.getsize(legacy_path) / 1e6
+            stored_mb = os.path.getsize(history_store.HISTORY_FILE) / 1e6
+            text_mb = os.path.getsize(CATALOG_TEXT_FILE) / 1e6
+            legacy_read, legacy = _timed(lambda: pd.read_csv(legacy_path, dtype='str'))
+            stored_read, _ = _timed(lambda: pd.read_csv(history_store.HISTORY_FILE, dtype='str'))
+            legacy_analytics, _ = _timed(lambda: pd.read_csv(legacy_path, dtype='str', usecols=list(ANALYTICS_COLUMNS)))
+            analytics_ms, _ = _timed(lambda: history_store.query_history(columns=ANALYTICS_COLUMNS))
+            export_ms, exported = _timed(history_store.query_history)
+            identical = exported.drop(columns=["Duration (min)"]).equals(legacy.drop(columns=["Duration (min)"]))
+            print(f"{n_rows:>9,} rows  size {legacy_mb:7.1f} MB -> {stored_mb:6.1f} MB (+{text_mb:.2f} MB text) "
+                  f"{legacy_mb / (stored_mb + text_mb):4.1f}x   read_csv {legacy_read:7.1f} -> {stored_read:7.1f} ms   "
+                  f"analytics columns {legacy_analytics:7.1f} -> {analytics_ms:7.1f} ms   "
+                  f"full rows with text {export_ms:7.1f} ms (identical={identical})", flush=True)
+    finally:
+        os.chdir(root)
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    main()
@@ -0,0 +1,55 @@
+"""Time the UI thread spends saving a completion: direct locked append vs the write queue
+
+Run from the repository root: python -m benchmarks.bench_history_queue
+"""
+import datetime
+import os
+import shutil
+import tempfile
+import time
+
+from history_catalog import catalog_version
+from history_store import HistoryWriteQueue, append_history_rows, resolution_rows
+from mor_catalog import MOR_FILE, get_catalog
+
+COMPLETIONS = 2000
+
+
+def main():
+    start = datetime.datetime(2025, 8, 4, 11, 0, 0)
+    catalog = get_catalog(MOR_FILE)
+    rows = resolution_rows('TGS001', start, start + datetime.timedelta(minutes=3), 180,
+                           catalog.records[:2], catalog_version(catalog))
+    tmp_dir = tempfile.mkdtemp(prefix='tgs_bench_')
+    try:
+        direct_path = os.path.join(tmp_dir, 'direct.csv')
+        begin = time.perf_counter()
+        for _ in range(COMPLETIONS):
+            append_history_rows(rows, direct_path)
+        direct_ms = (time.perf_counter() - begin) * 1000 / COMPLETIONS
+
+        queued_path = os.path.join(tmp_dir, 'queued.csv')
+        writes = []
+
+        def write(batch_rows):
+            writes.append(len(batch_rows))
+            append_history_rows(batch_rows, queued_path)
+
+        history_queue = HistoryWriteQueue(write=write)
+        begin = time.perf_counter()
+        for _ in range(COMPLETIONS):
+            history_queue.put(rows)
+        queued_ms = (time.perf_counter() - begin) * 1000 / COMPLETIONS
+        history_queue.flush()
+        drained_ms = (time.perf_counter() - begin) * 1000
+
+        print(f"{COMPLETIONS} completions of 2 rows")
+        print(f"direct append   {direct_ms:7.3f} ms on the UI thread per save, {COMPLETIONS} fsyncs")
+        print(f"write queue     {queued_ms:7.3f} ms on the UI thread per save, {len(writes)} fsyncs, "
+              f"all written after {drained_ms:.0f} ms")
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""HTML fragments of the scenario and guidelines pages: built every rerun versus served from the render cache
+
+Run from the repository root: python -m benchmarks.bench_render_cache
+"""
+import time
+
+import render_cache
+from mor_catalog import get_catalog
+from render_cache import guideline_table_rows, guideline_title, render_cache_stats, scenario_badge, scenario_summary
+
+ROUNDS = 2000
+
+
+def _page_fragments(catalog, render):
+    """Badges for every scenario of the catalog, plus summary cards and table rows for two of them"""
+    parts = [render['badge'](scenario) for scenario in catalog.records]
+    for scenario in catalog.records[:2]:
+        parts.append(render['summary'](scenario))
+        parts.append(render['title'](scenario))
+        parts.append(render['rows'](scenario))
+    return parts
+
+
+def _per_rerun_us(catalog, render):
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        _page_fragments(catalog, render)
+    return (time.perf_counter() - start) * 1e6 / ROUNDS
+
+
+def main():
+    catalog = get_catalog()
+    version = catalog.version
+    built = {
+        'badge': render_cache._badge,
+        'summary': render_cache._summary,
+        'title': render_cache._guideline_title,
+        'rows': render_cache._guideline_rows,
+    }
+    cached = {
+        'badge': lambda scenario: scenario_badge(scenario, version),
+        'summary': lambda scenario: scenario_summary(scenario, version),
+        'title': lambda scenario: guideline_title(scenario, version),
+        'rows': lambda scenario: guideline_table_rows(scenario, version),
+    }
+    render_cache.clear_render_cache()
+    assert _page_fragments(catalog, built) == _page_fragments(catalog, cached)
+
+    built_us = _per_rerun_us(catalog, built)
+    cached_us = _per_rerun_us(catalog, cached)
+    stats = render_cache_stats()
+    fragments = len(catalog.records) + 6
+    print(f"{len(catalog.records)} scenarios, {fragments} fragments per rerun   built {built_us:7.1f} us   "
+          f"cached {cached_us:7.1f} us   ({built_us / cached_us:.1f}x)")
+    print(f"hits {stats.hits}  misses {stats.misses}  hit rate {stats.hit_rate:.2%}  entries {stats.size}/{stats.capacity}")
+    render_cache.clear_render_cache()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""Cost of the render instrumentation: per message counted, per render recorded, per full-ring read
+
+Run from the repository root: python -m benchmarks.bench_render_stats
+"""
+import time
+
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+import render_stats
+from render_stats import RING_SIZE, Render, _counting, page_stats
+
+ROUNDS = 100000
+PAGES = ('show_main_interface', 'show_equipment_page', 'show_scenario_page', 'show_guidelines_page', 'show_timer')
+
+
+def _markdown_msg(body):
+    msg = ForwardMsg()
+    msg.delta.new_element.markdown.body = body
+    return msg
+
+
+def _per_call_us(fn, rounds=ROUNDS):
+    start = time.perf_counter()
+    for i in range(rounds):
+        fn(i)
+    return (time.perf_counter() - start) * 1e6 / rounds
+
+
+def main():
+    msg = _markdown_msg('<div class="alarm-indicator alarm-active">ATS</div>' * 10)
+    sent = []
+    plain_us = _per_call_us(lambda i: sent.append(msg))
+    counting = _counting(sent.append, [0])
+    counted_us = _per_call_us(lambda i: counting(msg))
+
+    render_stats._renders.clear()
+    record_us = _per_call_us(lambda i: render_stats._renders.append(
+        Render(time.time(), f"session-{i % 40}", f"TGS{i % 40:03d}", PAGES[i % len(PAGES)], 0.01, 0.01, 4096)))
+    start = time.perf_counter()
+    groups = len(page_stats())
+    read_ms = (time.perf_counter() - start) * 1000
+    render_stats._renders.clear()
+
+    print(f"enqueue {plain_us:5.2f} us plain, {counted_us:5.2f} us counted   record {record_us:5.2f} us   "
+          f"page_stats over a full ring ({RING_SIZE} renders, {groups} groups) {read_ms:6.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
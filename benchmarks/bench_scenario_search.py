@@ -0,0 +1,55 @@
+"""Per-keystroke latency of the scenario search index vs a linear scan of the catalog
+
+Run from the repository root: python -m benchmarks.bench_scenario_search
+"""
+import time
+
+from benchmarks.synthetic_mor import synthetic_rows
+from mor_catalog import MOR_FILE, MorCatalog, get_catalog
+from scenario_search import SEARCH_FIELDS, ScenarioSearchIndex
+
+# Every prefix of these is one keystroke in the sidebar box
+QUERIES = ('power failure', 'train door', 'ats alarm', 'brake')
+
+
+def _keystrokes():
+    for query in QUERIES:
+        for end in range(1, len(query) + 1):
+            yield query[:end]
+
+
+def _linear_search(records, query):
+    words = query.lower().split()
+    hits = []
+    for record in records:
+        text = ' '.join((getattr(record, field) or '') for field, _ in SEARCH_FIELDS).lower()
+        if all(word in text for word in words):
+            hits.append(record)
+    return hits
+
+
+def _per_keystroke_ms(fn):
+    strokes = list(_keystrokes())
+    start = time.perf_counter()
+    for query in strokes:
+        fn(query)
+    return (time.perf_counter() - start) * 1000 / len(strokes)
+
+
+def bench(label, catalog):
+    start = time.perf_counter()
+    index = ScenarioSearchIndex(catalog.records)
+    build_ms = (time.perf_counter() - start) * 1000
+    indexed = _per_keystroke_ms(index.search)
+    linear = _per_keystroke_ms(lambda query: _linear_search(catalog.records, query))
+    print(f"{label:<28} build {build_ms:8.1f} ms   index {indexed:7.3f} ms/key   linear {linear:8.3f} ms/key")
+
+
+def main():
+    bench('MOR_KGL.xlsx', get_catalog(MOR_FILE))
+    for n_rows in (1000, 10000):
+        bench(f'synthetic {n_rows:,} scenarios', MorCatalog(synthetic_rows(n_rows), path=None, mtime=None))
+
+
+if __name__ == "__main__":
+    main()
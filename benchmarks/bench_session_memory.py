@@ -0,0 +1,57 @@
+"""Per-session memory of the scenario selection: dict row copies vs scenario IDs
+
+Run from the repository root: python -m benchmarks.bench_session_memory
+"""
+import gc
+import pickle
+import tracemalloc
+
+import pandas as pd
+
+import mor_catalog
+
+SESSIONS = 100
+
+
+def _dict_row_sessions(catalog):
+    """Old layout - every session holds its own to_dict('records') copies"""
+    df = pd.DataFrame(catalog.rows, columns=mor_catalog.CATALOG_COLUMNS)
+    equipment_pair = catalog.equipment_list[:2]
+    sessions = []
+    for _ in range(SESSIONS):
+        selected = [df[df['Equipment'] == equipment].to_dict('records')[0] for equipment in equipment_pair]
+        sessions.append({'selected_scenarios': selected, 'active_scenarios': selected})
+    return sessions
+
+
+def _id_sessions(catalog):
+    """New layout - sessions hold scenario IDs only"""
+    equipment_pair = catalog.equipment_list[:2]
+    sessions = []
+    for _ in range(SESSIONS):
+        selected = [catalog.scenarios_for(equipment)[0].scenario_id for equipment in equipment_pair]
+        sessions.append({'selected_scenarios': selected, 'active_scenarios': list(selected)})
+    return sessions
+
+
+def _measure(build, catalog):
+    gc.collect()
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    sessions = build(catalog)
+    gc.collect()
+    allocated = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+    pickled = sum(len(pickle.dumps(session)) for session in sessions)
+    return allocated / SESSIONS, pickled / SESSIONS
+
+
+def main():
+    catalog = mor_catalog.get_catalog()
+    for label, build in (('dict rows', _dict_row_sessions), ('scenario IDs', _id_sessions)):
+        heap, pickled = _measure(build, catalog)
+        print(f"{label:<13} {SESSIONS} sessions: {heap:9.0f} B heap/session   {pickled:7.0f} B pickled/session")
+
+
+if __name__ == "__main__":
+    main()
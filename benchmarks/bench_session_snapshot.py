@@ -0,0 +1,59 @@
+"""Session snapshot write and restore latency
+
+Run from the repository root: python -m benchmarks.bench_session_snapshot
+"""
+import datetime
+import os
+import shutil
+import tempfile
+import time
+
+from drill_timer import DrillTimer
+from session_snapshot import build_snapshot, read_snapshot, write_snapshot
+
+ROUNDS = 2000
+
+
+def _state(i):
+    return {
+        'staff_id': f"TGS{i % 50:03d}",
+        'current_page': 'guidelines',
+        'num_equipment_fail': 2,
+        'selected_equipment': ['TMS', 'Power'],
+        'selected_scenarios': ['6add48451aee', '4fe4a3f34c2b'],
+        'active_scenarios': ['6add48451aee', '4fe4a3f34c2b'],
+        'scenario_start_time': datetime.datetime.now()
+    }
+
+
+def _timer():
+    timer = DrillTimer(accumulated=42.0)
+    timer.resume()
+    return timer
+
+
+def _per_round_ms(fn):
+    start = time.perf_counter()
+    for i in range(ROUNDS):
+        fn(i)
+    return (time.perf_counter() - start) * 1000 / ROUNDS
+
+
+def main():
+    tmp_dir = tempfile.mkdtemp(prefix='tgs_bench_')
+    try:
+        states = [_state(i) for i in range(ROUNDS)]
+        timers = [_timer() for _ in range(ROUNDS)]
+        build_ms = _per_round_ms(lambda i: build_snapshot(states[i], timers[i]))
+        snapshots = [build_snapshot(state, timer) for state, timer in zip(states, timers)]
+        write_ms = _per_round_ms(lambda i: write_snapshot(snapshots[i], tmp_dir))
+        read_ms = _per_round_ms(lambda i: DrillTimer.from_snapshot(read_snapshot(f"TGS{i % 50:03d}", tmp_dir)['timer']))
+        size = os.path.getsize(os.path.join(tmp_dir, "TGS000.json"))
+        print(f"snapshot {size} bytes   build {build_ms * 1000:6.1f} us   write (fsynced) {write_ms:6.3f} ms   "
+              f"read + resume timer {read_ms:6.3f} ms")
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""Markdown bytes sent per rerun with the stylesheet inlined versus linked, and the stylesheet lookup cost
+
+Run from the repository root: python -m benchmarks.bench_theme_payload
+"""
+import os
+import time
+
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+import theme
+
+# AppTest resolves relative paths against this file
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APPS = (('main.py', 'main'), ('tgs_system.py', 'tgs_system'))
+ROUNDS = 10000
+
+
+def _markdown_bytes(at):
+    return sum(len(markdown.value.encode('utf-8')) for markdown in at.markdown)
+
+
+def _rerun_bytes(app, static_serving):
+    """Markdown bytes of the login page and of an equipment page rerun"""
+    st.config.set_option("server.enableStaticServing", static_serving)
+    at = AppTest.from_file(os.path.join(ROOT, app), default_timeout=30)
+    at.run()
+    login = _markdown_bytes(at)
+    at.text_input[0].input('TGS003')
+    at.text_input[1].input('ops789')
+    at.button(key='login_btn').click().run()
+    at.run()
+    return login, _markdown_bytes(at)
+
+
+def main():
+    for app, name in APPS:
+        inline_login, inline_rerun = _rerun_bytes(app, False)
+        linked_login, linked_rerun = _rerun_bytes(app, True)
+        print(f"{app:<14} login {inline_login / 1024:6.1f} KB -> {linked_login / 1024:5.1f} KB   "
+              f"equipment rerun {inline_rerun / 1024:6.1f} KB -> {linked_rerun / 1024:5.1f} KB")
+
+        theme._stylesheets.clear()
+        start = time.perf_counter()
+        theme.stylesheet_url(name)
+        first_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        for _ in range(ROUNDS):
+            theme.stylesheet_url(name)
+        cached_us = (time.perf_counter() - start) * 1e6 / ROUNDS
+        print(f"{'':<14} stylesheet_url first call {first_ms:5.2f} ms, cached {cached_us:5.2f} us")
+
+
+if __name__ == "__main__":
+    main()
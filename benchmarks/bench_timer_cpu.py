@@ -0,0 +1,214 @@
+"""Server CPU per console while the drill timer is running
+
+Starts the app under a real Streamlit server and connects consoles over the websocket
+the browser uses. Each console logs in, has its running drill restored from a session
+snapshot, and answers the server's fragment auto-reruns the way the browser does.
+CPU is read from /proc for the server process only.
+
+Run from the repository root: python -m benchmarks.bench_timer_cpu [--app main.py] [--consoles 4]
+                                  [--seconds 20] [--baseline REV]
+--baseline also measures the app as of a git revision, e.g. the commit before the fragment timer.
+'launched' is the current tree with the server options run_tgs.bat and launcher.py pass.
+"""
+import argparse
+import asyncio
+import os
+import re
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import websockets
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+from drill_timer import DrillTimer
+from mor_catalog import get_catalog
+from session_snapshot import write_snapshot
+
+STAFF_ID, PASSWORD = "TGS003", "ops789"
+COPY_IGNORE = shutil.ignore_patterns('.git', '__pycache__', 'session_snapshots', 'exports', 'history_archive',
+                                     'tgs_resolution_history.db*', '*.lock')
+WARMUP_SECONDS = 3
+# Server options run_tgs.bat and launcher.py add
+LAUNCH_OPTIONS = ('--runner.postScriptGC', 'false')
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _cpu_seconds(pid):
+    with open(f"/proc/{pid}/stat") as handle:
+        fields = handle.read().rsplit(')', 1)[1].split()
+    # utime and stime, fields 14 and 15 of stat
+    return (int(fields[11]) + int(fields[12])) / os.sysconf('SC_CLK_TCK')
+
+
+def _drill_snapshot(tree):
+    """A running drill in the snapshot layout of the tree's own session_snapshot.py"""
+    with open(os.path.join(tree, 'session_snapshot.py'), encoding='utf-8') as handle:
+        snapshot_format = int(re.search(r'^SNAPSHOT_FORMAT = (\d+)', handle.read(), re.M).group(1))
+    scenario_ids = list(get_catalog().by_id)[:2]
+    snapshot = {
+        'format': snapshot_format, 'staff_id': STAFF_ID, 'current_page': 'guidelines', 'num_equipment_fail': 2,
+        'selected_equipment': [], 'selected_scenarios': scenario_ids, 'active_scenarios': scenario_ids,
+        'scenario_start_time': None
+    }
+    if snapshot_format == 1:
+        # Before drill_timer.py - the wall clock start, its monotonic reading and the boot time
+        now = time.time()
+        snapshot.update(timer_running=True, timer=[now, time.monotonic(), now - time.monotonic()])
+    else:
+        timer = DrillTimer()
+        timer.resume()
+        snapshot['timer'] = timer.to_snapshot()
+    return snapshot
+
+
+class Console:
+    """One browser tab - just enough of the client protocol to log in and keep fragments ticking"""
+
+    def __init__(self, port):
+        self.port = port
+        self.page_script_hash = ''
+        self.widgets = {}
+        self.fragment_timers = {}
+        self.runs = 0
+
+    def _rerun(self, widget_states=(), fragment_id=''):
+        msg = BackMsg()
+        state = msg.rerun_script
+        state.page_script_hash = self.page_script_hash
+        state.fragment_id = fragment_id
+        state.is_auto_rerun = bool(fragment_id)
+        for widget_id, field, value in widget_states:
+            widget = state.widget_states.widgets.add()
+            widget.id = widget_id
+            setattr(widget, field, value)
+        return msg.SerializeToString()
+
+    async def _tick(self, ws, fragment_id, interval):
+        while True:
+            await asyncio.sleep(interval)
+            await ws.send(self._rerun(fragment_id=fragment_id))
+
+    def _handle(self, ws, msg):
+        kind = msg.WhichOneof('type')
+        if kind == 'new_session':
+            self.page_script_hash = msg.new_session.page_script_hash
+        elif kind == 'delta' and msg.delta.WhichOneof('type') == 'new_element':
+            element = msg.delta.new_element
+            element_type = element.WhichOneof('type')
+            if element_type in ('text_input', 'button'):
+                widget = getattr(element, element_type)
+                self.widgets[widget.label] = widget.id
+        elif kind == 'script_finished':
+            self.runs += 1
+        elif kind == 'auto_rerun':
+            fragment_id = msg.auto_rerun.fragment_id
+            if fragment_id not in self.fragment_timers:
+                self.fragment_timers[fragment_id] = asyncio.ensure_future(
+                    self._tick(ws, fragment_id, msg.auto_rerun.interval))
+
+    async def _receive(self, ws, until_runs):
+        while self.runs < until_runs:
+            msg = ForwardMsg()
+            msg.ParseFromString(await ws.recv())
+            self._handle(ws, msg)
+
+    async def run(self, stop_at):
+        url = f"ws://127.0.0.1:{self.port}/_stcore/stream"
+        async with websockets.connect(url, subprotocols=['streamlit'], max_size=None) as ws:
+            await ws.send(self._rerun())
+            await self._receive(ws, 1)
+            await ws.send(self._rerun([(self.widgets["Staff ID :"], 'string_value', STAFF_ID),
+                                       (self.widgets["Password :"], 'string_value', PASSWORD),
+                                       (self.widgets["Login"], 'trigger_value', True)]))
+            try:
+                await asyncio.wait_for(self._receive(ws, float('inf')), stop_at - time.monotonic())
+            except asyncio.TimeoutError:
+                pass
+            finally:
+                for timer in self.fragment_timers.values():
+                    timer.cancel()
+
+
+async def _drive(port, pid, consoles, seconds):
+    stop_at = time.monotonic() + WARMUP_SECONDS + seconds
+    tabs = [Console(port) for _ in range(consoles)]
+    tasks = [asyncio.ensure_future(tab.run(stop_at)) for tab in tabs]
+    await asyncio.sleep(WARMUP_SECONDS)
+    cpu_start, runs_start = _cpu_seconds(pid), sum(tab.runs for tab in tabs)
+    await asyncio.gather(*tasks)
+    cpu = _cpu_seconds(pid) - cpu_start
+    return cpu, sum(tab.runs for tab in tabs) - runs_start
+
+
+def measure(tree, app, consoles, seconds, options=()):
+    """(server CPU seconds, script runs) over the window, with the drill restored in every console"""
+    write_snapshot(_drill_snapshot(tree), os.path.join(tree, 'session_snapshots'))
+    port = _free_port()
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'streamlit', 'run', app, '--server.headless', 'true', '--server.port', str(port),
+         '--server.enableXsrfProtection', 'false', '--server.fileWatcherType', 'none',
+         '--browser.gatherUsageStats', 'false', *options],
+        cwd=tree, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                socket.create_connection(('127.0.0.1', port), timeout=1).close()
+                break
+            except OSError:
+                if time.monotonic() > deadline:
+                    raise RuntimeError("Streamlit server did not start")
+                time.sleep(0.2)
+        return asyncio.run(_drive(port, server.pid, consoles, seconds))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def _report(label, cpu, runs, consoles, seconds):
+    print(f"{label:<10} {cpu / seconds * 1000 / consoles:8.1f} ms CPU/s per console  "
+          f"{runs / seconds / consoles:6.1f} runs/s per console  ({cpu:.2f} s CPU over {seconds} s)")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--app', default='main.py')
+    parser.add_argument('--consoles', type=int, default=4)
+    parser.add_argument('--seconds', type=int, default=20)
+    parser.add_argument('--baseline', help="git revision to compare with")
+    args = parser.parse_args()
+
+    tmp_dir = tempfile.mkdtemp(prefix='tgs_bench_')
+    try:
+        trees = []
+        if args.baseline:
+            baseline = os.path.join(tmp_dir, 'baseline')
+            os.makedirs(baseline)
+            archive = subprocess.run(['git', 'archive', args.baseline], check=True, capture_output=True).stdout
+            subprocess.run(['tar', '-x', '-C', baseline], input=archive, check=True)
+            trees.append((args.baseline, baseline, ()))
+        current = os.path.join(tmp_dir, 'current')
+        shutil.copytree('.', current, ignore=COPY_IGNORE)
+        trees.append(('current', current, ()))
+        trees.append(('launched', current, LAUNCH_OPTIONS))
+
+        print(f"{args.app}, {args.consoles} consoles on the guidelines page with the timer running")
+        for label, tree, options in trees:
+            cpu, runs = measure(tree, args.app, args.consoles, args.seconds, options)
+            _report(label, cpu, runs, args.consoles, args.seconds)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
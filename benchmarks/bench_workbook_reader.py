@@ -0,0 +1,66 @@
+"""Peak memory and load time: pd.read_excel vs the streaming, column-projected reader
+
+Each load runs in a fresh interpreter so peak RSS is not polluted by earlier runs.
+Run from the repository root: python -m benchmarks.bench_workbook_reader
+"""
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+ROW_COUNTS = (1000, 10000, 100000)
+# Fleet MOR sheets carry columns the app never reads
+EXTRA_COLUMNS = 12
+
+
+def _peak_rss_mb():
+    # ru_maxrss is in KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _child(reader, path):
+    import pandas as pd
+    from mor_catalog import read_mor_rows
+
+    baseline = _peak_rss_mb()
+    start = time.perf_counter()
+    if reader == 'read_excel':
+        pd.read_excel(path, engine='openpyxl')
+    else:
+        read_mor_rows(path)
+    elapsed = time.perf_counter() - start
+    print(json.dumps({'seconds': elapsed, 'peak_mb': _peak_rss_mb() - baseline}))
+
+
+def _run(reader, path):
+    result = subprocess.run([sys.executable, '-m', 'benchmarks.bench_workbook_reader', '--child', reader, path],
+                            capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    from benchmarks.synthetic_mor import write_synthetic_workbook
+
+    tmp_dir = tempfile.mkdtemp(prefix='tgs_bench_')
+    try:
+        for n_rows in ROW_COUNTS:
+            path = os.path.join(tmp_dir, f"MOR_{n_rows}.xlsx")
+            size = write_synthetic_workbook(path, n_rows, extra_columns=EXTRA_COLUMNS)
+            pandas_result = _run('read_excel', path)
+            stream_result = _run('streaming', path)
+            print(f"{n_rows:>7} rows ({size / 1e6:5.1f} MB xlsx)  "
+                  f"read_excel {pandas_result['seconds']:6.2f} s {pandas_result['peak_mb']:7.1f} MB   "
+                  f"streaming {stream_result['seconds']:6.2f} s {stream_result['peak_mb']:7.1f} MB", flush=True)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 4 and sys.argv[1] == '--child':
+        _child(sys.argv[2], sys.argv[3])
+    else:
+        main()
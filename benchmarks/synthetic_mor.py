@@ -0,0 +1,32 @@
+import os
+import random
+
+import openpyxl
+
+from mor_catalog import CATALOG_COLUMNS, MOR_FILE, read_mor_rows
+
+
+def synthetic_rows(n_rows, n_equipment=34, seed=0):
+    """MOR-shaped rows with n_rows scenarios spread over n_equipment, based on the real rows"""
+    rng = random.Random(seed)
+    template = read_mor_rows(MOR_FILE)
+    rows = []
+    for i in range(n_rows):
+        row = list(rng.choice(template))
+        row[0] = f"Equipment {i % n_equipment:04d}"
+        row[1] = f"{row[1]} #{i}"
+        rows.append(tuple(row))
+    return rows
+
+
+def write_synthetic_workbook(path, n_rows, n_equipment=34, seed=0, extra_columns=0):
+    """Write a synthetic MOR workbook to path, optionally padded with columns the app does not use"""
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet('MOR')
+    extra_header = [f"Remarks {i + 1}" for i in range(extra_columns)]
+    sheet.append(list(CATALOG_COLUMNS) + extra_header)
+    padding = [f"Unused fleet detail text {i + 1}" for i in range(extra_columns)]
+    for row in synthetic_rows(n_rows, n_equipment, seed):
+        sheet.append(list(row) + padding)
+    workbook.save(path)
+    return os.path.getsize(path)
@@ -0,0 +1,169 @@
+import threading
+import time
+
+from streamlit import runtime
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+# Drill time thresholds in seconds - each fires one event per drill
+ALERT_SECONDS = 180
+CRITICAL_SECONDS = 300
+THRESHOLDS = (ALERT_SECONDS, CRITICAL_SECONDS)
+# Boot time (wall minus monotonic clock) moves by NTP drift only - more than this means a reboot
+BOOT_TOLERANCE_SECONDS = 5.0
+# Timers of sessions closed without stopping them are dropped after this long unread
+PRUNE_AFTER_SECONDS = 3600
+
+# {session ID: [DrillTimer, monotonic time of last access]}
+_timers = {}
+_timers_lock = threading.Lock()
+
+
+class DrillTimer:
+    """Drill time on the monotonic clock - wall clock changes and pauses do not count"""
+
+    __slots__ = ('accumulated', 'resumed_at', 'resumed_wall', 'boot_time', 'fired')
+
+    def __init__(self, accumulated=0.0, fired=()):
+        # Seconds run before the current stretch, which started at resumed_at (None while paused)
+        self.accumulated = accumulated
+        self.resumed_at = None
+        self.resumed_wall = None
+        self.boot_time = None
+        self.fired = set(fired)
+
+    @property
+    def running(self):
+        return self.resumed_at is not None
+
+    def elapsed(self):
+        if self.resumed_at is None:
+            return self.accumulated
+        return self.accumulated + (time.monotonic() - self.resumed_at)
+
+    def resume(self):
+        if self.resumed_at is None:
+            self.resumed_wall, self.resumed_at = time.time(), time.monotonic()
+            self.boot_time = self.resumed_wall - self.resumed_at
+
+    def pause(self):
+        if self.resumed_at is not None:
+            self.accumulated = self.elapsed()
+            self.resumed_at = self.resumed_wall = self.boot_time = None
+
+    def due_events(self):
+        """Thresholds passed and not reported yet - each is returned once, however late the call"""
+        elapsed = self.elapsed()
+        due = [threshold for threshold in THRESHOLDS if threshold <= elapsed and threshold not in self.fired]
+        self.fired.update(due)
+        return due
+
+    def to_snapshot(self):
+        """JSON-ready state - it only changes on pause, resume and events, not as time passes"""
+        return {'accumulated': self.accumulated, 'resumed_at': self.resumed_at, 'resumed_wall': self.resumed_wall,
+                'boot_time': self.boot_time, 'fired': sorted(self.fired)}
+
+    @classmethod
+    def from_snapshot(cls, state):
+        timer = cls(state['accumulated'], state['fired'])
+        if state['resumed_at'] is None:
+            return timer
+        now_wall, now_monotonic = time.time(), time.monotonic()
+        timer.resumed_wall = state['resumed_wall']
+        if abs((now_wall - now_monotonic) - state['boot_time']) <= BOOT_TOLERANCE_SECONDS:
+            # Same boot - the monotonic clock is unaffected by wall clock changes since the resume
+            timer.resumed_at, timer.boot_time = state['resumed_at'], state['boot_time']
+        else:
+            # Rebooted since - the old monotonic reading means nothing now, fall back to the wall clock
+            timer.resumed_at = now_monotonic - (now_wall - state['resumed_wall'])
+            timer.boot_time = now_wall - now_monotonic
+        return timer
+
+
+def _session_key():
+    ctx = get_script_run_ctx(suppress_warning=True)
+    return ctx.session_id if ctx else None
+
+
+def _prune(now):
+    if not runtime.exists():
+        return
+    active = runtime.get_instance().is_active_session
+    for key in [key for key, (_, seen) in _timers.items() if now - seen > PRUNE_AFTER_SECONDS and not active(key)]:
+        del _timers[key]
+
+
+def _set(timer):
+    now = time.monotonic()
+    with _timers_lock:
+        _prune(now)
+        _timers[_session_key()] = [timer, now]
+    return timer
+
+
+def get_timer():
+    """This session's DrillTimer, or None if no drill is timed"""
+    with _timers_lock:
+        entry = _timers.get(_session_key())
+        if entry is None:
+            return None
+        entry[1] = time.monotonic()
+        return entry[0]
+
+
+def start_timer():
+    """Start a new drill timer for this session, replacing any previous one"""
+    timer = DrillTimer()
+    timer.resume()
+    return _set(timer)
+
+
+def restore_timer(state):
+    """Put a timer saved with DrillTimer.to_snapshot back for this session"""
+    return _set(DrillTimer.from_snapshot(state))
+
+
+def stop_timer():
+    with _timers_lock:
+        _timers.pop(_session_key(), None)
+
+
+def pause_timer():
+    timer = get_timer()
+    if timer is not None:
+        with _timers_lock:
+            timer.pause()
+
+
+def resume_timer():
+    timer = get_timer()
+    if timer is not None:
+        with _timers_lock:
+            timer.resume()
+
+
+def timer_running():
+    timer = get_timer()
+    return timer is not None and timer.running
+
+
+def elapsed_seconds():
+    """Drill time of this session so far, 0 without a timer"""
+    timer = get_timer()
+    if timer is None:
+        return 0.0
+    with _timers_lock:
+        return timer.elapsed()
+
+
+def take_events():
+    """Thresholds this session's drill has passed since the last call, see DrillTimer.due_events"""
+    timer = get_timer()
+    if timer is None:
+        return []
+    with _timers_lock:
+        return timer.due_events()
+
+
+def format_elapsed(seconds):
+    minutes, seconds = divmod(int(seconds), 60)
+    return f"{minutes:02d}:{seconds:02d}"
@@ -1,44 +1,16 @@
 import streamlit as st
-import pandas as pd
 
+from mor_catalog import get_catalog
+from render_stats import instrument
+from session_snapshot import save_session_snapshot
+
+@instrument
 def show_equipment_page():
     """Page 1: Equipment Selection with Configuration"""
     st.markdown('<div class="section-header">🔧 Step 1: Equipment Configuration & Selection</div>', unsafe_allow_html=True)
     
-    # Load default data automatically on first visit
-    if st.session_state.mor_data is None:
-        try:
-            # Load the existing MOR_KGL.xlsx file with proper Excel reading
-            df = pd.read_excel('MOR_KGL.xlsx', engine='openpyxl')
-            st.session_state.mor_data = df
-        except FileNotFoundError:
-            # Create sample data with the equipment list provided by user
-            sample_data = {
-                'Equipment': ['TMS', 'Power', 'Traction', 'Brake', 'Suspension System', 'Train Doors', 'Auxiliary Driving Console', 'Train Coupler', 'Axle', 'Lightning', 'Pneumatic System', 'Air Conditioning Unit', 'Fire/Smoke Sensor', 'Heat Detector', 'Radio', 'IPIS', 'CCTV', 'Train Horn', 'Event Recorder', 'Obstacle Detection', 'Abnormal Noise & Vibration Generated', 'Rollback Detection', 'Failure of Train Wake Up', 'Excessive Wheel Slip/Slide', 'Train Overshoot or Undershoot', 'Foreign object on track', 'VATC', 'Loss of Driving Modes', 'All train doors at APG side not open', 'Trackside ATO', 'Wayside - Train Communication Channel', 'ATS', 'Switch Machine', '750 VDC Switchgear'],
-                'Failure Scenario': ['TMS failure', 'Power failure', 'Traction failure', 'Brake failure', 'Suspension failure', 'Door failure', 'Console failure', 'Coupler failure', 'Axle failure', 'Lightning failure', 'Pneumatic failure', 'AC failure', 'Fire sensor failure', 'Heat detector failure', 'Radio failure', 'IPIS failure', 'CCTV failure', 'Horn failure', 'Recorder failure', 'Detection failure', 'Noise/vibration', 'Rollback detected', 'Wake up failure', 'Wheel slip/slide', 'Train positioning error', 'Foreign object detected', 'VATC failure', 'Driving mode loss', 'Door opening failure', 'ATO failure', 'Communication failure', 'ATS failure', 'Switch failure', 'Switchgear failure'],
-                'Failure Classification': ['Major'] * 34,
-                'Guidelines for the Chief Controller': ['Follow emergency protocol'] * 34,
-                'Local Response': ['Immediate action required'] * 34,
-                'ATS Alarm Description': ['System alarm'] * 34,
-                'FSCADA Alarm Description': ['SCADA alarm'] * 34,
-                'HMI Alarm': ['HMI FAULT'] * 34
-            }
-            df = pd.DataFrame(sample_data)
-            st.session_state.mor_data = df
-        except Exception as e:
-            # Create sample data with the equipment list provided by user
-            sample_data = {
-                'Equipment': ['TMS', 'Power', 'Traction', 'Brake', 'Suspension System', 'Train Doors', 'Auxiliary Driving Console', 'Train Coupler', 'Axle', 'Lightning', 'Pneumatic System', 'Air Conditioning Unit', 'Fire/Smoke Sensor', 'Heat Detector', 'Radio', 'IPIS', 'CCTV', 'Train Horn', 'Event Recorder', 'Obstacle Detection', 'Abnormal Noise & Vibration Generated', 'Rollback Detection', 'Failure of Train Wake Up', 'Excessive Wheel Slip/Slide', 'Train Overshoot or Undershoot', 'Foreign object on track', 'VATC', 'Loss of Driving Modes', 'All train doors at APG side not open', 'Trackside ATO', 'Wayside - Train Communication Channel', 'ATS', 'Switch Machine', '750 VDC Switchgear'],
-                'Failure Scenario': ['TMS failure', 'Power failure', 'Traction failure', 'Brake failure', 'Suspension failure', 'Door failure', 'Console failure', 'Coupler failure', 'Axle failure', 'Lightning failure', 'Pneumatic failure', 'AC failure', 'Fire sensor failure', 'Heat detector failure', 'Radio failure', 'IPIS failure', 'CCTV failure', 'Horn failure', 'Recorder failure', 'Detection failure', 'Noise/vibration', 'Rollback detected', 'Wake up failure', 'Wheel slip/slide', 'Train positioning error', 'Foreign object detected', 'VATC failure', 'Driving mode loss', 'Door opening failure', 'ATO failure', 'Communication failure', 'ATS failure', 'Switch failure', 'Switchgear failure'],
-                'Failure Classification': ['Major'] * 34,
-                'Guidelines for the Chief Controller': ['Follow emergency protocol'] * 34,
-                'Local Response': ['Immediate action required'] * 34,
-                'ATS Alarm Description': ['System alarm'] * 34,
-                'FSCADA Alarm Description': ['SCADA alarm'] * 34,
-                'HMI Alarm': ['HMI FAULT'] * 34
-            }
-            df = pd.DataFrame(sample_data)
-            st.session_state.mor_data = df
+    # Shared MOR catalog for the whole server - reloaded automatically when MOR_KGL.xlsx changes
+    st.session_state.mor_catalog = get_catalog()
     
     # Equipment failure selection - centered and prominent
     col1, col2, col3 = st.columns([1, 2, 1])
@@ -54,18 +26,39 @@ def show_equipment_page():
         st.session_state.num_equipment_fail = num_equipment
     
     # Check if data is properly loaded
-    if st.session_state.mor_data is None or st.session_state.mor_data.empty:
+    if st.session_state.mor_catalog.empty:
         st.error("No equipment data available!")
         return
     
-    df = st.session_state.mor_data
-    equipment_list = df['Equipment'].unique().tolist()
-    equipment_list = [eq for eq in equipment_list if pd.notna(eq)]
-    
-    if len(equipment_list) == 0:
+    if len(st.session_state.mor_catalog.equipment_list) == 0:
         st.error("No equipment found in the data!")
         return
     
+    # Only the grid and panels rerun on a selection toggle - not the CSS, sidebar or number input
+    st.fragment(show_equipment_selection)(len(st.session_state.selected_equipment) > 0)
+
+def _toggle_equipment(equipment):
+    if equipment not in st.session_state.selected_equipment and len(st.session_state.selected_equipment) < st.session_state.num_equipment_fail:
+        st.session_state.selected_equipment.append(equipment)
+        st.toast(f"✅ {equipment} selected!")
+    elif equipment in st.session_state.selected_equipment:
+        st.session_state.selected_equipment.remove(equipment)
+        st.toast(f"❌ {equipment} deselected!")
+
+def _clear_equipment():
+    st.session_state.selected_equipment = []
+
+@instrument
+def show_equipment_selection(had_selection):
+    """Selection status, equipment grid and selected equipment - a fragment, clicks rerun only this"""
+    # The sidebar and step indicator change only when the selection empties or fills - rerun the whole app then
+    if (len(st.session_state.selected_equipment) > 0) != had_selection:
+        st.rerun()
+    # Fragment reruns skip main(), so persist the toggle here
+    save_session_snapshot()
+    
+    equipment_list = st.session_state.mor_catalog.equipment_list
+    
     # Selection status display
     current_selected = len(st.session_state.selected_equipment)
     max_allowed = st.session_state.num_equipment_fail
@@ -106,20 +99,15 @@ def show_equipment_page():
                     # Disable button if max reached and not already selected
                     button_disabled = max_reached and not is_selected
                     
-                    if st.button(
+                    st.button(
                         equipment,
                         key=f"equipment_{equipment_idx}",
                         type=button_color,
                         help=f"Select {equipment} equipment" if not button_disabled else f"Maximum {st.session_state.num_equipment_fail} equipment limit reached",
-                        disabled=button_disabled
-                    ):
-                        if equipment not in st.session_state.selected_equipment and len(st.session_state.selected_equipment) < st.session_state.num_equipment_fail:
-                            st.session_state.selected_equipment.append(equipment)
-                            st.success(f"✅ {equipment} selected!")
-                        elif equipment in st.session_state.selected_equipment:
-                            st.session_state.selected_equipment.remove(equipment)
-                            st.info(f"❌ {equipment} deselected!")
-                        st.rerun()
+                        disabled=button_disabled,
+                        on_click=_toggle_equipment,
+                        args=(equipment,)
+                    )
     
     # Show selected equipment
     if len(st.session_state.selected_equipment) > 0:
@@ -134,16 +122,11 @@ def show_equipment_page():
         # Navigation buttons
         col1, col2, col3 = st.columns([1, 1, 1])
         with col1:
-            # Change equipment count button
-            if st.button("🔄 Change Count", key="change_count"):
-                # Reset selections when changing count
-                st.session_state.selected_equipment = []
-                st.rerun()
+            # Change equipment count button - resets selections when changing count
+            st.button("🔄 Change Count", key="change_count", on_click=_clear_equipment)
         
         with col2:
-            if st.button("🗑️ Clear All", key="clear_all"):
-                st.session_state.selected_equipment = []
-                st.rerun()
+            st.button("🗑️ Clear All", key="clear_all", on_click=_clear_equipment)
         
         with col3:
             if st.button("➡️ Next: Scenarios", key="goto_scenario", type="primary"):
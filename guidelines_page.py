@@ -1,97 +1,30 @@
 import streamlit as st
-import pandas as pd
 import datetime
-import time
-import os
 
-def save_resolution_data():
-    """Save resolution data to CSV"""
-    if not st.session_state.active_scenarios:
-        return
-    
-    end_time = datetime.datetime.now()
-    
-    for scenario in st.session_state.active_scenarios:
-        # Determine status based on 5-minute rule
-        status = "Resolved" if st.session_state.elapsed_time <= 300 else "Failed"
-        
-        resolution_data = {
-            "Staff ID": st.session_state.staff_id,
-            "Start Time": st.session_state.scenario_start_time.strftime("%Y-%m-%d %H:%M:%S") if st.session_state.scenario_start_time else "",
-            "Stop Time": end_time.strftime("%Y-%m-%d %H:%M:%S"),
-            "Equipment": scenario.get('Equipment', 'N/A'),
-            "Failure Scenario": scenario.get('Failure Scenario', 'N/A'),
-            "Status": status,
-            "Guideline for Chief Controller": scenario.get('Guidelines for the Chief Controller', 'N/A'),
-            "Local Response": scenario.get('Local Response', 'N/A'),
-            "Duration (min)": round(st.session_state.elapsed_time / 60, 1)
-        }
-        
-        # Save to CSV
-        filename = "tgs_resolution_history.csv"
-        try:
-            if os.path.exists(filename):
-                df = pd.read_csv(filename)
-                df = pd.concat([df, pd.DataFrame([resolution_data])], ignore_index=True)
-            else:
-                df = pd.DataFrame([resolution_data])
-            
-            df.to_csv(filename, index=False)
-            
-        except Exception as e:
-            st.error(f"Error saving data: {str(e)}")
+from drill_timer import (ALERT_SECONDS, CRITICAL_SECONDS, elapsed_seconds, format_elapsed, get_timer, pause_timer,
+                         resume_timer, start_timer, stop_timer, take_events, timer_running)
+from mor_catalog import ALARM_ATS, ALARM_FSCADA, ALARM_HMI, get_catalog
+from history_store import save_resolution_data
+from render_cache import guideline_table_rows, guideline_title
+from render_stats import instrument
 
-def show_guidelines_page():
-    """Page 4: Guidelines and Clean Timer"""
-    st.markdown('<div class="section-header">📖 Step 4: Follow Guidelines</div>', unsafe_allow_html=True)
-    
-    if len(st.session_state.active_scenarios) == 0:
-        st.error("Please select a scenario first!")
-        if st.button("⬅️ Back to Scenarios", key="back_to_scenario_error"):
-            st.session_state.current_page = 'scenario'
-            st.rerun()
-        return
-    
-    # Initialize timer running state
-    if 'timer_running' not in st.session_state:
-        st.session_state.timer_running = True
-    
-    # SAFE TIMER INITIALIZATION - Always ensure timer_start exists
-    current_time = time.time()
-    
-    # Initialize timer variables safely
-    if 'timer_start' not in st.session_state or st.session_state.timer_start is None:
-        st.session_state.timer_start = current_time
-        st.session_state.scenario_start_time = datetime.datetime.now()
-        st.session_state.elapsed_time = 0
-        st.success("✅ Timer started automatically!")
-    
-    # SAFE CALCULATION - Always check for None
-    try:
-        if st.session_state.timer_start is not None:
-            elapsed_seconds = current_time - st.session_state.timer_start
-            st.session_state.elapsed_time = elapsed_seconds
-        else:
-            # Fallback: Reset timer if somehow None
-            st.session_state.timer_start = current_time
-            elapsed_seconds = 0
-            st.warning("⚠️ Timer was reset due to initialization issue")
-    except (TypeError, AttributeError) as e:
-        # Error handling: Reset timer
-        st.session_state.timer_start = current_time
-        elapsed_seconds = 0
-        st.error(f"🐛 Timer error fixed: {str(e)}")
-    
-    # Convert to minutes and seconds
-    minutes = int(elapsed_seconds // 60)
-    seconds = int(elapsed_seconds % 60)
+# Toast for each drill timer threshold, shown once when the drill passes it
+THRESHOLD_TOASTS = {
+    ALERT_SECONDS: ("⚠️ 3 minutes elapsed - Decision making time!", "⚠️"),
+    CRITICAL_SECONDS: ("🚨 5 minutes elapsed - Critical time reached!", "🚨")
+}
+
+@instrument
+def show_timer():
+    """Timer box and time alerts - a fragment, so a tick does not rerun the whole app"""
+    elapsed = elapsed_seconds()
     
     # Determine timer status and color
-    if elapsed_seconds > 300:  # Over 5 minutes
+    if elapsed > CRITICAL_SECONDS:
         timer_color = "#dc3545"  # Red
         timer_icon = "🚨"
         status_text = "CRITICAL"
-    elif elapsed_seconds > 180:  # Over 3 minutes
+    elif elapsed > ALERT_SECONDS:
         timer_color = "#fd7e14"  # Orange
         timer_icon = "⚠️"
         status_text = "ALERT"
@@ -114,28 +47,65 @@ def show_guidelines_page():
          border: 2px solid #fff;
          box-shadow: 0 4px 8px rgba(0,0,0,0.2);
      ">
-         {timer_icon} Timer: {minutes:02d}:{seconds:02d} ({status_text})
+         {timer_icon} Timer: {format_elapsed(elapsed)} ({status_text})
      </div>
      ''', unsafe_allow_html=True)
     
+    # Show alerts based on time
+    if ALERT_SECONDS <= elapsed < CRITICAL_SECONDS:
+        st.warning("⚠️ 3 minutes elapsed - Decision making time!")
+    elif elapsed >= CRITICAL_SECONDS:
+        st.error("🚨 5 minutes elapsed - Critical time reached!")
+    
+    # Alert at 3 and 5 minutes - once each, even if no tick lands on the exact second
+    for threshold in take_events():
+        message, icon = THRESHOLD_TOASTS[threshold]
+        st.toast(message, icon=icon)
+
+@instrument
+def show_guidelines_page():
+    """Page 4: Guidelines and Clean Timer"""
+    st.markdown('<div class="section-header">📖 Step 4: Follow Guidelines</div>', unsafe_allow_html=True)
+    
+    # Session keeps scenario IDs only - look the records up in the shared catalog
+    catalog = get_catalog()
+    active_scenarios = catalog.resolve(st.session_state.active_scenarios)
+    
+    if len(active_scenarios) == 0:
+        st.error("Please select a scenario first!")
+        if st.button("⬅️ Back to Scenarios", key="back_to_scenario_error"):
+            st.session_state.current_page = 'scenario'
+            st.rerun()
+        return
+    
+    # Start timing the drill the first time its guidelines are shown
+    if get_timer() is None:
+        start_timer()
+        st.session_state.scenario_start_time = datetime.datetime.now()
+        st.success("✅ Timer started automatically!")
+    running = timer_running()
+    
+    # Only the timer reruns every second while it runs - not the CSS, sidebar or guidelines table
+    st.fragment(show_timer, run_every=1 if running else None)()
+    
     # Timer control button
     col_timer1, col_timer2 = st.columns([1, 1])
     
     with col_timer1:
-        if st.session_state.timer_running:
+        if running:
             if st.button("⏹️ Stop Timer", key="stop_timer", type="secondary"):
-                st.session_state.timer_running = False
-                st.success("✅ Timer stopped!")
+                pause_timer()
+                st.toast("✅ Timer stopped!")
                 st.rerun()
         else:
             if st.button("▶️ Start Timer", key="start_timer", type="secondary"):
-                st.session_state.timer_running = True
-                st.success("✅ Timer resumed!")
+                resume_timer()
+                st.toast("✅ Timer resumed!")
                 st.rerun()
     
     with col_timer2:
         if st.button("💾 Save & Complete", key="save_complete", type="primary"):
-            st.session_state.timer_running = False
+            pause_timer()
             save_resolution_data()
             
             # Reset all variables
@@ -143,34 +113,21 @@ def show_guidelines_page():
             st.session_state.selected_equipment = []
             st.session_state.selected_scenarios = []
             st.session_state.active_scenarios = []
-            if 'timer_start' in st.session_state:
-                del st.session_state.timer_start
-            st.session_state.elapsed_time = 0
+            stop_timer()
             st.session_state.scenario_start_time = None
-            st.session_state.timer_running = True
             
-            if 'alarm_status' in st.session_state:
-                del st.session_state.alarm_status
-                
-            st.success("✅ Data saved to history successfully!")
-            st.balloons()
-            time.sleep(1)
+            # A toast survives the rerun, so no need to hold the script open for the message
+            st.toast("✅ Data saved to history successfully!")
             st.rerun()
     
-    # Show alerts based on time
-    if 180 <= elapsed_seconds < 300:
-        st.warning("⚠️ 3 minutes elapsed - Decision making time!")
-    elif elapsed_seconds >= 300:
-        st.error("🚨 5 minutes elapsed - Critical time reached!")
-    
     # Equipment and Failure Scenario display
     col1, col2 = st.columns(2)
     
     with col1:
         # Equipment box
         equipment_text = ""
-        for i, scenario in enumerate(st.session_state.active_scenarios, 1):
-            equipment_text += f"{i}. {scenario.get('Equipment', 'N/A')}\n"
+        for i, scenario in enumerate(active_scenarios, 1):
+            equipment_text += f"{i}. {scenario.equipment}\n"
         
         st.markdown(f'''
         <div style="
@@ -190,8 +147,8 @@ def show_guidelines_page():
     with col2:
         # Failure Scenario box
         scenario_text = ""
-        for i, scenario in enumerate(st.session_state.active_scenarios, 1):
-            scenario_text += f"{i}. {scenario.get('Failure Scenario', 'N/A')}\n"
+        for i, scenario in enumerate(active_scenarios, 1):
+            scenario_text += f"{i}. {scenario.failure_scenario}\n"
         
         st.markdown(f'''
         <div style="
@@ -220,17 +177,14 @@ def show_guidelines_page():
         'HMI': []
     }
     
-    for scenario in st.session_state.active_scenarios:
-        ats_alarm = scenario.get('ATS Alarm Description', 'N/A')
-        fscada_alarm = scenario.get('FSCADA Alarm Description', 'N/A')
-        hmi_alarm = scenario.get('HMI Alarm', 'N/A')
-        
-        if ats_alarm not in ['N/A', '', 'No alarm triggered', None] and pd.notna(ats_alarm):
-            all_alarms['ATS'].append(ats_alarm)
-        if fscada_alarm not in ['N/A', '', 'No alarm triggered', None] and pd.notna(fscada_alarm):
-            all_alarms['FSCADA'].append(fscada_alarm)
-        if hmi_alarm not in ['N/A', '', 'No alarm triggered', None] and pd.notna(hmi_alarm):
-            all_alarms['HMI'].append(hmi_alarm)
+    # Alarm texts were normalized and flagged in each scenario's alarm_mask at catalog load
+    for scenario in active_scenarios:
+        if scenario.alarm_mask & ALARM_ATS:
+            all_alarms['ATS'].append(scenario.ats_alarm)
+        if scenario.alarm_mask & ALARM_FSCADA:
+            all_alarms['FSCADA'].append(scenario.fscada_alarm)
+        if scenario.alarm_mask & ALARM_HMI:
+            all_alarms['HMI'].append(scenario.hmi_alarm)
     
     alarms = [
         ('ATS', all_alarms['ATS']),
@@ -259,35 +213,16 @@ def show_guidelines_page():
     # Guidelines Table - ONLY RENDER ONCE
     st.markdown('<div class="section-header">📋 Guidelines:</div>', unsafe_allow_html=True)
     
-    scenario = st.session_state.active_scenarios[0]
-    guidelines = scenario.get('Guidelines for the Chief Controller', 'N/A')
-    local_response = scenario.get('Local Response', 'N/A')
-    
-    # Parse guidelines
-    train_entering = ""
-    train_in_service = ""
-    note = ""
-    
-    if guidelines != 'N/A' and guidelines.strip():
-        if 'Train Entering service:' in guidelines:
-            parts = guidelines.split('Train Entering service:')
-            if len(parts) > 1:
-                remaining = parts[1]
-                if 'Train already in service:' in remaining:
-                    enter_parts = remaining.split('Train already in service:')
-                    train_entering = enter_parts[0].strip()
-                    if len(enter_parts) > 1:
-                        if 'Note:' in enter_parts[1]:
-                            service_parts = enter_parts[1].split('Note:')
-                            train_in_service = service_parts[0].strip()
-                            if len(service_parts) > 1:
-                                note = service_parts[1].strip()
-                        else:
-                            train_in_service = enter_parts[1].strip()
-        else:
-            train_entering = guidelines.strip()
+    # Guideline text was parsed once when the catalog loaded, and each scenario's rows are prebuilt
+    # No blank lines between rows, or markdown ends the HTML block early
+    guideline_rows = []
+    for i, scenario in enumerate(active_scenarios, 1):
+        if len(active_scenarios) > 1:
+            guideline_rows.append(f'<tr><td colspan="3" class="row-header" style="text-align: left;">'
+                                  f'{i}. {guideline_title(scenario, catalog.version)}</td></tr>')
+        guideline_rows.append(guideline_table_rows(scenario, catalog.version))
+    rows_html = "\n".join(guideline_rows)
     
-    # Guidelines table - render only once
     guidelines_table = f'''
     <table class="guidelines-table">
         <thead>
@@ -298,19 +233,7 @@ def show_guidelines_page():
             </tr>
         </thead>
         <tbody>
-            <tr>
-                <td class="row-header">1)</td>
-                <td>{train_entering if train_entering else guidelines}</td>
-                <td rowspan="3">{local_response}</td>
-            </tr>
-            <tr>
-                <td class="row-header">2)</td>
-                <td>{train_in_service}</td>
-            </tr>
-            <tr>
-                <td class="row-header">3)</td>
-                <td style="background: #fff8f0;">{note if note else "N/A"}</td>
-            </tr>
+            {rows_html}
         </tbody>
     </table>
     '''
@@ -330,13 +253,6 @@ def show_guidelines_page():
         if st.button("🔄 New Scenario", key="new_scenario"):
             st.session_state.active_scenarios = []
             st.session_state.selected_scenarios = []
-            if 'timer_start' in st.session_state:
-                del st.session_state.timer_start
-            st.session_state.timer_running = True
+            stop_timer()
             st.session_state.current_page = 'scenario'
             st.rerun()
-    
-    # AUTO-UPDATE - Only if timer is running
-    if st.session_state.timer_running:
-        time.sleep(1)
-        st.rerun()
\ No newline at end of file
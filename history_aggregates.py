@@ -0,0 +1,255 @@
+import json
+import math
+import os
+import sys
+import threading
+import time
+from typing import NamedTuple
+
+from history_lock import history_lock
+
+AGGREGATES_FILE = "tgs_history_aggregates.json"
+AGGREGATES_FORMAT = 2
+# A save appends its rows to the journal next to the JSON snapshot; the snapshot is only
+# rewritten, with the journal folded in, once the journal holds this many rows
+COMPACT_ROWS = 1000
+JOURNAL_SUFFIX = ".log"
+GROUPS = ('equipment', 'scenario', 'staff')
+AGGREGATE_COLUMNS = ("Staff ID", "Stop Time", "Equipment", "Failure Scenario", "Status", "Duration (min)")
+
+# In-memory copy of the store: the snapshot mtime and journal generation it was read at, and how far
+# into that journal it has been replayed
+_state = {'mtime': None, 'groups': None, 'generation': None, 'offset': 0, 'journal_rows': 0}
+_state_lock = threading.Lock()
+
+
+class Aggregate(NamedTuple):
+    count: int
+    total_minutes: float
+    resolved: int
+    failed: int
+    last_occurrence: str
+
+    @property
+    def mean_minutes(self):
+        return self.total_minutes / self.count if self.count else 0.0
+
+
+def scenario_key(equipment, failure_scenario):
+    return f"{equipment}\t{failure_scenario}"
+
+
+def _text(value):
+    return value if isinstance(value, str) else ''
+
+
+def _row_keys(row):
+    return (
+        ('equipment', _text(row.get("Equipment"))),
+        ('scenario', scenario_key(_text(row.get("Equipment")), _text(row.get("Failure Scenario")))),
+        ('staff', _text(row.get("Staff ID")))
+    )
+
+
+def _empty_groups():
+    return {group: {} for group in GROUPS}
+
+
+def _minutes(value):
+    try:
+        minutes = float(value)
+    except (TypeError, ValueError):
+        return 0.0
+    return 0.0 if math.isnan(minutes) else minutes
+
+
+def _apply(groups, row):
+    """Fold one history row into every group it belongs to - O(1) per row"""
+    minutes = _minutes(row.get("Duration (min)"))
+    resolved = row.get("Status") == "Resolved"
+    stop_time = _text(row.get("Stop Time"))
+    for group, key in _row_keys(row):
+        count, total, resolved_count, failed_count, last = groups[group].get(key, (0, 0.0, 0, 0, ''))
+        groups[group][key] = (count + 1, total + minutes, resolved_count + resolved,
+                              failed_count + (not resolved), max(last, stop_time))
+
+
+def journal_path(path, generation):
+    return f"{path}.{generation}{JOURNAL_SUFFIX}"
+
+
+def _journal_line(row):
+    """The fields _apply reads, as one JSON line"""
+    values = [_text(row.get(column)) for column in AGGREGATE_COLUMNS[:-1]] + [_minutes(row.get("Duration (min)"))]
+    return json.dumps(values, ensure_ascii=False) + '\n'
+
+
+def _read(path):
+    """(groups, journal generation) of the snapshot"""
+    try:
+        with open(path, encoding='utf-8') as handle:
+            data = json.load(handle)
+    except FileNotFoundError:
+        return _empty_groups(), None
+    if data.get('format') != AGGREGATES_FORMAT:
+        raise ValueError(f"{path} has an unknown format, run: python history_aggregates.py rebuild")
+    groups = {group: {key: tuple(value) for key, value in data['groups'].get(group, {}).items()} for group in GROUPS}
+    return groups, data['generation']
+
+
+def _write(groups, path):
+    """Replace the snapshot, starting a new empty journal - returns the journal generation"""
+    # A new generation per snapshot, so a journal left over from an older one is never replayed
+    generation = time.time_ns()
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as handle:
+        # dumps uses the C encoder, dump streams through the pure-Python one
+        handle.write(json.dumps({'format': AGGREGATES_FORMAT, 'generation': generation, 'groups': groups},
+                                ensure_ascii=False))
+    # No fsync - unlike the history itself, the store can always be rebuilt
+    os.replace(tmp_path, path)
+    # Older journals are folded into this snapshot
+    folder, name = os.path.split(path)
+    current = os.path.basename(journal_path(path, generation))
+    for other in os.listdir(folder or '.'):
+        if other.startswith(name + '.') and other.endswith(JOURNAL_SUFFIX) and other != current:
+            os.remove(os.path.join(folder, other))
+    return generation
+
+
+def _current(path):
+    """Store contents - the snapshot, re-read only when rewritten, plus journal rows not applied yet"""
+    mtime = os.stat(path).st_mtime_ns if os.path.exists(path) else None
+    if _state['groups'] is None or _state['mtime'] != mtime:
+        groups, generation = _read(path)
+        _state.update(groups=groups, mtime=mtime, generation=generation, offset=0, journal_rows=0)
+    if _state['generation'] is None:
+        return _state['groups']
+    journal = journal_path(path, _state['generation'])
+    size = os.path.getsize(journal) if os.path.exists(journal) else 0
+    if size > _state['offset']:
+        with open(journal, 'rb') as handle:
+            handle.seek(_state['offset'])
+            data = handle.read(size - _state['offset'])
+        # A line another process is still appending is picked up on a later call
+        data = data[:data.rfind(b'\n') + 1]
+        for line in data.splitlines():
+            _apply(_state['groups'], dict(zip(AGGREGATE_COLUMNS, json.loads(line))))
+            _state['journal_rows'] += 1
+        _state['offset'] += len(data)
+    return _state['groups']
+
+
+def apply_rows(rows, path=AGGREGATES_FILE):
+    """Add rows just written to history to the running aggregates - O(1) per row
+
+    The rows are appended to the journal; every COMPACT_ROWS rows the snapshot is rewritten.
+    """
+    if not os.path.exists(path):
+        # First save with aggregates enabled - start from the history, which already has these rows
+        rebuild_aggregates(path)
+        return
+    with history_lock(path), _state_lock:
+        groups = _current(path)
+        journal = journal_path(path, _state['generation'])
+        if os.path.exists(journal) and os.path.getsize(journal) != _state['offset']:
+            # Half a line from a writer that died mid-append - it never counted
+            os.truncate(journal, _state['offset'])
+        data = ''.join(_journal_line(row) for row in rows).encode('utf-8')
+        with open(journal, 'ab') as handle:
+            handle.write(data)
+        for row in rows:
+            _apply(groups, row)
+        _state['offset'] += len(data)
+        _state['journal_rows'] += len(rows)
+        if _state['journal_rows'] >= COMPACT_ROWS:
+            _compact(groups, path)
+
+
+def _compact(groups, path):
+    generation = _write(groups, path)
+    _state.update(mtime=os.stat(path).st_mtime_ns, generation=generation, offset=0, journal_rows=0)
+
+
+def get_aggregates(group, path=AGGREGATES_FILE):
+    """{key: Aggregate} for 'equipment', 'scenario' (see scenario_key) or 'staff'"""
+    with _state_lock:
+        groups = _current(path)
+        return {key: Aggregate(*value) for key, value in groups[group].items()}
+
+
+def compute_aggregates(df):
+    """Aggregates from a history DataFrame with vectorized groupbys - the recovery path"""
+    minutes = df["Duration (min)"].astype('float64').fillna(0.0)
+    resolved = (df["Status"] == "Resolved").astype('int64')
+    df = df.assign(**{column: df[column].fillna('').astype(str)
+                      for column in ("Staff ID", "Equipment", "Failure Scenario")})
+    frame = df.assign(
+        _scenario=df["Equipment"] + "\t" + df["Failure Scenario"],
+        _minutes=minutes,
+        _resolved=resolved,
+        _failed=1 - resolved,
+        _stop=df["Stop Time"].fillna('').astype(str)
+    )
+    groups = {}
+    for group, column in (('equipment', "Equipment"), ('scenario', "_scenario"), ('staff', "Staff ID")):
+        summary = frame.groupby(column, sort=False).agg(
+            count=("_minutes", "size"), total=("_minutes", "sum"), resolved=("_resolved", "sum"),
+            failed=("_failed", "sum"), last=("_stop", "max"))
+        groups[group] = {key: (int(row.count), float(row.total), int(row.resolved), int(row.failed), row.last)
+                         for key, row in zip(summary.index, summary.itertuples(index=False))}
+    return groups
+
+
+def rebuild_aggregates(path=AGGREGATES_FILE):
+    """Recompute the store from the whole history, for recovery - returns rows read"""
+    # history_store calls apply_rows on every save, so the history is only read through it here
+    from history_store import query_history
+    df = query_history(columns=AGGREGATE_COLUMNS)
+    groups = compute_aggregates(df)
+    with history_lock(path), _state_lock:
+        _state['groups'] = groups
+        _compact(groups, path)
+    return len(df)
+
+
+def compare_aggregates(left, right):
+    """Differences between two stores as readable lines - empty when they match"""
+    problems = []
+    for group in GROUPS:
+        for key in sorted(set(left[group]) | set(right[group])):
+            a, b = left[group].get(key), right[group].get(key)
+            if a is None or b is None:
+                problems.append(f"{group} {key!r}: only in {'rebuilt' if a is None else 'stored'}")
+            elif (a[0], a[2], a[3], a[4]) != (b[0], b[2], b[3], b[4]) or not math.isclose(a[1], b[1], rel_tol=1e-9, abs_tol=1e-6):
+                problems.append(f"{group} {key!r}: stored {a} rebuilt {b}")
+    return problems
+
+
+def verify_aggregates(path=AGGREGATES_FILE):
+    """Compare the incrementally maintained store with a rebuild from history"""
+    from history_store import query_history
+    with _state_lock:
+        stored = _current(path)
+    return compare_aggregates(stored, compute_aggregates(query_history(columns=AGGREGATE_COLUMNS)))
+
+
+if __name__ == "__main__":
+    # Usage: python history_aggregates.py rebuild | verify | show [equipment|scenario|staff]
+    command = sys.argv[1] if len(sys.argv) > 1 else 'show'
+    if command == 'rebuild':
+        print(f"Rebuilt aggregates from {rebuild_aggregates()} history rows")
+    elif command == 'verify':
+        problems = verify_aggregates()
+        for problem in problems:
+            print(problem)
+        print("Aggregates match history" if not problems else f"{len(problems)} aggregates differ from history")
+        sys.exit(1 if problems else 0)
+    elif command == 'show':
+        group = sys.argv[2] if len(sys.argv) > 2 else 'equipment'
+        for key, aggregate in sorted(get_aggregates(group).items()):
+            print(f"{key.replace(chr(9), ' / '):<60} {aggregate.count:>6} scenarios  {aggregate.mean_minutes:6.2f} min  "
+                  f"{aggregate.resolved:>6} resolved  {aggregate.failed:>6} failed  last {aggregate.last_occurrence}")
+    else:
+        print("Usage: python history_aggregates.py rebuild | verify | show [equipment|scenario|staff]")
+        sys.exit(1)
@@ -0,0 +1,85 @@
+import threading
+from typing import NamedTuple
+
+import pandas as pd
+
+from history_archive import row_months
+from history_store import history_version, query_history
+
+PERCENTILES = (0.5, 0.9)
+# Everything but the guideline text
+ANALYTICS_COLUMNS = ("Staff ID", "Start Time", "Stop Time", "Equipment", "Failure Scenario", "Status", "Duration (min)")
+
+# Aggregates for the latest history version only - older versions are never asked for again
+_analytics_cache = {}
+_analytics_lock = threading.Lock()
+
+
+class HistoryAnalytics(NamedTuple):
+    version: object
+    totals: dict
+    by_equipment: pd.DataFrame
+    by_scenario: pd.DataFrame
+    by_staff: pd.DataFrame
+    staff_monthly: pd.DataFrame
+
+
+def typed_history(df):
+    """History with categorical keys and resolution time in minutes, ready for groupby"""
+    return pd.DataFrame({
+        "staff_id": df["Staff ID"].astype('category'),
+        "equipment": df["Equipment"].astype('category'),
+        "failure_scenario": df["Failure Scenario"].astype('category'),
+        "resolved": (df["Status"] == "Resolved").to_numpy(),
+        # 'YYYY-MM' straight from the timestamp text - no per-row datetime parsing
+        "month": row_months(df).astype('category'),
+        "minutes": pd.to_numeric(df["Duration (min)"], errors='coerce').astype('float64')
+    })
+
+
+def _summary(typed, keys):
+    """Scenario count, mean and percentile resolution time and Resolved rate per group"""
+    grouped = typed.groupby(keys, observed=True, sort=True)
+    summary = grouped.agg(scenarios=("minutes", "size"), mean_min=("minutes", "mean"),
+                          resolved_rate=("resolved", "mean"))
+    percentiles = grouped["minutes"].quantile(list(PERCENTILES)).unstack()
+    percentiles.columns = [f"p{int(p * 100)}_min" for p in PERCENTILES]
+    summary = summary.join(percentiles)
+    summary["failed"] = summary["scenarios"] - (summary["resolved_rate"] * summary["scenarios"]).round().astype('int64')
+    return summary
+
+
+def compute_analytics(df, version=None):
+    typed = typed_history(df)
+    totals = {
+        # A drill saves one row per scenario, all with the drill's Staff ID and Stop Time
+        "drills": len(df[["Staff ID", "Stop Time"]].drop_duplicates()),
+        "scenarios": len(typed),
+        "resolved_rate": float(typed["resolved"].mean()) if len(typed) else 0.0,
+        "mean_min": float(typed["minutes"].mean()) if len(typed) else 0.0,
+        "p90_min": float(typed["minutes"].quantile(0.9)) if len(typed) else 0.0
+    }
+    return HistoryAnalytics(
+        version=version,
+        totals=totals,
+        by_equipment=_summary(typed, ["equipment"]),
+        by_scenario=_summary(typed, ["equipment", "failure_scenario"]),
+        by_staff=_summary(typed, ["staff_id"]),
+        staff_monthly=_summary(typed, ["staff_id", "month"])
+    )
+
+
+def get_analytics():
+    """Aggregates over the whole history, recomputed only when the history version changes"""
+    version = history_version()
+    cached = _analytics_cache.get('latest')
+    if cached is not None and cached.version == version:
+        return cached
+
+    with _analytics_lock:
+        cached = _analytics_cache.get('latest')
+        if cached is not None and cached.version == version:
+            return cached
+        analytics = compute_analytics(query_history(columns=ANALYTICS_COLUMNS), version)
+        _analytics_cache['latest'] = analytics
+        return analytics
@@ -0,0 +1,202 @@
+import hashlib
+import json
+import os
+import sys
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+ARCHIVE_DIR = "history_archive"
+PARTITION_PREFIX = "history-"
+PARTITION_SUFFIX = ".parquet"
+COMPRESSION = 'zstd'
+# Partition metadata key listing the rollover batches merged into it
+BATCHES_KEY = b'tgs_batches'
+# Smallest archive row group - smaller ones compress worse, larger ones hold more staff members
+ROW_GROUP_ROWS = 5000
+
+TEXT_COLUMNS = (
+    "Staff ID",
+    "Start Time",
+    "Stop Time",
+    "Equipment",
+    "Failure Scenario",
+    "Status",
+    "Scenario ID",
+    "Catalog Version"
+)
+# Columns of a stored history row - the guideline text lives in history_catalog.py, referenced by ID
+STORED_COLUMNS = TEXT_COLUMNS + ("Duration (min)",)
+# Column types shared by the partitions and the hot CSV so frames concatenate cleanly
+HISTORY_DTYPES = {**{column: 'str' for column in TEXT_COLUMNS}, "Duration (min)": 'float64'}
+ARCHIVE_SCHEMA = pa.schema([(column, pa.string()) for column in TEXT_COLUMNS] + [("Duration (min)", pa.float64())])
+
+
+def empty_history(columns=None):
+    return pd.DataFrame({column: pd.Series(dtype=dtype) for column, dtype in HISTORY_DTYPES.items()
+                         if not columns or column in columns})
+
+
+def partition_path(month, archive_dir=ARCHIVE_DIR):
+    return os.path.join(archive_dir, f"{PARTITION_PREFIX}{month}{PARTITION_SUFFIX}")
+
+
+def list_partitions(archive_dir=ARCHIVE_DIR):
+    """(month, path) of every partition, oldest first"""
+    if not os.path.isdir(archive_dir):
+        return []
+    partitions = []
+    for name in os.listdir(archive_dir):
+        if name.startswith(PARTITION_PREFIX) and name.endswith(PARTITION_SUFFIX):
+            month = name[len(PARTITION_PREFIX):-len(PARTITION_SUFFIX)]
+            partitions.append((month, os.path.join(archive_dir, name)))
+    return sorted(partitions)
+
+
+def archive_version(archive_dir=ARCHIVE_DIR):
+    """Changes whenever a partition is written"""
+    return tuple((month, os.stat(path).st_mtime_ns) for month, path in list_partitions(archive_dir))
+
+
+def month_bounds(month):
+    """First instant of month and of the month after, as Start Time strings"""
+    year, number = int(month[:4]), int(month[5:7])
+    following = f"{year + 1}-01" if number == 12 else f"{year}-{number + 1:02d}"
+    return f"{month}-01 00:00:00", f"{following}-01 00:00:00"
+
+
+def row_months(df):
+    """'YYYY-MM' of each row's Start Time, falling back to Stop Time for legacy rows"""
+    start = df["Start Time"].fillna('').astype(str).str[:7]
+    stop = df["Stop Time"].fillna('').astype(str).str[:7]
+    return start.where(start.str.len() == 7, stop)
+
+
+def filter_history(df, start=None, end=None, staff_id=None, equipment=None, status=None):
+    """Rows of df matching the query - start/end bound Start Time as 'YYYY-MM-DD HH:MM:SS' strings"""
+    mask = pd.Series(True, index=df.index)
+    for column, value in (("Staff ID", staff_id), ("Equipment", equipment), ("Status", status)):
+        if value is not None:
+            mask &= df[column] == value
+    if start is not None:
+        mask &= df["Start Time"] >= start
+    if end is not None:
+        mask &= df["Start Time"] < end
+    return df[mask]
+
+
+def _to_table(df):
+    return pa.Table.from_pandas(df.reset_index(drop=True), schema=ARCHIVE_SCHEMA, preserve_index=False)
+
+
+def batch_id(rows):
+    """Identity of a batch of rows moved by one rollover - the same rows give the same ID"""
+    return hashlib.sha256(pd.util.hash_pandas_object(rows, index=False).to_numpy().tobytes()).hexdigest()[:16]
+
+
+def partition_batches(path):
+    """Rollover batches already merged into a partition"""
+    metadata = pq.read_schema(path).metadata or {}
+    return json.loads(metadata.get(BATCHES_KEY, b'[]'))
+
+
+def write_partition(df, path, batches=()):
+    """Replace one partition atomically, recording the rollover batches it holds
+
+    Rows are sorted by Staff ID, keeping saved order within a staff member, and row groups only
+    end between staff members, so a per-staff read skips the row groups of everyone else on
+    their Staff ID statistics.
+    """
+    table = _to_table(df.sort_values("Staff ID", kind='stable'))
+    staff = table.column("Staff ID").to_pandas()
+    boundaries = staff.index[staff.ne(staff.shift())].tolist()[1:] + [len(staff)]
+    tmp_path = path + '.tmp'
+    schema = ARCHIVE_SCHEMA.with_metadata({BATCHES_KEY: json.dumps(list(batches)).encode('utf-8')})
+    with pq.ParquetWriter(tmp_path, schema, compression=COMPRESSION) as writer:
+        group_start = 0
+        for boundary in boundaries:
+            if boundary - group_start >= ROW_GROUP_ROWS or (boundary == len(staff) and boundary > group_start):
+                writer.write_table(table.slice(group_start, boundary - group_start))
+                group_start = boundary
+    os.replace(tmp_path, path)
+
+
+def _staff_row_groups(parquet, staff_id):
+    """Row groups of a partition whose Staff ID statistics can hold staff_id - all of them when unknown"""
+    column = parquet.schema_arrow.get_field_index("Staff ID")
+    groups = []
+    for group in range(parquet.metadata.num_row_groups):
+        stats = parquet.metadata.row_group(group).column(column).statistics
+        if stats is None or not stats.has_min_max or stats.min <= staff_id <= stats.max:
+            groups.append(group)
+    return groups
+
+
+def write_partitions(df, months, archive_dir=ARCHIVE_DIR):
+    """Merge rows into their monthly partitions, each replaced atomically
+
+    Rows are appended as they are - identical completions are all kept. A rollover interrupted after
+    a partition was written moves the same rows again, so a batch already merged is skipped.
+    """
+    os.makedirs(archive_dir, exist_ok=True)
+    for month, rows in df.groupby(months, sort=True):
+        path = partition_path(month, archive_dir)
+        batch = batch_id(rows)
+        batches = []
+        if os.path.exists(path):
+            batches = partition_batches(path)
+            if batch in batches:
+                continue
+            rows = pd.concat([pq.read_table(path).to_pandas(), rows], ignore_index=True)
+        write_partition(rows, path, batches + [batch])
+
+
+def iter_partition_batches(start=None, end=None, staff_id=None, equipment=None, status=None, columns=None,
+                           batch_rows=50000, archive_dir=ARCHIVE_DIR):
+    """Archived rows matching the query, oldest partition first, at most batch_rows per frame"""
+    for month, path in list_partitions(archive_dir):
+        month_start, month_end = month_bounds(month)
+        if (start is not None and month_end <= start) or (end is not None and month_start >= end):
+            continue
+        parquet = pq.ParquetFile(path)
+        row_groups = _staff_row_groups(parquet, staff_id) if staff_id is not None else None
+        if row_groups == []:
+            continue
+        for batch in parquet.iter_batches(batch_size=batch_rows, row_groups=row_groups,
+                                          columns=list(columns) if columns else None):
+            df = filter_history(batch.to_pandas(), start, end, staff_id, equipment, status)
+            if not df.empty:
+                yield df
+
+
+def read_partitions(start=None, end=None, staff_id=None, equipment=None, status=None, columns=None,
+                    archive_dir=ARCHIVE_DIR):
+    """Archived rows matching the query, reading only partitions that overlap [start, end)
+
+    columns limits the columns read - the guideline text is most of each row. With staff_id only
+    that staff member's row groups are read.
+    """
+    filters = [(column, '==', value) for column, value in
+               (("Staff ID", staff_id), ("Equipment", equipment), ("Status", status)) if value is not None]
+    frames = []
+    for month, path in list_partitions(archive_dir):
+        month_start, month_end = month_bounds(month)
+        if (start is not None and month_end <= start) or (end is not None and month_start >= end):
+            continue
+        df = pq.read_table(path, columns=list(columns) if columns else None, filters=filters or None).to_pandas()
+        frames.append(filter_history(df, start, end))
+    if not frames:
+        return empty_history(columns)
+    return pd.concat(frames, ignore_index=True)
+
+
+if __name__ == "__main__":
+    # Usage: python history_archive.py rollover
+    #        python history_archive.py list
+    from history_store import archive_history
+    command = sys.argv[1] if len(sys.argv) > 1 else 'list'
+    if command == 'rollover':
+        print(f"Archived {archive_history()} rows")
+    for month, path in list_partitions():
+        print(f"{month}  {pq.ParquetFile(path).metadata.num_rows:>9} rows  {os.path.getsize(path) / 1e6:8.2f} MB  {path}")
@@ -0,0 +1,150 @@
+import csv
+import hashlib
+import io
+import os
+import sys
+import threading
+
+import pandas as pd
+
+from history_archive import HISTORY_DTYPES, STORED_COLUMNS
+from history_lock import history_lock
+from mor_catalog import fix_mojibake, make_scenario_id
+
+CATALOG_TEXT_FILE = "tgs_history_catalog.csv"
+KEY_COLUMNS = ("Catalog Version", "Scenario ID")
+# Text every history row used to copy from the catalog - now stored once per catalog version
+GUIDELINE_COLUMNS = ("Guideline for Chief Controller", "Local Response")
+CATALOG_TEXT_COLUMNS = KEY_COLUMNS + GUIDELINE_COLUMNS
+# Workbook checksums are cut to this many hex digits in every history row
+VERSION_LENGTH = 12
+# Version of text recovered from rows saved before the text table existed
+LEGACY_PREFIX = 'legacy-'
+
+# In-memory copy of the table and the (inode, size) it was read at
+_state = {'stat': None, 'texts': None, 'frame': None}
+_state_lock = threading.Lock()
+
+
+def catalog_version(catalog):
+    """Short version of a loaded MorCatalog, as stored in history rows"""
+    return (catalog.version or 'unknown')[:VERSION_LENGTH]
+
+
+def _cell(value):
+    return None if value is None or value != value else value
+
+
+def _stat(path):
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_ino, stat.st_size)
+
+
+def _current(path):
+    """Table contents, re-read only when it has grown or been replaced"""
+    stat = _stat(path)
+    if _state['texts'] is None or _state['stat'] != stat:
+        if stat is None:
+            frame = pd.DataFrame({column: pd.Series(dtype='str') for column in CATALOG_TEXT_COLUMNS})
+        else:
+            frame = pd.read_csv(path, dtype='str')
+        _state['frame'] = frame
+        _state['texts'] = {(version, scenario_id): (guideline, local_response)
+                           for version, scenario_id, guideline, local_response
+                           in frame.itertuples(index=False, name=None)}
+        _state['stat'] = stat
+    return _state['texts'], _state['frame']
+
+
+def store_text(rows, path=CATALOG_TEXT_FILE):
+    """Add the text of rows whose (Catalog Version, Scenario ID) is not stored yet, returns entries added
+
+    Rows are dicts with CATALOG_TEXT_COLUMNS keys. Called before the rows themselves are written,
+    so every stored row can be joined back to its text.
+    """
+    with _state_lock:
+        known = _current(path)[0]
+    missing = {}
+    for row in rows:
+        key = (row["Catalog Version"], row["Scenario ID"])
+        if key not in known and key not in missing:
+            missing[key] = tuple(_cell(row.get(column)) for column in GUIDELINE_COLUMNS)
+    if not missing:
+        return 0
+
+    with history_lock(path), _state_lock:
+        # Another console may have stored some of them meanwhile
+        known = _current(path)[0]
+        missing = {key: text for key, text in missing.items() if key not in known}
+        if missing:
+            buffer = io.StringIO()
+            writer = csv.writer(buffer, lineterminator='\n')
+            if _stat(path) is None:
+                writer.writerow(CATALOG_TEXT_COLUMNS)
+            writer.writerows(key + text for key, text in missing.items())
+            with open(path, 'ab') as handle:
+                handle.write(buffer.getvalue().encode('utf-8'))
+                handle.flush()
+                # Rows are useless without their text - fsync like the history itself
+                os.fsync(handle.fileno())
+    return len(missing)
+
+
+def expand_history(df, path=CATALOG_TEXT_FILE):
+    """Stored history rows with the guideline text joined back in by catalog version and scenario ID"""
+    with _state_lock:
+        frame = _current(path)[1]
+    return df.merge(frame, how='left', on=list(KEY_COLUMNS))
+
+
+def legacy_to_stored(df):
+    """Key rows that carry their own guideline text, returns (rows without the text, text entries)
+
+    Text is repaired with fix_mojibake, like the workbook text, then versioned by its own hash.
+    """
+    source = ["Equipment", "Failure Scenario", *GUIDELINE_COLUMNS]
+    # Older consoles saved the workbook text before it was repaired on load
+    df = df.assign(**{column: df[column].map(fix_mojibake) for column in source})
+    unique = df[source].drop_duplicates().reset_index(drop=True)
+    scenario_ids = []
+    versions = []
+    for equipment, failure_scenario, guideline, local_response in unique.itertuples(index=False, name=None):
+        scenario_ids.append(make_scenario_id(_cell(equipment), _cell(failure_scenario)))
+        text = f"{_cell(guideline)}\x1f{_cell(local_response)}"
+        versions.append(LEGACY_PREFIX + hashlib.sha1(text.encode('utf-8')).hexdigest()[:VERSION_LENGTH])
+    unique["Scenario ID"] = pd.Series(scenario_ids, dtype='str')
+    unique["Catalog Version"] = pd.Series(versions, dtype='str')
+    stored = df.drop(columns=[column for column in KEY_COLUMNS if column in df]).merge(unique, how='left', on=source)
+    texts = unique[list(CATALOG_TEXT_COLUMNS)].to_dict('records')
+    return stored.drop(columns=list(GUIDELINE_COLUMNS)), texts
+
+
+def stored_rows(df):
+    """Legacy rows converted to STORED_COLUMNS, their text added to the catalog text table"""
+    stored, texts = legacy_to_stored(df)
+    store_text(texts)
+    stored["Duration (min)"] = pd.to_numeric(stored["Duration (min)"], errors='coerce')
+    return stored.reindex(columns=list(STORED_COLUMNS)).astype(HISTORY_DTYPES)
+
+
+def is_legacy(columns):
+    return GUIDELINE_COLUMNS[0] in columns
+
+
+if __name__ == "__main__":
+    # Usage: python history_catalog.py show - converting older history is python history_store.py migrate
+    command = sys.argv[1] if len(sys.argv) > 1 else 'show'
+    if command == 'show':
+        counts = {}
+        for version, _ in _current(CATALOG_TEXT_FILE)[0]:
+            # Legacy text gets a version per distinct guideline - list it as one group
+            label = 'legacy' if version.startswith(LEGACY_PREFIX) else version
+            counts[label] = counts.get(label, 0) + 1
+        for label, count in sorted(counts.items()):
+            print(f"{label:<20} {count:>6} scenarios")
+    else:
+        print("Usage: python history_catalog.py show")
+        sys.exit(1)
@@ -0,0 +1,235 @@
+import itertools
+import os
+import sqlite3
+import sys
+import threading
+
+import pandas as pd
+
+from history_archive import ARCHIVE_DIR, iter_partition_batches
+from history_catalog import is_legacy, stored_rows
+
+HISTORY_DB = "tgs_resolution_history.db"
+IMPORT_CHUNK_ROWS = 50000
+
+# Stored history column -> SQLite column - the guideline text lives in history_catalog.py
+DB_COLUMNS = (
+    ("Staff ID", "staff_id"),
+    ("Start Time", "start_time"),
+    ("Stop Time", "stop_time"),
+    ("Equipment", "equipment"),
+    ("Failure Scenario", "failure_scenario"),
+    ("Status", "status"),
+    ("Scenario ID", "scenario_id"),
+    ("Catalog Version", "catalog_version"),
+    ("Duration (min)", "duration_min")
+)
+
+TABLE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS history (
+    id INTEGER PRIMARY KEY,
+    staff_id TEXT NOT NULL,
+    start_time TEXT,
+    stop_time TEXT,
+    equipment TEXT,
+    failure_scenario TEXT,
+    status TEXT,
+    scenario_id TEXT,
+    catalog_version TEXT,
+    duration_min REAL
+);
+"""
+INDEX_SCHEMA = """
+CREATE INDEX IF NOT EXISTS history_staff ON history (staff_id, start_time);
+CREATE INDEX IF NOT EXISTS history_start ON history (start_time);
+CREATE INDEX IF NOT EXISTS history_equipment ON history (equipment, start_time);
+CREATE INDEX IF NOT EXISTS history_status ON history (status, start_time);
+"""
+SCHEMA = TABLE_SCHEMA + INDEX_SCHEMA
+# Columns of databases created before the guideline text moved out of the rows
+LEGACY_DB_COLUMNS = DB_COLUMNS[:6] + (
+    ("Guideline for Chief Controller", "guideline"),
+    ("Local Response", "local_response"),
+    ("Duration (min)", "duration_min")
+)
+
+_INSERT_SQL = "INSERT INTO history ({}) VALUES ({})".format(
+    ", ".join(column for _, column in DB_COLUMNS),
+    ", ".join("?" for _ in DB_COLUMNS)
+)
+_SELECT_SQL = "SELECT {} FROM history".format(
+    ", ".join(f'{column} AS "{name}"' for name, column in DB_COLUMNS)
+)
+
+# sqlite3 connections must stay on the thread that opened them
+_local = threading.local()
+
+
+def connect(path=HISTORY_DB):
+    """Per-thread connection to the history database, created with its schema on first use"""
+    connections = getattr(_local, 'connections', None)
+    if connections is None:
+        connections = _local.connections = {}
+    connection = connections.get(path)
+    if connection is None:
+        connection = sqlite3.connect(path, timeout=30)
+        # WAL lets readers run while another console writes; FULL keeps each commit fsynced
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=FULL")
+        connection.executescript(SCHEMA)
+        connections[path] = connection
+    return connection
+
+
+def _row_values(row):
+    return tuple(row.get(name) for name, _ in DB_COLUMNS)
+
+
+def insert_rows(rows, path=HISTORY_DB):
+    """Insert the rows of one completion in a single transaction"""
+    if not rows:
+        return
+    connection = connect(path)
+    with connection:
+        connection.executemany(_INSERT_SQL, [_row_values(row) for row in rows])
+
+
+def _query_sql(staff_id, equipment, status, start, end):
+    clauses = []
+    params = []
+    for column, value in (("staff_id", staff_id), ("equipment", equipment), ("status", status)):
+        if value is not None:
+            clauses.append(f"{column} = ?")
+            params.append(value)
+    if start is not None:
+        clauses.append("start_time >= ?")
+        params.append(start)
+    if end is not None:
+        clauses.append("start_time < ?")
+        params.append(end)
+
+    sql = _SELECT_SQL
+    if clauses:
+        sql += " WHERE " + " AND ".join(clauses)
+    return sql + " ORDER BY id", params
+
+
+def query_history(staff_id=None, equipment=None, status=None, start=None, end=None, path=HISTORY_DB):
+    """History rows as a DataFrame - start/end bound Start Time as 'YYYY-MM-DD HH:MM:SS' strings"""
+    sql, params = _query_sql(staff_id, equipment, status, start, end)
+    return pd.read_sql_query(sql, connect(path), params=params)
+
+
+def iter_history(staff_id=None, equipment=None, status=None, start=None, end=None, chunk_rows=50000, path=HISTORY_DB):
+    """Same rows as query_history, as DataFrames of at most chunk_rows"""
+    sql, params = _query_sql(staff_id, equipment, status, start, end)
+    yield from pd.read_sql_query(sql, connect(path), params=params, chunksize=chunk_rows)
+
+
+def history_version(path=HISTORY_DB):
+    """Changes whenever a row is added - ids only grow"""
+    return connect(path).execute("SELECT max(id) FROM history").fetchone()[0]
+
+
+def has_rows(path=HISTORY_DB):
+    if not os.path.exists(path):
+        return False
+    return connect(path).execute("SELECT 1 FROM history LIMIT 1").fetchone() is not None
+
+
+def import_csv(csv_path, path=HISTORY_DB, archive_dir=ARCHIVE_DIR):
+    """One-shot import of the history into an empty database, returns rows imported
+
+    Archived months come first, oldest partition first, then the current month's CSV,
+    so ids follow the months the rows were saved in.
+    """
+    connection = connect(path)
+    if connection.execute("SELECT 1 FROM history LIMIT 1").fetchone() is not None:
+        raise ValueError(f"{path} already has history rows, refusing to import twice")
+
+    names = [name for name, _ in DB_COLUMNS]
+    chunks = iter_partition_batches(batch_rows=IMPORT_CHUNK_ROWS, archive_dir=archive_dir)
+    if os.path.exists(csv_path):
+        chunks = itertools.chain(chunks, pd.read_csv(csv_path, chunksize=IMPORT_CHUNK_ROWS, dtype=str))
+    imported = 0
+    with connection:
+        for chunk in chunks:
+            if is_legacy(chunk.columns):
+                chunk = stored_rows(chunk)
+            chunk = chunk.reindex(columns=names)
+            chunk["Duration (min)"] = pd.to_numeric(chunk["Duration (min)"], errors='coerce')
+            chunk = chunk.astype(object).where(chunk.notna(), None)
+            connection.executemany(_INSERT_SQL, chunk.itertuples(index=False, name=None))
+            imported += len(chunk)
+    return imported
+
+
+def _table_columns(connection):
+    return [row[1] for row in connection.execute("PRAGMA table_info(history)")]
+
+
+def is_legacy_db(path=HISTORY_DB):
+    """Whether the database still has the guideline/local_response columns - see migrate_legacy"""
+    return os.path.exists(path) and "guideline" in _table_columns(connect(path))
+
+
+def migrate_legacy(path=HISTORY_DB):
+    """Replace the guideline/local_response columns of an older database with catalog references
+
+    The text goes to the catalog text table (history_catalog.stored_rows). The database is
+    copied to <path>.bak first. Returns rows converted.
+    """
+    if not os.path.exists(path):
+        return 0
+    connection = connect(path)
+    columns = _table_columns(connection)
+    if "guideline" not in columns:
+        return 0
+
+    backup_path = path + ".bak"
+    if not os.path.exists(backup_path):
+        backup = sqlite3.connect(backup_path)
+        try:
+            connection.backup(backup)
+        finally:
+            backup.close()
+        print(f"Backed up {path} to {backup_path}", file=sys.stderr)
+
+    legacy_sql = "SELECT id, {} FROM history ORDER BY id".format(
+        ", ".join(f'{column} AS "{name}"' for name, column in LEGACY_DB_COLUMNS))
+    converted = 0
+    with connection:
+        for column in ("scenario_id", "catalog_version"):
+            if column not in columns:
+                connection.execute(f"ALTER TABLE history ADD COLUMN {column} TEXT")
+        for chunk in pd.read_sql_query(legacy_sql, connection, chunksize=IMPORT_CHUNK_ROWS):
+            stored = stored_rows(chunk.drop(columns=["id"]))
+            connection.executemany(
+                "UPDATE history SET scenario_id = ?, catalog_version = ? WHERE id = ?",
+                zip(stored["Scenario ID"], stored["Catalog Version"], chunk["id"].tolist()))
+            converted += len(chunk)
+
+    # Rebuild the table without the text columns - works on SQLite versions without DROP COLUMN
+    kept = ", ".join(["id"] + [column for _, column in DB_COLUMNS])
+    connection.executescript(f"""
+        BEGIN;
+        ALTER TABLE history RENAME TO history_legacy;
+        {TABLE_SCHEMA}
+        INSERT INTO history ({kept}) SELECT {kept} FROM history_legacy;
+        DROP TABLE history_legacy;
+        {INDEX_SCHEMA}
+        COMMIT;
+    """)
+    connection.execute("VACUUM")
+    return converted
+
+
+if __name__ == "__main__":
+    # Usage: python history_db.py import [history.csv] [history.db] - archived months are imported too
+    if len(sys.argv) < 2 or sys.argv[1] != 'import':
+        print("Usage: python history_db.py import [history.csv] [history.db]")
+        sys.exit(1)
+    source = sys.argv[2] if len(sys.argv) > 2 else "tgs_resolution_history.csv"
+    target = sys.argv[3] if len(sys.argv) > 3 else HISTORY_DB
+    count = import_csv(source, target)
+    print(f"Imported {count} rows from {ARCHIVE_DIR} and {source} into {target}")
@@ -0,0 +1,123 @@
+import argparse
+import datetime
+import os
+
+import openpyxl
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from history_archive import COMPRESSION
+from history_store import HISTORY_COLUMNS, HISTORY_CHUNK_ROWS, iter_history_chunks
+
+EXPORT_FORMATS = ('parquet', 'jsonl', 'xlsx')
+EXPORT_DIR = "exports"
+EXPORT_SCHEMA = pa.schema([(column, pa.float64() if column == "Duration (min)" else pa.string())
+                           for column in HISTORY_COLUMNS])
+
+
+def _records(chunk):
+    """Rows of a chunk as plain tuples, missing values as None"""
+    for row in chunk[list(HISTORY_COLUMNS)].itertuples(index=False, name=None):
+        yield tuple(None if value != value else value for value in row)
+
+
+class ParquetExport:
+    def __init__(self, path):
+        self.writer = pq.ParquetWriter(path, EXPORT_SCHEMA, compression=COMPRESSION)
+
+    def write(self, chunk):
+        self.writer.write_table(pa.Table.from_pandas(chunk[list(HISTORY_COLUMNS)].reset_index(drop=True),
+                                                     schema=EXPORT_SCHEMA, preserve_index=False))
+
+    def close(self):
+        self.writer.close()
+
+
+class JsonlExport:
+    def __init__(self, path):
+        self.handle = open(path, 'w', encoding='utf-8', newline='\n')
+
+    def write(self, chunk):
+        # One C-encoded string per chunk, missing values as null
+        self.handle.write(chunk[list(HISTORY_COLUMNS)].to_json(orient='records', lines=True, force_ascii=False))
+
+    def close(self):
+        self.handle.close()
+
+
+class XlsxExport:
+    def __init__(self, path):
+        self.path = path
+        # Write-only mode streams rows to disk instead of building the sheet in memory
+        self.workbook = openpyxl.Workbook(write_only=True)
+        self.sheet = self.workbook.create_sheet("History")
+        self.sheet.append(list(HISTORY_COLUMNS))
+
+    def write(self, chunk):
+        for record in _records(chunk):
+            self.sheet.append(record)
+
+    def close(self):
+        self.workbook.save(self.path)
+
+
+EXPORTERS = {'parquet': ParquetExport, 'jsonl': JsonlExport, 'xlsx': XlsxExport}
+
+
+def export_format(path):
+    extension = os.path.splitext(path)[1].lower().lstrip('.')
+    if extension not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format '{extension}' - use one of: {', '.join(EXPORT_FORMATS)}")
+    return extension
+
+
+def day_bounds(first_day=None, last_day=None):
+    """Start Time bounds covering first_day through last_day inclusive"""
+    start = f"{first_day:%Y-%m-%d} 00:00:00" if first_day else None
+    end = f"{last_day + datetime.timedelta(days=1):%Y-%m-%d} 00:00:00" if last_day else None
+    return start, end
+
+
+def export_history(path, first_day=None, last_day=None, staff_id=None, equipment=None, chunk_rows=HISTORY_CHUNK_ROWS):
+    """Stream matching history to path (.parquet, .jsonl or .xlsx) one chunk at a time, returns rows written"""
+    fmt = export_format(path)
+    start, end = day_bounds(first_day, last_day)
+    # Readers never see a half-written export
+    tmp_path = path + '.tmp'
+    exporter = EXPORTERS[fmt](tmp_path)
+    rows = 0
+    try:
+        for chunk in iter_history_chunks(start, end, staff_id, equipment, chunk_rows=chunk_rows):
+            exporter.write(chunk)
+            rows += len(chunk)
+        exporter.close()
+    except BaseException:
+        exporter.close()
+        os.remove(tmp_path)
+        raise
+    os.replace(tmp_path, path)
+    return rows
+
+
+def export_file_name(fmt, first_day=None, last_day=None, staff_id=None, equipment=None):
+    parts = ["TGS_History",
+             f"{first_day:%Y%m%d}" if first_day else "start",
+             f"{last_day:%Y%m%d}" if last_day else "now"]
+    parts += [part.replace(' ', '_').replace('/', '-') for part in (staff_id, equipment) if part]
+    return "_".join(parts) + "." + fmt
+
+
+def _parse_day(value):
+    return datetime.datetime.strptime(value, "%Y-%m-%d").date()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export resolution history to Parquet, JSONL or Excel")
+    parser.add_argument("output", help="Output file ending in .parquet, .jsonl or .xlsx")
+    parser.add_argument("--from", dest="first_day", type=_parse_day, help="First day, YYYY-MM-DD")
+    parser.add_argument("--to", dest="last_day", type=_parse_day, help="Last day (inclusive), YYYY-MM-DD")
+    parser.add_argument("--staff", help="Only this Staff ID")
+    parser.add_argument("--equipment", help="Only this equipment")
+    args = parser.parse_args()
+    count = export_history(args.output, args.first_day, args.last_day, args.staff, args.equipment)
+    print(f"Exported {count} rows to {args.output}")
@@ -0,0 +1,178 @@
+import csv
+import io
+import os
+import threading
+from collections import OrderedDict
+
+INDEX_SUFFIX = '.idx'
+SCAN_CHUNK_BYTES = 1 << 20
+DOWNLOAD_CACHE_SIZE = 32
+
+# One index per history file, shared by every session of this process
+_indexes = {}
+_indexes_lock = threading.Lock()
+_download_cache = OrderedDict()
+_download_cache_lock = threading.Lock()
+
+
+def index_path(path):
+    return path + INDEX_SUFFIX
+
+
+def split_records(data, base_offset=0):
+    """(offset, length) of each complete CSV record in data, plus the bytes consumed
+
+    A newline only ends a record outside quotes - the guideline column spans several lines.
+    """
+    spans = []
+    start = 0
+    pos = 0
+    in_quotes = False
+    while True:
+        newline = data.find(b'\n', pos)
+        if newline < 0:
+            break
+        if data.count(b'"', pos, newline) % 2:
+            in_quotes = not in_quotes
+        pos = newline + 1
+        if not in_quotes:
+            spans.append((base_offset + start, pos - start))
+            start = pos
+    return spans, start
+
+
+def record_staff_id(record):
+    """Staff ID (first field) of one encoded CSV record"""
+    if record.startswith(b'"'):
+        return next(csv.reader(io.StringIO(record.decode('utf-8'))))[0]
+    return record.split(b',', 1)[0].decode('utf-8').strip()
+
+
+class StaffIndex:
+    """Byte spans of every history record, grouped by Staff ID, persisted next to the CSV
+
+    Callers hold history_lock.history_lock while refreshing so no append is half-written.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._reset()
+
+    def _reset(self):
+        self.header = None
+        # Bytes of the CSV covered by the index - the file is append-only, so this is its version
+        self.end = 0
+        # Rollover replaces the CSV - a new inode means the old offsets are meaningless
+        self.inode = None
+        self.spans = {}
+        self._index_read = 0
+
+    def _add(self, offset, length, staff_id):
+        if offset == 0:
+            self.header = (offset, length)
+        else:
+            self.spans.setdefault(staff_id, []).append((offset, length))
+        self.end = offset + length
+
+    def _load_index(self):
+        """Pick up entries written since the last refresh, by this or another process"""
+        try:
+            with open(index_path(self.path), 'rb') as handle:
+                handle.seek(self._index_read)
+                data = handle.read()
+        except FileNotFoundError:
+            return True
+        complete = data.rfind(b'\n') + 1
+        for line in data[:complete].splitlines():
+            offset, length, staff_id = line.split(b'\t', 2)
+            offset, length = int(offset), int(length)
+            if offset != self.end:
+                # Index no longer lines up with the CSV
+                return False
+            self._add(offset, length, staff_id.decode('utf-8'))
+        self._index_read += complete
+        return True
+
+    def _scan_tail(self, size):
+        """Index records appended to the CSV that no index entry covers yet"""
+        entries = []
+        with open(self.path, 'rb') as handle:
+            handle.seek(self.end)
+            carry = b''
+            base = self.end
+            while base + len(carry) < size:
+                chunk = handle.read(min(SCAN_CHUNK_BYTES, size - base - len(carry)))
+                if not chunk:
+                    break
+                data = carry + chunk
+                spans, consumed = split_records(data, base)
+                for offset, length in spans:
+                    record = data[offset - base:offset - base + length]
+                    staff_id = '' if offset == 0 else record_staff_id(record)
+                    self._add(offset, length, staff_id)
+                    entries.append(f"{offset}\t{length}\t{staff_id}\n")
+                carry = data[consumed:]
+                base += consumed
+        if entries:
+            with open(index_path(self.path), 'ab') as handle:
+                handle.write(''.join(entries).encode('utf-8'))
+                self._index_read = handle.tell()
+
+    def refresh(self):
+        stat = os.stat(self.path) if os.path.exists(self.path) else None
+        size = stat.st_size if stat else 0
+        if self.inode is not None and (stat is None or stat.st_ino != self.inode):
+            self._reset()
+        if stat is not None:
+            self.inode = stat.st_ino
+        if size < self.end or not self._load_index() or self.end > size:
+            # CSV was truncated or replaced - start the index again
+            self._reset()
+            self.inode = stat.st_ino if stat else None
+            if os.path.exists(index_path(self.path)):
+                os.remove(index_path(self.path))
+        if self.end < size:
+            self._scan_tail(size)
+        return self.end
+
+    def iter_records(self, staff_id):
+        """Stream the header and then every record of one staff member, as stored"""
+        spans = self.spans.get(staff_id)
+        if not spans or self.header is None:
+            return
+        with open(self.path, 'rb') as handle:
+            handle.seek(self.header[0])
+            yield handle.read(self.header[1])
+            # Neighbouring records are read in one go
+            run_start, run_end = spans[0][0], spans[0][0] + spans[0][1]
+            for offset, length in spans[1:]:
+                if offset == run_end:
+                    run_end += length
+                    continue
+                handle.seek(run_start)
+                yield handle.read(run_end - run_start)
+                run_start, run_end = offset, offset + length
+            handle.seek(run_start)
+            yield handle.read(run_end - run_start)
+
+
+def get_staff_index(path):
+    with _indexes_lock:
+        index = _indexes.get(path)
+        if index is None:
+            index = _indexes[path] = StaffIndex(path)
+        return index
+
+
+def cached_download(key, build):
+    """Download payload for key, built once and kept for the most recent downloads"""
+    with _download_cache_lock:
+        if key in _download_cache:
+            _download_cache.move_to_end(key)
+            return _download_cache[key]
+    payload = build()
+    with _download_cache_lock:
+        _download_cache[key] = payload
+        while len(_download_cache) > DOWNLOAD_CACHE_SIZE:
+            _download_cache.popitem(last=False)
+    return payload
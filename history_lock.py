@@ -0,0 +1,37 @@
+import os
+from contextlib import contextmanager
+
+if os.name == 'nt':
+    import msvcrt
+else:
+    import fcntl
+
+
+def lock_path(path):
+    return path + '.lock'
+
+
+@contextmanager
+def history_lock(path):
+    """Exclusive OS-level lock shared by every console writing to the same history file"""
+    # Lock a sidecar file so the history file itself can be opened in any mode
+    with open(lock_path(path), 'a+b') as handle:
+        if os.name == 'nt':
+            handle.seek(0)
+            # LK_LOCK gives up after ~10 s, keep waiting like flock does
+            while True:
+                try:
+                    msvcrt.locking(handle.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    continue
+        else:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if os.name == 'nt':
+                handle.seek(0)
+                msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
@@ -0,0 +1,487 @@
+import atexit
+import csv
+import datetime
+import hashlib
+import io
+import os
+import queue
+import shutil
+import sys
+import threading
+
+import pandas as pd
+import streamlit as st
+
+import pyarrow.parquet as pq
+
+import drill_timer
+import history_aggregates
+import history_archive
+import history_catalog
+import history_db
+from history_archive import (HISTORY_DTYPES, STORED_COLUMNS, empty_history, filter_history, iter_partition_batches,
+                             list_partitions, read_partitions, row_months, write_partition, write_partitions)
+from history_catalog import GUIDELINE_COLUMNS, KEY_COLUMNS, catalog_version, expand_history
+from history_index import cached_download, get_staff_index, index_path
+from history_lock import history_lock
+from mor_catalog import get_catalog
+
+HISTORY_FILE = "tgs_resolution_history.csv"
+# Columns of the CSV download and exports - stored rows reference the guideline text instead
+HISTORY_COLUMNS = (
+    "Staff ID",
+    "Start Time",
+    "Stop Time",
+    "Equipment",
+    "Failure Scenario",
+    "Status",
+    "Guideline for Chief Controller",
+    "Local Response",
+    "Duration (min)"
+)
+# 'csv' (default) or 'sqlite' - see history_db.py
+HISTORY_BACKEND = os.environ.get('TGS_HISTORY_BACKEND', 'csv').lower()
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+# Completions waiting for the writer thread - save_resolution_data blocks only when this is full
+HISTORY_QUEUE_SIZE = 256
+HISTORY_BATCH_SIZE = 64
+# Rows of a failed batch are retried this often even when nothing new is queued
+HISTORY_RETRY_SECONDS = 30
+# Rows per frame when streaming history out
+HISTORY_CHUNK_ROWS = 50000
+# One CSV file per staff member, rewritten chunk by chunk when their history changes
+DOWNLOAD_DIR = "downloads"
+# Month the hot file was last rolled over in, per process
+_archived_month = None
+# Copy of a legacy file kept next to it before migrate_history rewrites it
+BACKUP_SUFFIX = ".bak"
+# Whether the history was found free of rows saved with their own guideline text, per process
+_layout_checked = False
+_layout_lock = threading.Lock()
+# 5-minute rule - completions within this many seconds count as Resolved
+RESOLVE_LIMIT_SECONDS = 300
+
+
+class LegacyHistoryError(RuntimeError):
+    """History still holds rows saved with their own guideline text - see migrate_history"""
+
+
+def encode_rows(rows, header=False):
+    """CSV bytes for rows, written the way pandas writes the history file"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator='\n')
+    if header:
+        writer.writerow(STORED_COLUMNS)
+    for row in rows:
+        writer.writerow([row.get(column) for column in STORED_COLUMNS])
+    return buffer.getvalue().encode('utf-8')
+
+
+def append_history_rows(rows, path=HISTORY_FILE):
+    """Append rows to the history file in one locked, fsynced write - never rewrites the file"""
+    if not rows:
+        return
+    with history_lock(path):
+        with open(path, 'a+b') as handle:
+            size = os.fstat(handle.fileno()).st_size
+            data = encode_rows(rows, header=size == 0)
+            if size:
+                # A file last written by hand may not end in a newline
+                handle.seek(size - 1)
+                if handle.read(1) != b'\n':
+                    data = b'\n' + data
+            handle.write(data)
+            handle.flush()
+            os.fsync(handle.fileno())
+        # Index the new rows while still holding the lock
+        get_staff_index(path).refresh()
+
+
+def read_history(path=HISTORY_FILE, columns=None):
+    """Whole hot history file as a DataFrame, read while no writer is mid-append"""
+    with history_lock(path):
+        if not os.path.exists(path):
+            return empty_history(columns)
+        return pd.read_csv(path, dtype=HISTORY_DTYPES, usecols=list(columns) if columns else None)
+
+
+def archive_history(now=None, path=HISTORY_FILE, archive_dir=history_archive.ARCHIVE_DIR):
+    """Move rows from before the current month out of the hot CSV into monthly partitions"""
+    month = (now or datetime.datetime.now()).strftime('%Y-%m')
+    with history_lock(path):
+        if not os.path.exists(path):
+            return 0
+        df = pd.read_csv(path, dtype=HISTORY_DTYPES)
+        months = row_months(df)
+        old = months < month
+        if not old.any():
+            return 0
+
+        # Partitions first - if we stop before the hot file is replaced the rows are merged again, not lost
+        write_partitions(df[old], months[old], archive_dir)
+        _replace_hot_file(df[~old], path)
+        return int(old.sum())
+
+
+def _replace_hot_file(df, path):
+    """Atomically rewrite the hot file with df - callers hold history_lock"""
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as handle:
+        # to_csv writes missing values as empty fields, like the original rows
+        handle.write(df.to_csv(index=False, lineterminator='\n').encode('utf-8'))
+        handle.flush()
+        os.fsync(handle.fileno())
+    os.replace(tmp_path, path)
+    if os.path.exists(index_path(path)):
+        os.remove(index_path(path))
+    get_staff_index(path).refresh()
+
+
+def _backup(path):
+    """Copy a file about to be rewritten to path + BACKUP_SUFFIX - an existing backup is kept"""
+    backup = path + BACKUP_SUFFIX
+    if not os.path.exists(backup):
+        shutil.copy2(path, backup)
+    return backup
+
+
+def legacy_history(path=HISTORY_FILE, archive_dir=history_archive.ARCHIVE_DIR):
+    """Files still holding rows saved with their own guideline text, empty once migrate_history has run"""
+    if HISTORY_BACKEND == 'sqlite':
+        return [history_db.HISTORY_DB] if history_db.is_legacy_db() else []
+    legacy = [partition for _, partition in list_partitions(archive_dir)
+              if history_catalog.is_legacy(pq.read_schema(partition).names)]
+    if os.path.exists(path):
+        with open(path, encoding='utf-8', newline='') as handle:
+            if history_catalog.is_legacy(next(csv.reader(handle), [])):
+                legacy.append(path)
+    return legacy
+
+
+def migrate_history(path=HISTORY_FILE, archive_dir=history_archive.ARCHIVE_DIR):
+    """Convert rows saved with their own guideline text to catalog references, returns rows converted
+
+    Run once after upgrading, from the Server Load page or python history_store.py migrate.
+    Every file converted is copied to <file>.bak first.
+    """
+    if HISTORY_BACKEND == 'sqlite':
+        return history_db.migrate_legacy()
+    converted = 0
+    with history_lock(path):
+        for month, partition in list_partitions(archive_dir):
+            if history_catalog.is_legacy(pq.read_schema(partition).names):
+                df = history_catalog.stored_rows(pq.read_table(partition).to_pandas())
+                print(f"Backed up {partition} to {_backup(partition)}", file=sys.stderr)
+                write_partition(df, partition, history_archive.partition_batches(partition))
+                converted += len(df)
+        if os.path.exists(path):
+            with open(path, encoding='utf-8', newline='') as handle:
+                header = next(csv.reader(handle), [])
+            if history_catalog.is_legacy(header):
+                df = history_catalog.stored_rows(pd.read_csv(path, dtype='str'))
+                print(f"Backed up {path} to {_backup(path)}", file=sys.stderr)
+                _replace_hot_file(df, path)
+                converted += len(df)
+    return converted
+
+
+def _check_layout():
+    """Refuse to read or write history that migrate_history has not converted yet"""
+    global _layout_checked
+    if _layout_checked:
+        return
+    with _layout_lock:
+        if not _layout_checked:
+            legacy = legacy_history()
+            if legacy:
+                raise LegacyHistoryError(
+                    f"History saved by an older version must be converted first ({', '.join(legacy)}) - "
+                    "use the Server Load page or run: python history_store.py migrate")
+            _layout_checked = True
+
+
+def _sync():
+    """Make queued completions and older history visible to a reader"""
+    history_queue.flush()
+    _check_layout()
+
+
+def _roll_over_if_new_month():
+    global _archived_month
+    month = datetime.datetime.now().strftime('%Y-%m')
+    if _archived_month != month:
+        archive_history()
+        _archived_month = month
+
+
+def store_history_rows(rows):
+    """Write a completion to whichever history backend is configured"""
+    # Raising keeps the rows in the write queue until the history is converted
+    _check_layout()
+    # Text first - a stored row must always find its guideline
+    history_catalog.store_text(rows)
+    if HISTORY_BACKEND == 'sqlite':
+        history_db.insert_rows(rows)
+    else:
+        # The first save of a month moves last month's rows into the archive
+        _roll_over_if_new_month()
+        append_history_rows(rows)
+    try:
+        history_aggregates.apply_rows(rows)
+    except Exception as e:
+        # The rows are saved - never retry them for this; drop the store so the next save rebuilds it
+        print(f"Running aggregates update failed, rebuilding on next save: {e}", file=sys.stderr)
+        if os.path.exists(history_aggregates.AGGREGATES_FILE):
+            os.remove(history_aggregates.AGGREGATES_FILE)
+
+
+def history_available():
+    # Only whether any history exists - reading it is what needs the converted layout
+    history_queue.flush()
+    if HISTORY_BACKEND == 'sqlite':
+        return history_db.has_rows()
+    return os.path.exists(HISTORY_FILE) or bool(history_archive.list_partitions())
+
+
+def history_version():
+    """Changes whenever a completion is written or the hot file is archived"""
+    _sync()
+    if HISTORY_BACKEND == 'sqlite':
+        return ('sqlite', history_db.history_version())
+    stat = os.stat(HISTORY_FILE) if os.path.exists(HISTORY_FILE) else None
+    return (history_archive.archive_version(), (stat.st_ino, stat.st_size, stat.st_mtime_ns) if stat else None)
+
+
+def _with_text(df, columns=HISTORY_COLUMNS):
+    """Stored rows as the requested HISTORY_COLUMNS, joining the guideline text only when asked for"""
+    if any(column in GUIDELINE_COLUMNS for column in columns):
+        df = expand_history(df)
+    return df[list(columns)]
+
+
+def query_history(start=None, end=None, staff_id=None, equipment=None, status=None, columns=None):
+    """History rows matching the query, oldest first - only partitions overlapping [start, end) are read
+
+    start/end bound Start Time as 'YYYY-MM-DD HH:MM:SS' strings; columns limits the columns returned.
+    """
+    _sync()
+    columns = list(columns or HISTORY_COLUMNS)
+    if HISTORY_BACKEND == 'sqlite':
+        df = history_db.query_history(staff_id=staff_id, equipment=equipment, status=status, start=start, end=end)
+        return _with_text(df, columns)
+    # Filters need their own columns even when the caller does not, the text join needs the keys
+    wanted = [column for column in columns if column not in GUIDELINE_COLUMNS]
+    if len(wanted) < len(columns):
+        wanted += list(KEY_COLUMNS)
+    read_columns = list(dict.fromkeys(wanted + ["Staff ID", "Start Time", "Equipment", "Status"]))
+    archived = read_partitions(start, end, staff_id, equipment, status, read_columns)
+    hot = filter_history(read_history(columns=read_columns), start, end, staff_id, equipment, status)
+    return _with_text(pd.concat([archived, hot], ignore_index=True), columns)
+
+
+def iter_history_chunks(start=None, end=None, staff_id=None, equipment=None, status=None,
+                        chunk_rows=HISTORY_CHUNK_ROWS):
+    """Same rows as query_history, as DataFrames of at most chunk_rows - memory stays bounded"""
+    _sync()
+    if HISTORY_BACKEND == 'sqlite':
+        for chunk in history_db.iter_history(staff_id, equipment, status, start, end, chunk_rows):
+            yield _with_text(chunk)
+        return
+
+    for chunk in iter_partition_batches(start, end, staff_id, equipment, status, batch_rows=chunk_rows):
+        yield _with_text(chunk)
+    if staff_id is not None:
+        # One staff member's rows of the hot month come from the byte index, not a scan of the file
+        index = get_staff_index(HISTORY_FILE)
+        with history_lock(HISTORY_FILE):
+            index.refresh()
+            data = b''.join(index.iter_records(staff_id))
+        if not data:
+            return
+        for chunk in pd.read_csv(io.BytesIO(data), dtype=HISTORY_DTYPES, chunksize=chunk_rows):
+            chunk = filter_history(chunk, start, end, staff_id, equipment, status)
+            if not chunk.empty:
+                yield _with_text(chunk)
+        return
+    # The hot file only ever holds one month - read it whole under the lock, so a save or rollover
+    # cannot land mid-read, then parse it after the lock is released
+    with history_lock(HISTORY_FILE):
+        if not os.path.exists(HISTORY_FILE):
+            return
+        with open(HISTORY_FILE, 'rb') as handle:
+            data = handle.read()
+    if not data:
+        return
+    for chunk in pd.read_csv(io.BytesIO(data), dtype=HISTORY_DTYPES, chunksize=chunk_rows):
+        chunk = filter_history(chunk, start, end, staff_id, equipment, status)
+        if not chunk.empty:
+            yield _with_text(chunk)
+
+
+def staff_history_csv(staff_id):
+    """Path of a CSV file with one staff member's history, or None - rewritten only when the history changes
+
+    The file is written chunk by chunk from iter_history_chunks, so memory stays bounded however long
+    the history grows; read it with read_download when the download button is clicked.
+    """
+    # Include completions still waiting in the write queue
+    _sync()
+    if HISTORY_BACKEND == 'sqlite':
+        key = (history_db.HISTORY_DB, staff_id, history_db.history_version())
+    else:
+        index = get_staff_index(HISTORY_FILE)
+        with history_lock(HISTORY_FILE):
+            key = (HISTORY_FILE, staff_id, history_archive.archive_version(), index.refresh())
+
+    def build():
+        os.makedirs(DOWNLOAD_DIR, exist_ok=True)
+        name = hashlib.sha256(staff_id.encode('utf-8')).hexdigest()[:16]
+        path = os.path.join(DOWNLOAD_DIR, f"history-{name}.csv")
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        rows = 0
+        with open(tmp_path, 'wb') as handle:
+            for chunk in iter_history_chunks(staff_id=staff_id):
+                handle.write(chunk.to_csv(index=False, header=rows == 0, lineterminator='\n').encode('utf-8'))
+                rows += len(chunk)
+        if not rows:
+            os.remove(tmp_path)
+            return None
+        os.replace(tmp_path, path)
+        return path
+
+    return cached_download(key, build)
+
+
+def read_download(path):
+    """Bytes of a download file - pass as a callable so the file is only read on click"""
+    with open(path, 'rb') as handle:
+        return handle.read()
+
+
+def resolution_rows(staff_id, start_time, end_time, elapsed_seconds, scenarios, version):
+    """One history row per scenario of a completed drill - version is the catalog's, see catalog_version"""
+    status = "Resolved" if elapsed_seconds <= RESOLVE_LIMIT_SECONDS else "Failed"
+    return [
+        {
+            "Staff ID": staff_id,
+            "Start Time": start_time.strftime(TIME_FORMAT) if start_time else "",
+            "Stop Time": end_time.strftime(TIME_FORMAT),
+            "Equipment": scenario.equipment,
+            "Failure Scenario": scenario.failure_scenario,
+            "Status": status,
+            "Scenario ID": scenario.scenario_id,
+            "Catalog Version": version,
+            # Only stored once per catalog version, by history_catalog.store_text
+            "Guideline for Chief Controller": scenario.guidelines,
+            "Local Response": scenario.local_response,
+            "Duration (min)": round(elapsed_seconds / 60, 1)
+        }
+        for scenario in scenarios
+    ]
+
+
+class HistoryWriteQueue:
+    """Completions queued by the UI and written to the history backend in batches by one thread"""
+
+    def __init__(self, write=None, maxsize=HISTORY_QUEUE_SIZE, batch_size=HISTORY_BATCH_SIZE):
+        self.write = write or store_history_rows
+        self.batch_size = batch_size
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.last_error = None
+        # Rows of a failed batch, retried ahead of the next one - only the writer thread touches them
+        self._pending = []
+        self._thread = None
+        self._thread_lock = threading.Lock()
+
+    def _ensure_thread(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._thread_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="history-writer", daemon=True)
+                self._thread.start()
+
+    def put(self, rows):
+        """Queue the rows of one completion and return straight away"""
+        if rows:
+            self._ensure_thread()
+            self.queue.put(rows)
+
+    def _run(self):
+        while True:
+            try:
+                batches = [self.queue.get(timeout=HISTORY_RETRY_SECONDS if self._pending else None)]
+            except queue.Empty:
+                self._write([])
+                continue
+            while len(batches) < self.batch_size:
+                try:
+                    batches.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._write(batches)
+            for _ in batches:
+                self.queue.task_done()
+
+    def _write(self, batches):
+        rows = self._pending + [row for batch in batches for row in batch]
+        try:
+            self.write(rows)
+            self._pending = []
+            self.last_error = None
+        except Exception as e:
+            self._pending = rows
+            self.last_error = e
+            print(f"History write failed, {len(rows)} rows kept for retry: {e}", file=sys.stderr)
+
+    def flush(self):
+        """Block until every queued completion has been handed to the backend"""
+        if threading.current_thread() is self._thread:
+            # Called from a write on the writer thread itself - joining would wait on ourselves
+            return self.last_error is None
+        self.queue.join()
+        return self.last_error is None
+
+    def close(self):
+        """Flush, giving the rows of a failed batch one last try on the writer thread"""
+        if self._pending:
+            self._ensure_thread()
+            # An empty completion - the writer retries the pending rows with it
+            self.queue.put(())
+        return self.flush()
+
+
+history_queue = HistoryWriteQueue()
+# Streamlit stopping (Ctrl+C in run_tgs.bat) must not drop completions still in the queue
+atexit.register(history_queue.close)
+
+
+def flush():
+    return history_queue.flush()
+
+
+def save_resolution_data():
+    """Queue resolution data for the history writer"""
+    if not st.session_state.active_scenarios:
+        return
+
+    if history_queue.last_error is not None:
+        st.error(f"Error saving data: {str(history_queue.last_error)} (unsaved rows will be retried)")
+
+    catalog = get_catalog()
+    history_queue.put(resolution_rows(
+        st.session_state.staff_id,
+        st.session_state.scenario_start_time,
+        datetime.datetime.now(),
+        drill_timer.elapsed_seconds(),
+        catalog.resolve(st.session_state.active_scenarios),
+        catalog_version(catalog)
+    ))
+
+
+if __name__ == "__main__":
+    # Usage: python history_store.py migrate - once, after upgrading from a version that saved guideline text
+    if len(sys.argv) < 2 or sys.argv[1] != 'migrate':
+        print("Usage: python history_store.py migrate")
+        sys.exit(1)
+    print(f"Converted {migrate_history()} history rows to catalog references")
@@ -7,6 +7,7 @@ def install_requirements():
         'pandas',
         'numpy',
         'openpyxl',
+        'pyarrow',
         'streamlit-autorefresh'
     ]
     
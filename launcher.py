@@ -22,7 +22,11 @@ def launch_streamlit():
             sys.executable, '-m', 'streamlit', 'run', tgs_file,
             '--server.headless', 'true',
             '--server.port', '8501',
-            '--browser.gatherUsageStats', 'false'
+            '--browser.gatherUsageStats', 'false',
+            # The drill timer reruns a fragment every second per console - skip the full gc.collect() after each
+            '--runner.postScriptGC', 'false',
+            # The theme stylesheet is served from static/, see theme.py
+            '--server.enableStaticServing', 'true'
         ])
         
         # Wait a moment and open browser
@@ -1,5 +1,7 @@
 import streamlit as st
 
+from session_snapshot import restore_session_snapshot
+
 def authenticate_user(staff_id, password):
     """Simulate authentication - replace with actual backend"""
     valid_users = {
@@ -34,6 +36,9 @@ def show_login_page():
                     st.session_state.logged_in = True
                     st.session_state.username = user_name
                     st.session_state.staff_id = staff_id
+                    # Pick up a drill left running by a restart or a dropped connection
+                    if restore_session_snapshot(staff_id):
+                        st.toast("🔄 Your drill in progress was restored")
                     st.rerun()
                 else:
                     st.error("Invalid credentials")
@@ -0,0 +1,391 @@
+import hashlib
+import os
+import pickle
+import re
+import sys
+import threading
+from enum import Enum
+from typing import NamedTuple, Optional
+
+import openpyxl
+
+MOR_FILE = 'MOR_KGL.xlsx'
+
+# The only workbook columns the app uses - everything else is skipped while reading
+CATALOG_COLUMNS = ('Equipment', 'Failure Scenario', 'Failure Classification', 'ATS Alarm Description',
+                   'FSCADA Alarm Description', 'HMI Alarm', 'Guidelines for the Chief Controller', 'Local Response')
+
+# Bump when the snapshot layout changes so old snapshots are rebuilt instead of loaded
+SNAPSHOT_FORMAT = 2
+SNAPSHOT_SUFFIX = '.catalog.pkl'
+
+# Guideline labels in the order they appear in the MOR text - spacing and colons vary between rows
+GUIDELINE_LABELS = (
+    ('entering_service', r'train\s+entering\s+service\s*:?'),
+    ('in_service', r'train\s+already\s+in\s+service\s*:?'),
+    ('notes', r'note\s*:')
+)
+_GUIDELINE_LABEL_RE = re.compile('|'.join(f'(?P<{field}>{pattern})' for field, pattern in GUIDELINE_LABELS), re.IGNORECASE)
+_BULLET_RE = re.compile(r'\s*(?:•|\n)\s*')
+
+# Alarm bits - the alarm status of a selection is the OR of its scenarios' masks
+ALARM_ATS = 1
+ALARM_FSCADA = 2
+ALARM_HMI = 4
+
+# Cell values that mean "nothing here" in the MOR workbook
+EMPTY_VALUES = {'', 'n/a', 'nan', 'none', 'no alarm triggered'}
+
+# UTF-8 punctuation that was decoded as cp1252 somewhere upstream (e.g. 'â€¢' instead of '•')
+MOJIBAKE_REPLACEMENTS = {
+    'â€¢': '•',
+    'â€“': '–',
+    'â€”': '—',
+    'â€˜': '‘',
+    'â€™': '’',
+    'â€œ': '“',
+    'â€\x9d': '”',
+    'â€¦': '…'
+}
+
+# Sample data with the equipment list provided by user, used when the MOR workbook is missing or unreadable
+SAMPLE_MOR_DATA = {
+    'Equipment': ['TMS', 'Power', 'Traction', 'Brake', 'Suspension System', 'Train Doors', 'Auxiliary Driving Console', 'Train Coupler', 'Axle', 'Lightning', 'Pneumatic System', 'Air Conditioning Unit', 'Fire/Smoke Sensor', 'Heat Detector', 'Radio', 'IPIS', 'CCTV', 'Train Horn', 'Event Recorder', 'Obstacle Detection', 'Abnormal Noise & Vibration Generated', 'Rollback Detection', 'Failure of Train Wake Up', 'Excessive Wheel Slip/Slide', 'Train Overshoot or Undershoot', 'Foreign object on track', 'VATC', 'Loss of Driving Modes', 'All train doors at APG side not open', 'Trackside ATO', 'Wayside - Train Communication Channel', 'ATS', 'Switch Machine', '750 VDC Switchgear'],
+    'Failure Scenario': ['TMS failure', 'Power failure', 'Traction failure', 'Brake failure', 'Suspension failure', 'Door failure', 'Console failure', 'Coupler failure', 'Axle failure', 'Lightning failure', 'Pneumatic failure', 'AC failure', 'Fire sensor failure', 'Heat detector failure', 'Radio failure', 'IPIS failure', 'CCTV failure', 'Horn failure', 'Recorder failure', 'Detection failure', 'Noise/vibration', 'Rollback detected', 'Wake up failure', 'Wheel slip/slide', 'Train positioning error', 'Foreign object detected', 'VATC failure', 'Driving mode loss', 'Door opening failure', 'ATO failure', 'Communication failure', 'ATS failure', 'Switch failure', 'Switchgear failure'],
+    'Failure Classification': ['Major'] * 34,
+    'Guidelines for the Chief Controller': ['Follow emergency protocol'] * 34,
+    'Local Response': ['Immediate action required'] * 34,
+    'ATS Alarm Description': ['System alarm'] * 34,
+    'FSCADA Alarm Description': ['SCADA alarm'] * 34,
+    'HMI Alarm': ['HMI FAULT'] * 34
+}
+
+
+class Classification(Enum):
+    MAJOR = 'Major'
+    MINOR = 'Minor'
+
+    @classmethod
+    def parse(cls, value):
+        """Anything that does not say 'major' is treated as minor, as the pages always did"""
+        if isinstance(value, str) and 'major' in value.lower():
+            return cls.MAJOR
+        return cls.MINOR
+
+
+class GuidelineFields(NamedTuple):
+    """Guideline text split into the parts shown in the guidelines table"""
+    entering_service: str
+    in_service: str
+    notes: str
+    # Every bullet of the guideline, labels included - shown as a list when it has no labels
+    bullets: tuple
+
+
+class ScenarioRecord(NamedTuple):
+    """One MOR row - sessions keep only scenario_id and look the record up in the catalog"""
+    scenario_id: str
+    equipment: str
+    failure_scenario: str
+    classification: Classification
+    ats_alarm: Optional[str]
+    fscada_alarm: Optional[str]
+    hmi_alarm: Optional[str]
+    guidelines: Optional[str]
+    local_response: Optional[str]
+    guideline_fields: GuidelineFields
+    alarm_mask: int
+
+
+# One catalog per workbook path for the whole server process, shared by every session
+_catalog_cache = {}
+_catalog_lock = threading.Lock()
+# Indexes derived from a catalog, e.g. scenario search - {(build, catalog path): (catalog, index)}
+_index_cache = {}
+_index_lock = threading.Lock()
+
+
+class MorCatalog:
+    """Read-only MOR catalog shared by all sessions - rows are CATALOG_COLUMNS tuples"""
+
+    def __init__(self, rows, path, mtime, version=None):
+        self.rows = rows
+        self.path = path
+        self.mtime = mtime
+        # Checksum of the workbook the catalog was built from
+        self.version = version
+        # Index built once per catalog version so pages only do dictionary lookups
+        self.records = _build_records(rows)
+        self.by_id = {record.scenario_id: record for record in self.records}
+        self.equipment_list, self.scenarios_by_equipment = _build_index(self.records)
+
+    @property
+    def empty(self):
+        return not self.records
+
+    def scenarios_for(self, equipment):
+        """Scenarios of one equipment, MAJOR first then by scenario name"""
+        return self.scenarios_by_equipment.get(equipment, ())
+
+    def get_scenario(self, scenario_id):
+        return self.by_id.get(scenario_id)
+
+    def resolve(self, scenario_ids):
+        """Records for a list of scenario IDs, skipping IDs no longer in the catalog"""
+        return [self.by_id[scenario_id] for scenario_id in scenario_ids if scenario_id in self.by_id]
+
+
+def normalize_text(value):
+    """Canonical cell value: stripped, mojibake repaired, and None for every flavour of empty"""
+    if value is None or value != value:  # None or NaN
+        return None
+    value = fix_mojibake(str(value).strip())
+    if value.lower() in EMPTY_VALUES:
+        return None
+    return value
+
+
+def fix_mojibake(text):
+    """Repair UTF-8 text that was mis-decoded as cp1252"""
+    if not isinstance(text, str) or 'â€' not in text:
+        return text
+    try:
+        return text.encode('cp1252').decode('utf-8')
+    except UnicodeError:
+        # Mixed text that does not round-trip - replace the known sequences only
+        for broken, fixed in MOJIBAKE_REPLACEMENTS.items():
+            text = text.replace(broken, fixed)
+        return text
+
+
+def parse_guidelines(text):
+    """Split a guideline into entering-service, in-service and note parts plus its bullet list"""
+    if not text:
+        return GuidelineFields('', '', '', ())
+
+    bullets = tuple(bullet for bullet in _BULLET_RE.split(text.strip()) if bullet)
+
+    fields = {'entering_service': '', 'in_service': '', 'notes': ''}
+    matches = list(_GUIDELINE_LABEL_RE.finditer(text))
+    for match, next_match in zip(matches, matches[1:] + [None]):
+        end = next_match.start() if next_match else len(text)
+        if not fields[match.lastgroup]:
+            fields[match.lastgroup] = text[match.end():end].strip().strip('•').strip()
+    return GuidelineFields(fields['entering_service'], fields['in_service'], fields['notes'], bullets)
+
+
+def make_scenario_id(equipment, failure_scenario, occurrence=0):
+    """Stable ID from the row's identity, so it survives reloads and row reordering"""
+    key = f"{equipment}\x1f{failure_scenario}\x1f{occurrence}"
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()[:12]
+
+
+def _intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+def _build_records(rows):
+    """Convert catalog rows into ScenarioRecords with stable IDs"""
+    records = []
+    seen = {}
+    for row in rows:
+        equipment = normalize_text(row[0])
+        if equipment is None:
+            continue
+        failure_scenario = normalize_text(row[1]) or 'Unknown'
+        classification = row[2]
+        # Duplicate rows for the same equipment/scenario get their own ID
+        occurrence = seen.get((equipment, failure_scenario), 0)
+        seen[(equipment, failure_scenario)] = occurrence + 1
+
+        # Normalize once here so pages never re-check NaN / 'N/A' / 'No alarm triggered'
+        ats_alarm, fscada_alarm, hmi_alarm, guidelines, local_response = (normalize_text(value) for value in row[3:])
+        alarm_mask = ((ALARM_ATS if ats_alarm else 0)
+                      | (ALARM_FSCADA if fscada_alarm else 0)
+                      | (ALARM_HMI if hmi_alarm else 0))
+        records.append(ScenarioRecord(
+            make_scenario_id(equipment, failure_scenario, occurrence),
+            _intern(equipment),
+            failure_scenario,
+            Classification.parse(classification),
+            ats_alarm,
+            fscada_alarm,
+            hmi_alarm,
+            guidelines,
+            local_response,
+            parse_guidelines(guidelines),
+            alarm_mask
+        ))
+    return tuple(records)
+
+
+def _scenario_sort_key(scenario):
+    return (0 if scenario.classification is Classification.MAJOR else 1, str(scenario.failure_scenario))
+
+
+def _build_index(records):
+    """Ordered equipment list and presorted scenario tuples per equipment"""
+    grouped = {}
+    for scenario in records:
+        grouped.setdefault(scenario.equipment, []).append(scenario)
+
+    scenarios_by_equipment = {
+        equipment: tuple(sorted(scenarios, key=_scenario_sort_key))
+        for equipment, scenarios in grouped.items()
+    }
+    # dicts keep insertion order, so equipment stays in workbook order
+    return tuple(grouped), scenarios_by_equipment
+
+
+def sample_rows():
+    """Sample data as catalog rows"""
+    return [tuple(row) for row in zip(*(SAMPLE_MOR_DATA[column] for column in CATALOG_COLUMNS))]
+
+
+def read_mor_rows(path):
+    """Stream the first sheet in openpyxl read-only mode, keeping only CATALOG_COLUMNS"""
+    workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, None) or ()
+        positions = {str(name).strip(): i for i, name in enumerate(header) if name is not None}
+        if 'Equipment' not in positions:
+            raise ValueError(f"{path} has no 'Equipment' column")
+
+        indexes = [positions.get(column) for column in CATALOG_COLUMNS]
+        projected = []
+        for row in rows:
+            values = tuple(row[i] if i is not None and i < len(row) else None for i in indexes)
+            # Skip formatted-but-empty rows at the bottom of the sheet
+            if any(value is not None for value in values):
+                projected.append(values)
+        return projected
+    finally:
+        workbook.close()
+
+
+def snapshot_path(path):
+    """Location of the compiled snapshot for a workbook"""
+    return os.path.splitext(path)[0] + SNAPSHOT_SUFFIX
+
+
+def file_checksum(path):
+    """SHA-256 of the workbook contents"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def build_snapshot(path=MOR_FILE, checksum=None, rows=None):
+    """Compile the workbook into a versioned pickle snapshot next to it"""
+    if checksum is None:
+        checksum = file_checksum(path)
+    if rows is None:
+        rows = read_mor_rows(path)
+
+    snapshot = {
+        'format': SNAPSHOT_FORMAT,
+        'source_sha256': checksum,
+        'rows': rows
+    }
+    # Write to a temp file first so a reader never sees a half-written snapshot
+    target = snapshot_path(path)
+    tmp_path = f"{target}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, target)
+    return target
+
+
+def _load_snapshot(path, checksum):
+    """Return the snapshot rows if they are fresh for this checksum, else None"""
+    try:
+        with open(snapshot_path(path), 'rb') as f:
+            snapshot = pickle.load(f)
+    except Exception:
+        return None
+
+    if not isinstance(snapshot, dict) or snapshot.get('format') != SNAPSHOT_FORMAT:
+        return None
+    if snapshot.get('source_sha256') != checksum:
+        return None
+    return snapshot.get('rows')
+
+
+def _load_workbook(path):
+    """Read the MOR workbook via its snapshot when fresh, returning (rows, checksum) or (None, None)"""
+    try:
+        checksum = file_checksum(path)
+    except OSError:
+        return None, None
+
+    rows = _load_snapshot(path, checksum)
+    if rows is not None:
+        return rows, checksum
+
+    # Snapshot missing or stale - stream the xlsx and refresh the snapshot for next time
+    try:
+        rows = read_mor_rows(path)
+    except Exception:
+        return None, None
+
+    try:
+        build_snapshot(path, checksum=checksum, rows=rows)
+    except OSError:
+        pass
+    return rows, checksum
+
+
+def get_catalog(path=MOR_FILE):
+    """Return the shared catalog for path, reloading it when the workbook's mtime changes"""
+    path = os.path.abspath(path)
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        mtime = None
+
+    catalog = _catalog_cache.get(path)
+    if catalog is not None and catalog.mtime == mtime:
+        return catalog
+
+    with _catalog_lock:
+        # Another session may have reloaded it while we waited for the lock
+        catalog = _catalog_cache.get(path)
+        if catalog is not None and catalog.mtime == mtime:
+            return catalog
+
+        rows, version = _load_workbook(path) if mtime is not None else (None, None)
+        if rows is None:
+            # Keep serving the previous catalog if the workbook is half-saved or corrupt
+            if catalog is not None:
+                rows, version = catalog.rows, catalog.version
+            else:
+                rows, version = sample_rows(), 'sample'
+
+        catalog = MorCatalog(rows, path, mtime, version)
+        _catalog_cache[path] = catalog
+        return catalog
+
+
+def catalog_index(catalog, build):
+    """build(catalog.records) for this catalog version, built on first use and shared by every session"""
+    key = (build, catalog.path)
+    cached = _index_cache.get(key)
+    if cached is not None and cached[0] is catalog:
+        return cached[1]
+
+    with _index_lock:
+        cached = _index_cache.get(key)
+        if cached is not None and cached[0] is catalog:
+            return cached[1]
+        index = build(catalog.records)
+        _index_cache[key] = (catalog, index)
+        return index
+
+
+if __name__ == "__main__":
+    # Build step: python mor_catalog.py [workbook.xlsx]
+    workbook = sys.argv[1] if len(sys.argv) > 1 else MOR_FILE
+    print(f"Snapshot written to {build_snapshot(workbook)}")
@@ -0,0 +1,158 @@
+import html
+import threading
+from collections import OrderedDict
+from typing import NamedTuple
+
+from mor_catalog import Classification
+
+# Rendered fragments kept - a few per scenario, so the whole catalog fits many times over
+RENDER_CACHE_SIZE = 4096
+CLASSIFICATION_COLORS = {Classification.MAJOR: '#dc3545', Classification.MINOR: '#fd7e14'}
+
+
+class RenderCacheStats(NamedTuple):
+    hits: int
+    misses: int
+    size: int
+    capacity: int
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+# {(kind, scenario ID, catalog version): HTML} shared by every session of this process.
+# The catalog version is the workbook checksum, so an edited workbook never serves old fragments.
+_html_cache = OrderedDict()
+_html_cache_lock = threading.Lock()
+_hits = 0
+_misses = 0
+
+
+def escape(text):
+    """Catalog text as HTML text - the workbook is plain text, not markup"""
+    return html.escape(str(text), quote=False)
+
+
+def _badge(scenario):
+    return f'''<div style="
+    background: {CLASSIFICATION_COLORS[scenario.classification]};
+    color: white;
+    padding: 0.2rem 0.6rem;
+    border-radius: 12px;
+    font-size: 0.7rem;
+    font-weight: bold;
+    text-align: center;
+    margin-bottom: 0.3rem;
+    display: inline-block;
+    width: fit-content;
+    box-shadow: 0 1px 3px rgba(0,0,0,0.2);
+">
+    {scenario.classification.name}
+</div>'''
+
+
+def _summary(scenario):
+    class_color = CLASSIFICATION_COLORS[scenario.classification]
+    return f'''<div style="
+    background: #f8f9fa;
+    border-left: 3px solid {class_color};
+    padding: 0.4rem 0.6rem;
+    margin: 0.2rem 0;
+    border-radius: 3px;
+    font-size: 0.85rem;
+    line-height: 1.3;
+">
+    <strong style="color: #2c3e50;">{escape(scenario.equipment)}:</strong> {escape(scenario.failure_scenario)}
+    <span style="background: {class_color}; color: white; padding: 0.15rem 0.4rem; border-radius: 8px; font-size: 0.65rem; font-weight: bold; margin-left: 0.3rem;">{scenario.classification.name}</span>
+</div>'''
+
+
+def _guideline_title(scenario):
+    return f"{escape(scenario.equipment)}: {escape(scenario.failure_scenario)}"
+
+
+def _first_row(fields):
+    """Entering-service cell - a guideline without labels is shown whole, as its bullet list"""
+    if fields.entering_service or fields.in_service or fields.notes:
+        return escape(fields.entering_service) if fields.entering_service else "N/A"
+    if len(fields.bullets) > 1:
+        items = "".join(f"<li>{escape(bullet)}</li>" for bullet in fields.bullets)
+        return f'<ul style="margin: 0; padding-left: 1.2rem;">{items}</ul>'
+    return escape(fields.bullets[0]) if fields.bullets else "N/A"
+
+
+def _guideline_rows(scenario):
+    # No blank lines between rows, or markdown ends the HTML block early
+    fields = scenario.guideline_fields
+    return f'''<tr>
+    <td class="row-header">1)</td>
+    <td>{_first_row(fields)}</td>
+    <td rowspan="3">{escape(scenario.local_response or 'N/A')}</td>
+</tr>
+<tr>
+    <td class="row-header">2)</td>
+    <td>{escape(fields.in_service)}</td>
+</tr>
+<tr>
+    <td class="row-header">3)</td>
+    <td style="background: #fff8f0;">{escape(fields.notes) if fields.notes else "N/A"}</td>
+</tr>'''
+
+
+def cached_html(kind, build, scenario, version):
+    """HTML fragment for a scenario from the LRU cache, built by build(scenario) on a miss"""
+    global _hits, _misses
+    key = (kind, scenario.scenario_id, version)
+    # Hits skip the lock - get and move_to_end are single operations under the GIL, and a lock
+    # costs as much as building a fragment. The counters are for monitoring, so an increment
+    # lost to a thread switch does not matter.
+    fragment = _html_cache.get(key)
+    if fragment is not None:
+        try:
+            _html_cache.move_to_end(key)
+        except KeyError:
+            # Evicted by another session since the get
+            pass
+        _hits += 1
+        return fragment
+    fragment = build(scenario)
+    with _html_cache_lock:
+        _misses += 1
+        _html_cache[key] = fragment
+        while len(_html_cache) > RENDER_CACHE_SIZE:
+            _html_cache.popitem(last=False)
+    return fragment
+
+
+def scenario_badge(scenario, version):
+    """MAJOR/MINOR badge above a scenario button"""
+    return cached_html('badge', _badge, scenario, version)
+
+
+def scenario_summary(scenario, version):
+    """Compact card for a selected scenario"""
+    return cached_html('summary', _summary, scenario, version)
+
+
+def guideline_title(scenario, version):
+    """'Equipment: scenario' heading text of a scenario's guideline rows"""
+    return cached_html('guideline_title', _guideline_title, scenario, version)
+
+
+def guideline_table_rows(scenario, version):
+    """The three guidelines-table rows of an active scenario"""
+    return cached_html('guideline_rows', _guideline_rows, scenario, version)
+
+
+def render_cache_stats():
+    with _html_cache_lock:
+        return RenderCacheStats(_hits, _misses, len(_html_cache), RENDER_CACHE_SIZE)
+
+
+def clear_render_cache():
+    global _hits, _misses
+    with _html_cache_lock:
+        _html_cache.clear()
+        _hits = _misses = 0
@@ -0,0 +1,124 @@
+import collections
+import functools
+import json
+import time
+from typing import NamedTuple
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+# Most recent page renders kept - older ones fall off the end of the ring
+RING_SIZE = 50000
+# Elements whose body is markdown or raw HTML sent to the browser
+HTML_ELEMENTS = ('markdown', 'html')
+
+
+class Render(NamedTuple):
+    at: float
+    session_id: str
+    staff_id: str
+    page: str
+    wall_seconds: float
+    cpu_seconds: float
+    markdown_bytes: int
+    # Called from inside another instrumented page, whose numbers already include this render
+    nested: bool = False
+
+
+class PageStats(NamedTuple):
+    runs: int
+    wall_seconds: float
+    cpu_seconds: float
+    markdown_bytes: int
+
+    @property
+    def mean_wall_ms(self):
+        return self.wall_seconds * 1000 / self.runs if self.runs else 0.0
+
+    @property
+    def mean_cpu_ms(self):
+        return self.cpu_seconds * 1000 / self.runs if self.runs else 0.0
+
+
+# A deque with maxlen is the ring - append and list() copies are single operations under the GIL,
+# so script threads record renders without taking a lock
+_renders = collections.deque(maxlen=RING_SIZE)
+
+
+def _counting(enqueue, counter):
+    def counting_enqueue(msg):
+        if msg.WhichOneof('type') == 'delta' and msg.delta.WhichOneof('type') == 'new_element':
+            element = msg.delta.new_element
+            kind = element.WhichOneof('type')
+            if kind in HTML_ELEMENTS:
+                counter[0] += len(getattr(element, kind).body.encode('utf-8'))
+        enqueue(msg)
+    return counting_enqueue
+
+
+def instrument(page):
+    """Record wall time, CPU time and markdown bytes of every call of a page function
+
+    Nested pages count in their caller too - show_main_interface includes the page it shows, and
+    the fragments it runs. A fragment rerun on its own is an outermost render.
+    """
+    @functools.wraps(page)
+    def instrumented(*args, **kwargs):
+        ctx = get_script_run_ctx(suppress_warning=True)
+        if ctx is None:
+            return page(*args, **kwargs)
+        counter = [0]
+        # Shadow the context's enqueue for this call only - an outer page's counter sits behind it
+        shadowed = ctx.__dict__.get('enqueue')
+        ctx.enqueue = _counting(ctx.enqueue, counter)
+        wall_start, cpu_start = time.perf_counter(), time.thread_time()
+        try:
+            return page(*args, **kwargs)
+        finally:
+            wall, cpu = time.perf_counter() - wall_start, time.thread_time() - cpu_start
+            if shadowed is None:
+                del ctx.enqueue
+            else:
+                ctx.enqueue = shadowed
+            _renders.append(Render(time.time(), ctx.session_id, st.session_state.get('staff_id') or '',
+                                   page.__name__, wall, cpu, counter[0], shadowed is not None))
+    return instrumented
+
+
+def recent_renders(since=None):
+    """Renders still in the ring, oldest first - since is a time.time() lower bound"""
+    renders = list(_renders)
+    if since is not None:
+        renders = [render for render in renders if render.at >= since]
+    return renders
+
+
+def page_stats(since=None):
+    """{(session ID, staff ID, page): PageStats} over the renders still in the ring"""
+    totals = {}
+    for render in recent_renders(since):
+        key = (render.session_id, render.staff_id, render.page)
+        runs, wall, cpu, markdown_bytes = totals.get(key, (0, 0.0, 0.0, 0))
+        totals[key] = (runs + 1, wall + render.wall_seconds, cpu + render.cpu_seconds,
+                       markdown_bytes + render.markdown_bytes)
+    return {key: PageStats(*value) for key, value in totals.items()}
+
+
+def total_stats(since=None):
+    """PageStats over the outermost renders only - what the server actually spent and sent"""
+    runs, wall, cpu, markdown_bytes = 0, 0.0, 0.0, 0
+    for render in recent_renders(since):
+        if not render.nested:
+            runs, wall, cpu = runs + 1, wall + render.wall_seconds, cpu + render.cpu_seconds
+            markdown_bytes += render.markdown_bytes
+    return PageStats(runs, wall, cpu, markdown_bytes)
+
+
+def stats_json(since=None):
+    """page_stats as a JSON document, for download from the admin page"""
+    return json.dumps({
+        'generated': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'ring_size': RING_SIZE,
+        'pages': [{'session_id': session_id, 'staff_id': staff_id, 'page': page, **stats._asdict()}
+                  for (session_id, staff_id, page), stats in sorted(page_stats(since).items())]
+    }, indent=2)
@@ -1,4 +1,4 @@
 @echo off
 cd /d "%~dp0"
-python -m streamlit run main.py --server.headless true --server.port 8501 --browser.gatherUsageStats false
+python -m streamlit run main.py --server.headless true --server.port 8501 --browser.gatherUsageStats false --runner.postScriptGC false --server.enableStaticServing true
 pause
\ No newline at end of file
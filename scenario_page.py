@@ -2,6 +2,12 @@ import streamlit as st
 import datetime
 import time
 
+from mor_catalog import get_catalog
+from render_cache import scenario_badge, scenario_summary
+from render_stats import instrument
+from scenario_search import selection_warning
+
+@instrument
 def show_scenario_page():
     """Page 3: Failure Scenario Selection"""
     
@@ -18,11 +24,12 @@ def show_scenario_page():
             st.rerun()
         return
     
-    if st.session_state.mor_data is None or st.session_state.mor_data.empty:
+    st.session_state.mor_catalog = get_catalog()
+    if st.session_state.mor_catalog.empty:
         st.error("No data available!")
         return
     
-    df = st.session_state.mor_data
+    catalog = st.session_state.mor_catalog
     
     # Show instruction
     st.info("📋 Please select TWO failure scenarios (one from each equipment) before proceeding to guidelines.")
@@ -31,27 +38,9 @@ def show_scenario_page():
     if len(st.session_state.selected_scenarios) > 0:
         st.markdown(f'<div class="section-header" style="margin-bottom: 0.5rem;">Selected Scenarios: {len(st.session_state.selected_scenarios)}/2</div>', unsafe_allow_html=True)
         
-        # Create a more compact display for selected scenarios
-        scenarios_html = ""
-        for idx, scenario in enumerate(st.session_state.selected_scenarios):
-            classification = scenario.get('Failure Classification', '').strip()
-            class_color = '#dc3545' if 'major' in classification.lower() else '#fd7e14'
-            class_text = 'MAJOR' if 'major' in classification.lower() else 'MINOR'
-            
-            scenarios_html += f'''
-            <div style="
-                background: #f8f9fa;
-                border-left: 3px solid {class_color};
-                padding: 0.4rem 0.6rem;
-                margin: 0.2rem 0;
-                border-radius: 3px;
-                font-size: 0.85rem;
-                line-height: 1.3;
-            ">
-                <strong style="color: #2c3e50;">{scenario.get('Equipment', 'N/A')}:</strong> {scenario.get('Failure Scenario', 'N/A')}
-                <span style="background: {class_color}; color: white; padding: 0.15rem 0.4rem; border-radius: 8px; font-size: 0.65rem; font-weight: bold; margin-left: 0.3rem;">{class_text}</span>
-            </div>
-            '''
+        # Create a more compact display for selected scenarios - cards are prebuilt per scenario
+        scenarios_html = "\n".join(scenario_summary(scenario, catalog.version)
+                                   for scenario in catalog.resolve(st.session_state.selected_scenarios))
         
         st.markdown(scenarios_html, unsafe_allow_html=True)
         st.markdown('<div style="margin: 0.5rem 0; border-top: 1px solid #dee2e6;"></div>', unsafe_allow_html=True)
@@ -77,45 +66,19 @@ def show_scenario_page():
              with cols[0]:
                  st.markdown(f'<div class="equipment-section-header">🔧 {equipment}</div>', unsafe_allow_html=True)
                  
-                 equipment_scenarios = df[df['Equipment'] == equipment].to_dict('records')
+                 # Presorted in the catalog index: MAJOR first, then MINOR
+                 sorted_scenarios = catalog.scenarios_for(equipment)
                  
-                 if equipment_scenarios:
-                     # Sort scenarios: MAJOR first, then MINOR
-                     sorted_scenarios = sorted(equipment_scenarios, key=lambda x: (0 if 'major' in x.get('Failure Classification', '').lower() else 1, x.get('Failure Scenario', '')))
-                     
+                 if sorted_scenarios:
                      for i, scenario in enumerate(sorted_scenarios):
-                         classification = scenario.get('Failure Classification', '').strip()
-                         scenario_text = scenario.get('Failure Scenario', 'Unknown')
-                         
-                         # Create classification indicator
-                         if 'major' in classification.lower():
-                             class_color = '#dc3545'  # Red for major
-                             class_text = 'MAJOR'
-                         else:
-                             class_color = '#fd7e14'  # Orange for minor
-                             class_text = 'MINOR'
+                         classification = scenario.classification.value
+                         scenario_text = scenario.failure_scenario
                          
                          # Check if this scenario is already selected
-                         is_selected = any(s.get('Equipment') == equipment and s.get('Failure Scenario') == scenario_text for s in st.session_state.selected_scenarios)
+                         is_selected = scenario.scenario_id in st.session_state.selected_scenarios
                          
-                         # Display classification badge with compact styling
-                         st.markdown(f'''
-                         <div style="
-                             background: {class_color};
-                             color: white;
-                             padding: 0.2rem 0.6rem;
-                             border-radius: 12px;
-                             font-size: 0.7rem;
-                             font-weight: bold;
-                             text-align: center;
-                             margin-bottom: 0.3rem;
-                             display: inline-block;
-                             width: fit-content;
-                             box-shadow: 0 1px 3px rgba(0,0,0,0.2);
-                         ">
-                             {class_text}
-                         </div>
-                         ''', unsafe_allow_html=True)
+                         # Classification badge, prebuilt once per catalog version
+                         st.markdown(scenario_badge(scenario, catalog.version), unsafe_allow_html=True)
                          
                          # Create scenario button
                          scenario_id = f"scenario_{equipment}_{i}"
@@ -132,16 +95,17 @@ def show_scenario_page():
                              # Toggle scenario selection
                              if is_selected:
                                  # Remove from selected scenarios
-                                 st.session_state.selected_scenarios = [s for s in st.session_state.selected_scenarios 
-                                                                      if not (s.get('Equipment') == equipment and s.get('Failure Scenario') == scenario_text)]
+                                 st.session_state.selected_scenarios = [s for s in st.session_state.selected_scenarios
+                                                                      if s != scenario.scenario_id]
                                  st.info(f"❌ Scenario deselected from {equipment}")
                              else:
-                                 # Check if we can add more scenarios
-                                 if len(st.session_state.selected_scenarios) < 2:
-                                     st.session_state.selected_scenarios.append(scenario)
+                                 # Same rules as the sidebar search
+                                 warning = selection_warning(scenario, catalog, num_equipment)
+                                 if warning is None:
+                                     st.session_state.selected_scenarios.append(scenario.scenario_id)
                                      st.success(f"✅ Scenario selected from {equipment}")
                                  else:
-                                     st.warning("⚠️ You can only select 2 scenarios maximum.")
+                                     st.warning(warning)
                              st.rerun()
                          
                          st.markdown('<div style="margin-bottom: 0.3rem;"></div>', unsafe_allow_html=True)
@@ -152,45 +116,19 @@ def show_scenario_page():
              with cols[eq_idx % len(cols)]:
                  st.markdown(f'<div class="equipment-section-header">🔧 {equipment}</div>', unsafe_allow_html=True)
                  
-                 equipment_scenarios = df[df['Equipment'] == equipment].to_dict('records')
+                 # Presorted in the catalog index: MAJOR first, then MINOR
+                 sorted_scenarios = catalog.scenarios_for(equipment)
                  
-                 if equipment_scenarios:
-                     # Sort scenarios: MAJOR first, then MINOR
-                     sorted_scenarios = sorted(equipment_scenarios, key=lambda x: (0 if 'major' in x.get('Failure Classification', '').lower() else 1, x.get('Failure Scenario', '')))
-                     
+                 if sorted_scenarios:
                      for i, scenario in enumerate(sorted_scenarios):
-                         classification = scenario.get('Failure Classification', '').strip()
-                         scenario_text = scenario.get('Failure Scenario', 'Unknown')
-                         
-                         # Create classification indicator
-                         if 'major' in classification.lower():
-                             class_color = '#dc3545'  # Red for major
-                             class_text = 'MAJOR'
-                         else:
-                             class_color = '#fd7e14'  # Orange for minor
-                             class_text = 'MINOR'
+                         classification = scenario.classification.value
+                         scenario_text = scenario.failure_scenario
                          
                          # Check if this scenario is already selected
-                         is_selected = any(s.get('Equipment') == equipment and s.get('Failure Scenario') == scenario_text for s in st.session_state.selected_scenarios)
+                         is_selected = scenario.scenario_id in st.session_state.selected_scenarios
                          
-                         # Display classification badge with compact styling
-                         st.markdown(f'''
-                         <div style="
-                             background: {class_color};
-                             color: white;
-                             padding: 0.2rem 0.6rem;
-                             border-radius: 12px;
-                             font-size: 0.7rem;
-                             font-weight: bold;
-                             text-align: center;
-                             margin-bottom: 0.3rem;
-                             display: inline-block;
-                             width: fit-content;
-                             box-shadow: 0 1px 3px rgba(0,0,0,0.2);
-                         ">
-                             {class_text}
-                         </div>
-                         ''', unsafe_allow_html=True)
+                         # Classification badge, prebuilt once per catalog version
+                         st.markdown(scenario_badge(scenario, catalog.version), unsafe_allow_html=True)
                          
                          # Create scenario button
                          scenario_id = f"scenario_{equipment}_{i}"
@@ -207,21 +145,17 @@ def show_scenario_page():
                              # Toggle scenario selection
                              if is_selected:
                                  # Remove from selected scenarios
-                                 st.session_state.selected_scenarios = [s for s in st.session_state.selected_scenarios 
-                                                                      if not (s.get('Equipment') == equipment and s.get('Failure Scenario') == scenario_text)]
+                                 st.session_state.selected_scenarios = [s for s in st.session_state.selected_scenarios
+                                                                      if s != scenario.scenario_id]
                                  st.info(f"❌ Scenario deselected from {equipment}")
                              else:
-                                 # Check if we can add more scenarios
-                                 if len(st.session_state.selected_scenarios) < 2:
-                                     # Check if equipment already has a selected scenario
-                                     equipment_has_selection = any(s.get('Equipment') == equipment for s in st.session_state.selected_scenarios)
-                                     if not equipment_has_selection:
-                                         st.session_state.selected_scenarios.append(scenario)
-                                         st.success(f"✅ Scenario selected from {equipment}")
-                                     else:
-                                         st.warning(f"⚠️ You can only select one scenario per equipment. Please deselect the current scenario from {equipment} first.")
+                                 # Same rules as the sidebar search
+                                 warning = selection_warning(scenario, catalog, num_equipment)
+                                 if warning is None:
+                                     st.session_state.selected_scenarios.append(scenario.scenario_id)
+                                     st.success(f"✅ Scenario selected from {equipment}")
                                  else:
-                                     st.warning("⚠️ You can only select 2 scenarios maximum.")
+                                     st.warning(warning)
                              st.rerun()
                          
                          st.markdown('<div style="margin-bottom: 0.3rem;"></div>', unsafe_allow_html=True)
@@ -268,14 +202,7 @@ def show_scenario_page():
         # Only allow proceeding if exactly 2 scenarios are selected
         if len(st.session_state.selected_scenarios) == 2:
             if st.button("➡️ Guidelines", key="goto_guidelines", type="primary"):
-                st.session_state.active_scenarios = st.session_state.selected_scenarios
-                
-                # Set alarm status based on both scenarios
-                st.session_state.alarm_status = {
-                    'ats': any(scenario.get('ATS Alarm Description', '') not in ['N/A', '', 'No alarm triggered'] for scenario in st.session_state.selected_scenarios),
-                    'fscada': any(scenario.get('FSCADA Alarm Description', '') not in ['N/A', '', 'No alarm triggered'] for scenario in st.session_state.selected_scenarios),
-                    'hmi': any(scenario.get('HMI Alarm', '') not in ['N/A', '', 'No alarm triggered'] for scenario in st.session_state.selected_scenarios)
-                }
+                st.session_state.active_scenarios = list(st.session_state.selected_scenarios)
                 st.session_state.current_page = 'guidelines'
                 st.rerun()
         else:
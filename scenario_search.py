@@ -0,0 +1,174 @@
+import heapq
+import math
+import re
+from bisect import bisect_left
+
+import streamlit as st
+
+from mor_catalog import catalog_index, get_catalog
+
+# Field weights - a hit in the scenario name counts more than a hit in an alarm text
+SEARCH_FIELDS = (
+    ('failure_scenario', 3.0),
+    ('equipment', 2.0),
+    ('hmi_alarm', 1.5),
+    ('ats_alarm', 1.0),
+    ('fscada_alarm', 1.0)
+)
+# Prefix matches rank a little below whole-word matches
+PREFIX_FACTOR = 0.8
+# A single typed letter only matches whole words - expanding it would touch most of the index
+MIN_PREFIX = 2
+MAX_RESULTS = 8
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text):
+    return _TOKEN_RE.findall(text.lower()) if text else []
+
+
+class ScenarioSearchIndex:
+    """Inverted index over the searchable text of every catalog scenario"""
+
+    def __init__(self, records):
+        self.records = records
+        postings = {}
+        for idx, record in enumerate(records):
+            for field, weight in SEARCH_FIELDS:
+                for token in set(tokenize(getattr(record, field))):
+                    token_postings = postings.setdefault(token, {})
+                    token_postings[idx] = max(token_postings.get(idx, 0.0), weight)
+
+        # Rare words say more about a scenario than words every row shares
+        total = max(len(records), 1)
+        self.postings = {
+            token: {idx: weight * math.log(1 + total / len(hits)) for idx, weight in hits.items()}
+            for token, hits in postings.items()
+        }
+        self.tokens = sorted(self.postings)
+
+    def _prefix_tokens(self, prefix):
+        start = bisect_left(self.tokens, prefix)
+        for token in self.tokens[start:]:
+            if not token.startswith(prefix):
+                break
+            yield token
+
+    def _term_scores(self, term, allow_prefix, candidates=None):
+        tokens = [term]
+        if allow_prefix and len(term) >= MIN_PREFIX:
+            tokens = self._prefix_tokens(term)
+
+        scores = {}
+        for token in tokens:
+            hits = self.postings.get(token)
+            if not hits:
+                continue
+            factor = 1.0 if token == term else PREFIX_FACTOR
+            # Walk whichever side is smaller once earlier words have narrowed the field
+            if candidates is not None and len(candidates) < len(hits):
+                pairs = ((idx, hits[idx]) for idx in candidates if idx in hits)
+            elif candidates is not None:
+                pairs = ((idx, weight) for idx, weight in hits.items() if idx in candidates)
+            else:
+                pairs = hits.items()
+            for idx, weight in pairs:
+                if scores.get(idx, 0.0) < weight * factor:
+                    scores[idx] = weight * factor
+        return scores
+
+    def search(self, query, limit=MAX_RESULTS):
+        """Ranked scenarios matching every word of query - the last word may be partly typed"""
+        terms = tokenize(query)
+        if not terms:
+            return []
+
+        scores = None
+        for i, term in enumerate(terms):
+            term_scores = self._term_scores(term, allow_prefix=i == len(terms) - 1, candidates=scores)
+            if scores is None:
+                scores = term_scores
+            else:
+                scores = {idx: score + term_scores[idx] for idx, score in scores.items() if idx in term_scores}
+            if not scores:
+                return []
+
+        ranked = heapq.nsmallest(limit, scores.items(), key=lambda item: (-item[1], item[0]))
+        return [self.records[idx] for idx, _ in ranked]
+
+
+def get_search_index(catalog):
+    """Search index for this catalog version, built on first use"""
+    return catalog_index(catalog, ScenarioSearchIndex)
+
+
+def search_scenarios(query, catalog=None, limit=MAX_RESULTS):
+    if catalog is None:
+        catalog = get_catalog()
+    return get_search_index(catalog).search(query, limit)
+
+
+def selection_warning(scenario, catalog, equipment_count):
+    """Why scenario cannot join the selection, or None - the scenario page and the search share these rules
+
+    equipment_count is the number of selected equipment once scenario's equipment is in the selection.
+    """
+    if len(st.session_state.selected_scenarios) >= 2:
+        return "⚠️ You can only select 2 scenarios maximum."
+    # With several equipment failing, each contributes one scenario
+    if equipment_count > 1 and any(selected.equipment == scenario.equipment
+                                   for selected in catalog.resolve(st.session_state.selected_scenarios)):
+        return (f"⚠️ You can only select one scenario per equipment. "
+                f"Please deselect the current scenario from {scenario.equipment} first.")
+    return None
+
+
+def select_scenario(scenario, catalog=None):
+    """Select a scenario and its equipment in one step, keeping the page's selection rules"""
+    if catalog is None:
+        catalog = get_catalog()
+    new_equipment = scenario.equipment not in st.session_state.selected_equipment
+    if new_equipment and len(st.session_state.selected_equipment) >= 5:
+        st.warning("⚠️ Maximum 5 equipment can be selected. Deselect one first.")
+        return False
+
+    if scenario.scenario_id not in st.session_state.selected_scenarios:
+        warning = selection_warning(scenario, catalog, len(st.session_state.selected_equipment) + new_equipment)
+        if warning is not None:
+            st.warning(warning)
+            return False
+        st.session_state.selected_scenarios.append(scenario.scenario_id)
+
+    if new_equipment:
+        st.session_state.selected_equipment.append(scenario.equipment)
+        st.session_state.num_equipment_fail = max(st.session_state.num_equipment_fail, len(st.session_state.selected_equipment))
+    st.session_state.current_page = 'scenario'
+    return True
+
+
+def show_scenario_search():
+    """Sidebar search box - jump straight to a scenario instead of clicking through the grid"""
+    st.markdown("### 🔍 Find Scenario")
+    query = st.text_input(
+        "Search scenarios",
+        key="scenario_search_query",
+        placeholder="Scenario, equipment or alarm",
+        label_visibility="collapsed"
+    )
+    if not query:
+        return
+
+    results = search_scenarios(query)
+    if not results:
+        st.info("No matching scenarios")
+        return
+
+    for scenario in results:
+        if st.button(
+            f"{scenario.equipment}: {scenario.failure_scenario}",
+            key=f"search_result_{scenario.scenario_id}",
+            help=f"Classification: {scenario.classification.value}"
+        ):
+            if select_scenario(scenario):
+                st.rerun()
@@ -0,0 +1,112 @@
+import datetime
+import json
+import os
+import re
+import sys
+
+import streamlit as st
+
+from drill_timer import get_timer, restore_timer
+from mor_catalog import get_catalog
+
+SNAPSHOT_DIR = "session_snapshots"
+# Bump when the layout changes - snapshots of another format are ignored, not misread
+SNAPSHOT_FORMAT = 2
+# Session keys that make up a drill in progress - the timer itself is kept in drill_timer.py
+SNAPSHOT_KEYS = ('current_page', 'num_equipment_fail', 'selected_equipment', 'selected_scenarios',
+                 'active_scenarios')
+SCENARIO_KEYS = ('selected_scenarios', 'active_scenarios')
+
+
+def snapshot_path(staff_id, snapshot_dir=SNAPSHOT_DIR):
+    # Staff IDs come from the login form - keep them to safe file name characters
+    return os.path.join(snapshot_dir, re.sub(r'[^A-Za-z0-9_-]', '_', staff_id) + '.json')
+
+
+def _copy(value):
+    return list(value) if isinstance(value, list) else value
+
+
+def build_snapshot(state, timer=None):
+    """Snapshot dict of a session's drill and its DrillTimer - only JSON types, so it round-trips exactly"""
+    start_time = state.get('scenario_start_time')
+    snapshot = {'format': SNAPSHOT_FORMAT, 'staff_id': state.get('staff_id')}
+    # Copies - pages append to the session's lists in place
+    snapshot.update({key: _copy(state.get(key)) for key in SNAPSHOT_KEYS})
+    snapshot['timer'] = timer.to_snapshot() if timer is not None else None
+    snapshot['scenario_start_time'] = start_time.isoformat() if start_time else None
+    return snapshot
+
+
+def write_snapshot(snapshot, snapshot_dir=SNAPSHOT_DIR):
+    os.makedirs(snapshot_dir, exist_ok=True)
+    path = snapshot_path(snapshot['staff_id'], snapshot_dir)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    # allow_nan=False - a NaN would make the file unreadable as JSON
+    data = json.dumps(snapshot, separators=(',', ':'), ensure_ascii=False, allow_nan=False)
+    with open(tmp_path, 'w', encoding='utf-8') as handle:
+        handle.write(data)
+        handle.flush()
+        os.fsync(handle.fileno())
+    os.replace(tmp_path, path)
+
+
+def read_snapshot(staff_id, snapshot_dir=SNAPSHOT_DIR):
+    """The staff member's last snapshot, or None if missing, unreadable or of another format"""
+    try:
+        with open(snapshot_path(staff_id, snapshot_dir), encoding='utf-8') as handle:
+            snapshot = json.load(handle)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(snapshot, dict) or snapshot.get('format') != SNAPSHOT_FORMAT:
+        return None
+    if snapshot.get('staff_id') != staff_id:
+        return None
+    return snapshot
+
+
+def clear_snapshot(staff_id, snapshot_dir=SNAPSHOT_DIR):
+    try:
+        os.remove(snapshot_path(staff_id, snapshot_dir))
+    except FileNotFoundError:
+        pass
+
+
+def save_session_snapshot():
+    """Write the drill state if it changed since the last run - call once at the top of every run
+
+    Every page transition ends in st.rerun(), so the run after it persists the new state.
+    """
+    if not st.session_state.get('logged_in') or not st.session_state.get('staff_id'):
+        return
+    snapshot = build_snapshot(st.session_state, get_timer())
+    if snapshot == st.session_state.get('session_snapshot'):
+        return
+    try:
+        write_snapshot(snapshot)
+    except (OSError, ValueError) as e:
+        # A lost snapshot must never stop the drill itself
+        print(f"Session snapshot not saved: {e}", file=sys.stderr)
+        return
+    st.session_state.session_snapshot = snapshot
+
+
+def restore_session_snapshot(staff_id):
+    """Put the staff member's saved drill back into the session, returns True if there was one"""
+    snapshot = read_snapshot(staff_id)
+    if snapshot is None:
+        return False
+    catalog = get_catalog()
+    for key in SNAPSHOT_KEYS:
+        if snapshot.get(key) is not None:
+            st.session_state[key] = _copy(snapshot[key])
+    # Scenario IDs are stable across workbook edits - drop only the ones no longer in the catalog
+    for key in SCENARIO_KEYS:
+        st.session_state[key] = [scenario.scenario_id for scenario in catalog.resolve(st.session_state[key])]
+    if snapshot.get('timer'):
+        # Carries on counting from where the saved drill was, and keeps its fired events
+        restore_timer(snapshot['timer'])
+    if snapshot.get('scenario_start_time'):
+        st.session_state.scenario_start_time = datetime.datetime.fromisoformat(snapshot['scenario_start_time'])
+    st.session_state.session_snapshot = snapshot
+    return bool(st.session_state.active_scenarios or st.session_state.selected_equipment)
@@ -0,0 +1,88 @@
+"""Running aggregates kept up by apply_rows against a full rebuild from the history
+
+Run from the repository root: python -m pytest tests
+"""
+import datetime
+import os
+
+import pytest
+
+import history_aggregates
+import history_store
+
+SAVES = 40
+
+
+def _completion(i):
+    """Two scenario rows of one drill, the way a completion is saved"""
+    begin = datetime.datetime(2024, 3, 1) + datetime.timedelta(minutes=10 * i)
+    seconds = 60 + 37 * i % 500
+    return [{
+        "Staff ID": f"TGS{i % 3 + 1:03d}",
+        "Start Time": begin.strftime("%Y-%m-%d %H:%M:%S"),
+        "Stop Time": (begin + datetime.timedelta(seconds=seconds)).strftime("%Y-%m-%d %H:%M:%S"),
+        "Equipment": equipment,
+        "Failure Scenario": f"Failure scenario {i % 4}",
+        "Status": "Resolved" if seconds <= 300 else "Failed",
+        "Scenario ID": f"{equipment}-{i % 4}",
+        "Catalog Version": "test",
+        "Duration (min)": round(seconds / 60, 1)
+    } for equipment in ("TMS", "Power")]
+
+
+def _save(i):
+    rows = _completion(i)
+    history_store.append_history_rows(rows)
+    history_aggregates.apply_rows(rows)
+
+
+def _forget_state():
+    """Drop the in-memory store, as a second process would see the files"""
+    history_aggregates._state.update(mtime=None, groups=None, generation=None, offset=0, journal_rows=0)
+
+
+@pytest.fixture(autouse=True)
+def history_dir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(history_store, "HISTORY_BACKEND", "csv")
+    # Small enough that the saves below go through several compactions
+    monkeypatch.setattr(history_aggregates, "COMPACT_ROWS", 7)
+    _forget_state()
+    yield tmp_path
+    _forget_state()
+
+
+def test_apply_rows_matches_rebuild():
+    for i in range(SAVES):
+        _save(i)
+        assert history_aggregates.verify_aggregates() == []
+    stored = history_aggregates._current(history_aggregates.AGGREGATES_FILE)
+    assert sum(count for count, *_ in stored['equipment'].values()) == SAVES * 2
+
+    _forget_state()
+    assert history_aggregates.verify_aggregates() == []
+
+
+def test_save_appends_to_journal_only():
+    _save(0)
+    path = history_aggregates.AGGREGATES_FILE
+    snapshot_mtime = os.stat(path).st_mtime_ns
+    generation = history_aggregates._state['generation']
+    _save(1)
+    _save(2)
+    assert os.stat(path).st_mtime_ns == snapshot_mtime
+    with open(history_aggregates.journal_path(path, generation), encoding='utf-8') as handle:
+        assert len(handle.readlines()) == 4
+    assert history_aggregates.verify_aggregates() == []
+
+
+def test_half_written_journal_line_is_dropped():
+    _save(0)
+    _save(1)
+    journal = history_aggregates.journal_path(history_aggregates.AGGREGATES_FILE, history_aggregates._state['generation'])
+    with open(journal, 'a', encoding='utf-8') as handle:
+        handle.write('["TGS009", "2024-03-')
+    _forget_state()
+    assert history_aggregates.verify_aggregates() == []
+    _save(2)
+    assert history_aggregates.verify_aggregates() == []
@@ -0,0 +1,88 @@
+import glob
+import hashlib
+import os
+import threading
+
+import streamlit as st
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+# Stylesheet sources, one per app
+THEME_DIR = os.path.join(BASE_DIR, "theme")
+# Served at app/static/ next to the app scripts - server.enableStaticServing in .streamlit/config.toml
+STATIC_DIR = os.path.join(BASE_DIR, "static")
+STATIC_URL = "app/static"
+# Inter (SIL Open Font License, https://github.com/rsms/inter/releases), served from the static directory
+FONT_FILE = "fonts/InterVariable.woff2"
+HASH_LENGTH = 12
+
+# {name: (source and font (mtime, size), stylesheet URL)}
+_stylesheets = {}
+_stylesheets_lock = threading.Lock()
+
+
+def _content_hash(data):
+    return hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+
+
+def _font_face(static_dir):
+    sources = ["local('Inter')", "local('Inter Variable')"]
+    path = os.path.join(static_dir, FONT_FILE)
+    if os.path.exists(path):
+        with open(path, 'rb') as handle:
+            version = _content_hash(handle.read())
+        # Relative to the stylesheet, served from the same directory - versioned by content like the sheet
+        sources.append(f"url('{FONT_FILE}?v={version}') format('woff2')")
+    return ("@font-face {\n    font-family: 'Inter';\n    font-weight: 100 900;\n    font-display: swap;\n"
+            f"    src: {', '.join(sources)};\n}}\n\n")
+
+
+def stylesheet_css(name, theme_dir=THEME_DIR, static_dir=STATIC_DIR):
+    with open(os.path.join(theme_dir, f"{name}.css"), encoding='utf-8') as handle:
+        return _font_face(static_dir) + handle.read()
+
+
+def build_stylesheet(name, theme_dir=THEME_DIR, static_dir=STATIC_DIR):
+    """Write static/<name>.<content hash>.css from theme/<name>.css, returns its file name
+
+    The hash changes with the content, so browsers may cache each file for as long as they like.
+    """
+    data = stylesheet_css(name, theme_dir, static_dir).encode('utf-8')
+    file_name = f"{name}.{_content_hash(data)}.css"
+    path = os.path.join(static_dir, file_name)
+    if not os.path.exists(path):
+        os.makedirs(static_dir, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as handle:
+            handle.write(data)
+        os.replace(tmp_path, path)
+        for stale in glob.glob(os.path.join(static_dir, f"{name}.*.css")):
+            if stale != path:
+                os.remove(stale)
+    return file_name
+
+
+def _source_stat(name):
+    stat = os.stat(os.path.join(THEME_DIR, f"{name}.css"))
+    # The font is part of the sheet too - adding or replacing it builds a new one
+    font_path = os.path.join(STATIC_DIR, FONT_FILE)
+    font = (os.stat(font_path).st_mtime_ns, os.path.getsize(font_path)) if os.path.exists(font_path) else None
+    return (stat.st_mtime_ns, stat.st_size, font)
+
+
+def stylesheet_url(name):
+    """URL of the app's hashed stylesheet, rebuilt only when theme/<name>.css or the font changes"""
+    stat = _source_stat(name)
+    with _stylesheets_lock:
+        cached = _stylesheets.get(name)
+        if cached is None or cached[0] != stat:
+            cached = _stylesheets[name] = (stat, f"{STATIC_URL}/{build_stylesheet(name)}")
+        return cached[1]
+
+
+def apply_theme(name):
+    """Link the app's stylesheet - each run sends a short tag instead of the whole sheet"""
+    if st.get_option("server.enableStaticServing"):
+        st.markdown(f'<link rel="stylesheet" href="{stylesheet_url(name)}">', unsafe_allow_html=True)
+    else:
+        # Started without .streamlit/config.toml - inline the sheet as before rather than lose the theme
+        st.markdown(f"<style>\n{stylesheet_css(name)}</style>", unsafe_allow_html=True)